@@ -1,11 +1,14 @@
 from typing import Optional
 import logging
+from asgiref.sync import sync_to_async
 from ninja import Router
-from ninja_jwt.authentication import JWTAuth
+from ninja_jwt.authentication import AsyncJWTAuth
 
 from shared.service.response import ResponseService
-from shared.service.auth_cookie import CookieJWTAuth
-from account import schema, service as acc_svc, command as acc_cmd, query as acc_query
+from shared.service.auth_cookie import AsyncCookieJWTAuth
+from shared.service.hashing import HashingUnavailable, get_hashing_executor
+from shared.service.throttling import SlidingWindowThrottle, async_throttle
+from account import schema, service as acc_svc, command as acc_cmd, query as acc_query, models as acc_mdl
 
 router = Router()
 
@@ -14,13 +17,34 @@ request_logger = logging.getLogger('request')
 security_logger = logging.getLogger('security')
 performance_logger = logging.getLogger('performance')
 
+# Checked off the event loop before the view body runs, so throttled
+# attempts never reach the hasher
+login_throttle = SlidingWindowThrottle('login')
+register_throttle = SlidingWindowThrottle('register')
+
+def hashing_unavailable(e: HashingUnavailable):
+    """429/503 with Retry-After when the password hashing pool is saturated"""
+    security_logger.warning(f'Password hashing unavailable: {str(e)}')
+    response = ResponseService.error(
+        message='سرور مشغول است، لطفا دوباره تلاش کنید.',
+        errors={'detail': str(e)},
+        status_code=e.status_code
+    )
+    response['Retry-After'] = str(e.retry_after)
+    return response
+
+
 @router.post('/register', auth=None)
-def register(request, user_data: schema.RegisterSchemaIn):
+@async_throttle(register_throttle)
+async def register(request, user_data: schema.RegisterSchemaIn):
     try:
-        command = acc_cmd.CreateUserCommand(**user_data.dict())
+        # Hashed on the pool before the transaction opens
+        password_hash = await get_hashing_executor().amake_password(user_data.password)
+        command = acc_cmd.CreateUserCommand(**user_data.dict(), password_hash=password_hash)
         handler = acc_cmd.UserCommandHandler()
-        user = handler.handle(command)
-        login_data = acc_svc.AuthService().login(**user_data.dict())
+        user = await sync_to_async(handler.handle)(command)
+        # The password was just set, no need to check it again
+        login_data = await sync_to_async(acc_svc.AuthService().issue_tokens)(user)
         logger.info(f'Register Success  for User{user.mobile}')
         return ResponseService.success_token(
             message='ثبت نام موفق!',
@@ -32,6 +56,14 @@ def register(request, user_data: schema.RegisterSchemaIn):
             },
             status_code=201
         )
+    except HashingUnavailable as e:
+        return hashing_unavailable(e)
+    except acc_svc.UserAlreadyExists as e:
+        return ResponseService.error(
+                message='ثبت نام ناموفق!',
+                errors={'mobile': str(e)},
+                status_code=409
+            )
     except Exception as e:
         logger.error(f"Error in register view: {str(e)}", exc_info=True)
         return ResponseService.error(
@@ -41,10 +73,11 @@ def register(request, user_data: schema.RegisterSchemaIn):
             )
     
 @router.post('/login', auth=None)
-def login(request, user_data: schema.LoginSchemaIn):
+@async_throttle(login_throttle)
+async def login(request, user_data: schema.LoginSchemaIn):
     try:
         service = acc_svc.AuthService()
-        user = service.login(**user_data.dict())
+        user = await service.alogin(**user_data.dict())
         logger.info(f'Login Success  for User{user.get('mobile')}')
         return ResponseService.success_token(
                 message='ورود موفق!',
@@ -55,6 +88,8 @@ def login(request, user_data: schema.LoginSchemaIn):
                 },
                 status_code=200,
             )
+    except HashingUnavailable as e:
+        return hashing_unavailable(e)
     except Exception as e:
         logger.error(f"Error in login view: {str(e)}", exc_info=True)
         return ResponseService.error(
@@ -64,7 +99,7 @@ def login(request, user_data: schema.LoginSchemaIn):
             )
     
 @router.post('/token/refresh', auth=None)
-def refresh_token(request):
+async def refresh_token(request):
     """
     Refresh JWT access token using the refresh token stored in cookies.
     """
@@ -79,7 +114,7 @@ def refresh_token(request):
                 status_code=401,
             )
 
-        access_token = acc_svc.AuthService().refresh_token(refresh_token)
+        access_token = await sync_to_async(acc_svc.AuthService().refresh_token)(refresh_token)
 
         # ✅ Create response
         return ResponseService.success_token(
@@ -96,10 +131,10 @@ def refresh_token(request):
         )
     
 @router.post('/logout', auth=None)
-def logout(request, token_data: schema.LogoutSchemaIn):
+async def logout(request, token_data: schema.LogoutSchemaIn):
     try:
         service = acc_svc.AuthService()
-        success = service.logout(request, token_data.refresh)
+        success = await sync_to_async(service.logout)(request, token_data.refresh)
         if not success:
             return ResponseService.error(
                 message='خطا در خروج',
@@ -119,19 +154,18 @@ def logout(request, token_data: schema.LogoutSchemaIn):
             status_code=500
         )
 
-@router.get('/me', auth=CookieJWTAuth())
-def me(request):
+@router.get('/me', auth=AsyncCookieJWTAuth(stateless=True))
+async def me(request):
     try:
-        query = acc_query.GetUserByMobileQuery(request.auth.mobile)
-        handler = acc_query.UserQueryHandler()
-        user = handler.handle(query)
+        # Served from the token claims, the user row is not loaded
+        user = request.auth
         
         logger.info(f'ME Query Success  for User{user.mobile}')
         return ResponseService.success(
             message=' موفق!',
             data={
                 'mobile': user.mobile,
-                'role': user.get_role_display(),
+                'role': dict(acc_mdl.User.ROLES).get(user.role),
                 'profile': {
                     'subject': 'Math',
                     'bio': '10 years of experience'
@@ -150,13 +184,13 @@ def me(request):
 
 # Student CRUD #
 
-@router.post('/create/student/profile', auth=CookieJWTAuth())
-def create_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
+@router.post('/create/student/profile', auth=AsyncCookieJWTAuth())
+async def create_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateStudentProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.StudentProfileCommandHandler()
-        profile  = handler.handle(command)
+        profile  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دانش آموز با موفقیت ساخته شد.',
             data={
@@ -172,13 +206,13 @@ def create_student_profile(request, user_data: schema.CreateStudentProfileSchema
                 status_code=400
             )
     
-@router.get('/get/student/profile', auth=JWTAuth())
-def get_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
+@router.get('/get/student/profile', auth=AsyncJWTAuth())
+async def get_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateStudentProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.StudentProfileCommandHandler()
-        profile  = handler.handle(command)
+        profile  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دانش آموز با موفقیت ساخته شد.',
             data={
@@ -194,13 +228,13 @@ def get_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn)
                 status_code=400
             )
     
-@router.put('/update/student/profile', auth=JWTAuth())
-def update_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
+@router.put('/update/student/profile', auth=AsyncJWTAuth())
+async def update_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateStudentProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.StudentProfileCommandHandler()
-        profile  = handler.handle(command)
+        profile  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دانش آموز با موفقیت ساخته شد.',
             data={
@@ -216,13 +250,13 @@ def update_student_profile(request, user_data: schema.CreateStudentProfileSchema
                 status_code=400
             )
     
-@router.delete('/delete/student/profile', auth=JWTAuth())
-def delete_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
+@router.delete('/delete/student/profile', auth=AsyncJWTAuth())
+async def delete_student_profile(request, user_data: schema.CreateStudentProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateStudentProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.StudentProfileCommandHandler()
-        profile  = handler.handle(command)
+        profile  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دانش آموز با موفقیت ساخته شد.',
             data={
@@ -240,13 +274,13 @@ def delete_student_profile(request, user_data: schema.CreateStudentProfileSchema
 
 # Teacher CRUD
 
-@router.post('/create/teacher/profile', auth=CookieJWTAuth())
-def create_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.post('/create/teacher/profile', auth=AsyncCookieJWTAuth())
+async def create_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل معلم با موفقیت ساخته شد.',
             data={
@@ -262,13 +296,13 @@ def create_teacher_profile(request, user_data: schema.CreateTeacherProfileSchema
                 status_code=400
             )
     
-@router.get('/get/teacher/profile', auth=JWTAuth())
-def get_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.get('/get/teacher/profile', auth=AsyncJWTAuth())
+async def get_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -284,13 +318,13 @@ def get_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn)
                 status_code=400
             )
     
-@router.put('/update/teacher/profile', auth=JWTAuth())
-def update_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.put('/update/teacher/profile', auth=AsyncJWTAuth())
+async def update_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -306,13 +340,13 @@ def update_teacher_profile(request, user_data: schema.CreateTeacherProfileSchema
                 status_code=400
             )
     
-@router.delete('/delete/teacher/profile', auth=JWTAuth())
-def delete_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.delete('/delete/teacher/profile', auth=AsyncJWTAuth())
+async def delete_teacher_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -330,13 +364,13 @@ def delete_teacher_profile(request, user_data: schema.CreateTeacherProfileSchema
 
 # Parent CRUD
 
-@router.post('/create/parent/profile', auth=JWTAuth())
-def create_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.post('/create/parent/profile', auth=AsyncJWTAuth())
+async def create_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -352,13 +386,13 @@ def create_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaI
                 status_code=400
             )
     
-@router.get('/get/parent/profile', auth=JWTAuth())
-def get_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.get('/get/parent/profile', auth=AsyncJWTAuth())
+async def get_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -374,13 +408,13 @@ def get_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
                 status_code=400
             )
     
-@router.put('/update/parent/profile', auth=JWTAuth())
-def update_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.put('/update/parent/profile', auth=AsyncJWTAuth())
+async def update_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -396,13 +430,13 @@ def update_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaI
                 status_code=400
             )
     
-@router.delete('/delete/parent/profile', auth=JWTAuth())
-def delete_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
+@router.delete('/delete/parent/profile', auth=AsyncJWTAuth())
+async def delete_parent_profile(request, user_data: schema.CreateTeacherProfileSchemaIn):
     try:
         user = request.auth
         command = acc_cmd.CreateTeacherProfileCommand(user=user, **user_data.dict())
         handler = acc_cmd.TeacherProfileCommandHandler()
-        Teacher  = handler.handle(command)
+        Teacher  = await sync_to_async(handler.handle)(command)
         return ResponseService.success(
             message='پروفایل دکتر با موفقیت ساخته شد.',
             data={
@@ -3,4 +3,23 @@ from django.apps import AppConfig
 
 class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'account'
\ No newline at end of file
+    name = 'account'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save, pre_save
+        from ninja_jwt.token_blacklist.models import BlacklistedToken
+        from shared.service.tokens import blacklisted_token_saved
+        from account import cache
+
+        post_save.connect(
+            blacklisted_token_saved,
+            sender=BlacklistedToken,
+            dispatch_uid='account.blacklisted_token_saved'
+        )
+
+        # The user cache is invalidated by the model, whoever saves it
+        user_model = get_user_model()
+        pre_save.connect(cache.user_pre_save, sender=user_model, dispatch_uid='account.user_pre_save')
+        post_save.connect(cache.user_saved, sender=user_model, dispatch_uid='account.user_saved')
+        post_delete.connect(cache.user_deleted, sender=user_model, dispatch_uid='account.user_deleted')
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from shared.repository.cache import ReadThroughCache
+from account import models as acc_mdl
+
+# Bump the version whenever the cached User shape changes
+user_cache = ReadThroughCache(
+    'account:user',
+    version=2,
+    timeout=getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+)
+
+# What the auth path and /me read; the password hash and the permission
+# flags never leave the database
+CACHED_FIELDS = ('id', 'username', 'mobile', 'role', 'first_name', 'last_name', 'is_active')
+
+
+def _user_keys(user_id=None, mobiles: Iterable[str] = ()) -> List[str]:
+    keys = [user_cache.key('mobile', mobile) for mobile in dict.fromkeys(mobiles) if mobile]
+    if user_id is not None:
+        keys.insert(0, user_cache.key('id', user_id))
+    return keys
+
+
+def _keys_for(data: Dict[str, Any]) -> List[str]:
+    return _user_keys(data['id'], [data['mobile']])
+
+
+def _to_cache(user: Optional[acc_mdl.User]) -> Optional[Dict[str, Any]]:
+    if user is None:
+        return None
+    return {name: getattr(user, name) for name in CACHED_FIELDS}
+
+
+def _from_cache(data: Optional[Dict[str, Any]]) -> Optional[acc_mdl.User]:
+    """
+    User with only CACHED_FIELDS loaded. The other fields are deferred:
+    reading one queries the database, save() writes the loaded ones only.
+    """
+    if data is None:
+        return None
+    # from_db() takes the values in model field order
+    names = [f.attname for f in acc_mdl.User._meta.concrete_fields if f.attname in data]
+    return acc_mdl.User.from_db('default', names, [data[name] for name in names])
+
+
+class UserCache:
+    """Users by id and by mobile, read through the cache (CACHED_FIELDS only)"""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def get_by_id(self, user_id: int) -> Optional[acc_mdl.User]:
+        return _from_cache(user_cache.get_or_load(
+            user_cache.key('id', user_id),
+            lambda: _to_cache(self.repository.get_by_id(user_id)),
+            _keys_for
+        ))
+
+    def get_by_mobile(self, mobile: str) -> acc_mdl.User:
+        """Raises User.DoesNotExist like UserRepository.get_by_mobile"""
+        return _from_cache(user_cache.get_or_load(
+            user_cache.key('mobile', mobile),
+            lambda: _to_cache(self.repository.get_by_mobile(mobile)),
+            _keys_for
+        ))
+
+
+def get_user_by_id(user_id) -> Optional[acc_mdl.User]:
+    """User loader of CookieJWTAuth (AUTH_USER_LOADER)"""
+    from account.repository import UserRepository
+    return UserCache(UserRepository()).get_by_id(user_id)
+
+
+def invalidate_user(user_id=None, *mobiles: str) -> None:
+    """
+    Drop the cached user once the current transaction commits, so readers
+    cannot cache the row again before the change is visible.
+    Without a mobile the current one is looked up.
+    """
+    if user_id is not None and not mobiles:
+        mobiles = tuple(acc_mdl.User.objects.filter(pk=user_id).values_list('mobile', flat=True))
+    keys = _user_keys(user_id, mobiles)
+    if keys:
+        transaction.on_commit(lambda: user_cache.invalidate(keys))
+
+
+def user_pre_save(sender, instance: acc_mdl.User, update_fields=None, **kwargs) -> None:
+    """pre_save receiver: remember the stored mobile, its key is stale once it changes"""
+    instance._cached_mobile = None
+    if instance.pk is not None and (update_fields is None or 'mobile' in update_fields):
+        instance._cached_mobile = (
+            sender.objects.filter(pk=instance.pk).values_list('mobile', flat=True).first()
+        )
+
+
+def user_saved(sender, instance: acc_mdl.User, **kwargs) -> None:
+    """post_save receiver: every save of a user (commands, admin, shell) drops its cache entries"""
+    invalidate_user(instance.pk, *filter(None, (getattr(instance, '_cached_mobile', None), instance.mobile)))
+
+
+def user_deleted(sender, instance: acc_mdl.User, **kwargs) -> None:
+    """post_delete receiver; QuerySet.update() sends no signal, callers of it invalidate themselves"""
+    invalidate_user(instance.pk, instance.mobile)
@@ -5,7 +5,8 @@ from typing import Optional
 from django.db import transaction
 
 from shared.cqrs.base import Command, BaseCommandHandler
-from account import repository, service, models as acc_mdl
+from shared.outbox import outbox
+from account import events, repository, service, models as acc_mdl
 
 
 
@@ -18,6 +19,7 @@ class CreateUserCommand(Command):
     password: str
     password_confirm: str
     username: Optional[str] = None
+    password_hash: Optional[str] = None  # Pre-hashed password, skips hashing in the transaction
     
     def __post_init__(self):
             self.username = self.mobile
@@ -64,17 +66,30 @@ class UserCommandHandler(BaseCommandHandler):
             'role': command.role,
             'password': command.password
         }
-        return self.service.create_user(**user_data)
+        if command.password_hash:
+            user_data['password'] = None
+            user_data['encoded_password'] = command.password_hash
+        user = self.service.register_user(**user_data)
+        outbox.enqueue(events.UserCreated(
+            aggregate_id=str(user.pk), user_id=user.pk, mobile=user.mobile, role=user.role
+        ))
+        return user
 
     def _handle_update(self, command: UpdateUserCommand):
         update_data = {
             k: v for k, v in command.__dict__.items()  
             if k != 'user_id' and v is not None
         }
-        return self.service.update_user(command.user_id, **update_data)
+        user = self.service.update_user(command.user_id, **update_data)
+        if user is not None:
+            outbox.enqueue(events.UserUpdated(
+                aggregate_id=str(user.pk), user_id=user.pk, fields=tuple(update_data)
+            ))
+        return user
     
     def _handle_delete(self, command: DeleteUserCommand):
         self.service.delete_user(command.user_id)
+        outbox.enqueue(events.UserDeleted(aggregate_id=str(command.user_id), user_id=command.user_id))
         return True
 
 
@@ -126,15 +141,21 @@ class StudentProfileCommandHandler(BaseCommandHandler):
     def _handle_create(self, command: CreateStudentProfileCommand):
         profile_data = command.__dict__.copy()  # Create a shallow copy
         profile_data.pop('user')  # Remove the user key
-        return self.service.create_profile(command.user, **profile_data)
+        profile = self.service.create_profile(command.user, **profile_data)
+        outbox.enqueue(events.StudentProfileCreated(aggregate_id=str(command.user.pk), user_id=command.user.pk))
+        return profile
 
     def _handle_update(self, command: UpdateStudentProfileCommand):
         profile_data = command.__dict__.copy()  # Create a shallow copy
         profile_data.pop('user')  # Remove the user key
-        return self.service.update_profile(command.user, **profile_data)
+        profile = self.service.update_profile(command.user, **profile_data)
+        outbox.enqueue(events.StudentProfileUpdated(aggregate_id=str(command.user.pk), user_id=command.user.pk))
+        return profile
     
     def _handle_delete(self, command: DeleteStudentProfileCommand):
-        return self.service.delete_profile(command.user_id)
+        deleted = self.service.delete_profile(command.user_id)
+        outbox.enqueue(events.StudentProfileDeleted(aggregate_id=str(command.user_id), user_id=command.user_id))
+        return deleted
     
 
 @dataclass
@@ -185,12 +206,18 @@ class TeacherProfileCommandHandler(BaseCommandHandler):
     def _handle_create(self, command: CreateTeacherProfileCommand):
         profile_data = command.__dict__.copy()  # Create a shallow copy
         profile_data.pop('user')  # Remove the user key
-        return self.service.create_profile(command.user, **profile_data)
+        profile = self.service.create_profile(command.user, **profile_data)
+        outbox.enqueue(events.TeacherProfileCreated(aggregate_id=str(command.user.pk), user_id=command.user.pk))
+        return profile
 
     def _handle_update(self, command: UpdateTeacherProfileCommand):
         profile_data = command.__dict__.copy()  # Create a shallow copy
         profile_data.pop('user')  # Remove the user key
-        return self.service.update_profile(command.user, **profile_data)
+        profile = self.service.update_profile(command.user, **profile_data)
+        outbox.enqueue(events.TeacherProfileUpdated(aggregate_id=str(command.user.pk), user_id=command.user.pk))
+        return profile
     
     def _handle_delete(self, command: DeleteTeacherProfileCommand):
-        return self.service.delete_profile(command.user_id)
\ No newline at end of file
+        deleted = self.service.delete_profile(command.user_id)
+        outbox.enqueue(events.TeacherProfileDeleted(aggregate_id=str(command.user_id), user_id=command.user_id))
+        return deleted
\ No newline at end of file
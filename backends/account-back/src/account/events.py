@@ -0,0 +1,50 @@
+from shared.event.base_events import SlottedDomainEvent
+from shared.event.event_registry import EventRegistry
+
+
+@EventRegistry.register
+class UserCreated(SlottedDomainEvent):
+    user_id: int = None
+    mobile: str = None
+    role: int = None
+
+
+@EventRegistry.register
+class UserUpdated(SlottedDomainEvent):
+    user_id: int = None
+    fields: tuple = None
+
+
+@EventRegistry.register
+class UserDeleted(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class StudentProfileCreated(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class StudentProfileUpdated(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class StudentProfileDeleted(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class TeacherProfileCreated(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class TeacherProfileUpdated(SlottedDomainEvent):
+    user_id: int = None
+
+
+@EventRegistry.register
+class TeacherProfileDeleted(SlottedDomainEvent):
+    user_id: int = None
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from account.rpc import rpc_server
+
+
+class Command(BaseCommand):
+    help = 'Serve account RPC methods (rpc_account queue) for other services'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Worker threads executing RPC methods')
+        parser.add_argument('--prefetch', type=int, default=None,
+                            help='Unacked requests the broker may push (default 2x concurrency)')
+
+    def handle(self, *args, **options):
+        if options['concurrency']:
+            rpc_server.concurrency = options['concurrency']
+            rpc_server.prefetch_count = options['concurrency'] * 2
+        if options['prefetch']:
+            rpc_server.prefetch_count = options['prefetch']
+
+        rpc_server.install_signal_handlers()
+        self.stdout.write(f'Serving {rpc_server.queue_name} with {rpc_server.concurrency} workers...')
+        rpc_server.start()
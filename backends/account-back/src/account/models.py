@@ -13,8 +13,10 @@ class CustomUserManager(UserManager):
     def _create_user(self, mobile, password, **extra_fields):
         if not mobile:
             raise ValueError('The given username must be set')
+        # Already hashed by the caller (off the request worker), see shared.service.hashing
+        encoded_password = extra_fields.pop('encoded_password', None)
         user = self.model(mobile=mobile, **extra_fields)
-        user.password = make_password(password)
+        user.password = encoded_password or make_password(password)
         user.save(using=self._db)
         return user
 
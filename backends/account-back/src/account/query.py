@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 from shared.cqrs.base import Query, BaseQueryHandler
-from account import repository as acc_repo
+from account import repository as acc_repo, cache as acc_cache
 
 @dataclass
 class GetUserByIdQuery(Query):
@@ -19,12 +19,13 @@ class SearchUsersQuery(Query):
 class UserQueryHandler(BaseQueryHandler):
     def __init__(self):
         self.repository = acc_repo.UserRepository()
+        self.cache = acc_cache.UserCache(self.repository)
     
     def handle(self, query: Query):
         if isinstance(query, GetUserByIdQuery):
-            return self.repository.get_by_id(query.user_id)
+            return self.cache.get_by_id(query.user_id)
         elif isinstance(query, GetUserByMobileQuery):
-            return self.repository.get_by_mobile(query.mobile)
+            return self.cache.get_by_mobile(query.mobile)
         elif isinstance(query, SearchUsersQuery):
             return self.repository.search_users(query.search_term)
         raise ValueError("Invalid query type")
@@ -1,5 +1,7 @@
 from typing import List, Optional, Dict, Any
 
+from django.contrib.auth.hashers import make_password
+
 from shared.repository.base import DjangoRepository
 from account import models as AccModels
     
@@ -13,6 +15,15 @@ class UserRepository(DjangoRepository[AccModels.User]):
     
     def create(self, user_data: dict) -> AccModels.User:
         return self.model_class.objects.create_user(**user_data)
+
+    def create_if_absent(self, user_data: dict) -> Optional[AccModels.User]:
+        """Creates the user unless the mobile or username is taken (None), without looking it up first"""
+        data = dict(user_data)
+        encoded_password = data.pop('encoded_password', None)
+        password = data.pop('password', None)
+        user = self.model_class(**data)
+        user.password = encoded_password or make_password(password)
+        return self.insert_ignore_conflict(user)
     
     def update(self, id: int, data: dict) -> Optional[AccModels.User]:
         user = self.get_by_id(id)
@@ -45,7 +56,7 @@ class StudentProfileRepository(DjangoRepository[AccModels.StudentProfile]):
 
     def get_by_user_mobile(self, user_mobile: str) -> Optional[AccModels.StudentProfile]:
         """Get profile directly from User instance (uses OneToOne reverse lookup)"""
-        return self.model_class.get(user_mobile=user_mobile)  # Leverages the related_name
+        return self.model_class.objects.select_related('user').get(user__mobile=user_mobile)
 
     # --- Enhanced Utility Methods ---
     def update_medical_history(self, user_id: int, new_history: str) -> Optional[AccModels.StudentProfile]:
@@ -0,0 +1,48 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.forms.models import model_to_dict
+
+from shared.rpc_server import RPCServer
+from account import query as acc_query
+
+rpc_server = RPCServer('account')
+
+
+def _serialize_user(user):
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'mobile': user.mobile,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'role_display': user.get_role_display(),
+        'is_active': user.is_active,
+    }
+
+
+@rpc_server.method('get_user_by_id')
+def get_user_by_id(user_id: int):
+    query = acc_query.GetUserByIdQuery(user_id=user_id)
+    return _serialize_user(acc_query.UserQueryHandler().handle(query))
+
+
+@rpc_server.method('get_user_by_mobile')
+def get_user_by_mobile(mobile: str):
+    query = acc_query.GetUserByMobileQuery(mobile=mobile)
+    try:
+        return _serialize_user(acc_query.UserQueryHandler().handle(query))
+    except ObjectDoesNotExist:
+        return None
+
+
+@rpc_server.method('get_student_profile')
+def get_student_profile(user_mobile: str):
+    query = acc_query.GetStudentProfileByUserMobileQuery(user_mobile=user_mobile)
+    try:
+        profile = acc_query.StudentProfileQueryHandler().handle(query)
+    except ObjectDoesNotExist:
+        return None
+    data = model_to_dict(profile, exclude=['user', 'parent'])
+    data['user'] = _serialize_user(profile.user)
+    return data
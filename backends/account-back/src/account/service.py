@@ -1,10 +1,13 @@
 from typing import Optional
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.contrib.auth import get_user_model, authenticate
-from ninja_jwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model, aauthenticate, authenticate
 from ninja_jwt.schema import TokenObtainPairInputSchema
+from ninja_jwt.settings import api_settings
 
-from account import repository as acc_repo 
+from shared.service.tokens import ClaimsRefreshToken
+
+from account import repository as acc_repo, cache as acc_cache
 
 class AuthService:
     def login(self, **params):
@@ -14,9 +17,23 @@ class AuthService:
         )
         if user is None:
             raise Exception("شماره موبایل یا رمز عبور اشتباه است")
-        refresh = RefreshToken.for_user(user)
+        return self.issue_tokens(user)
+
+    async def alogin(self, **params):
+        """login() for async views: the backend awaits the password check on the hashing pool"""
+        user = await aauthenticate(
+            mobile=params.get('mobile'),
+            password=params.get('password')
+        )
+        if user is None:
+            raise Exception("شماره موبایل یا رمز عبور اشتباه است")
+        # Outstanding tokens are recorded through the ORM
+        return await sync_to_async(self.issue_tokens)(user)
+
+    def issue_tokens(self, user):
+        refresh = ClaimsRefreshToken.for_user(user)
         login_data = {
-            'mobile': params.get('mobile'),
+            'mobile': user.mobile,
             'refresh': str(refresh),
             'access': str(refresh.access_token)
             }
@@ -24,14 +41,20 @@ class AuthService:
 
     def logout(self, request, refresh_token: str) -> bool:
         try:
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             return True
         except Exception:
             return False
         
-    def refresh_token(refresh: str):
-        return str(refresh.access_token)
+    def refresh_token(self, refresh: str) -> str:
+        # Verifying the token checks the cached blacklist
+        token = ClaimsRefreshToken(refresh)
+        # Current claims (mobile, role) from the user cache, not the ones frozen at login
+        user = acc_cache.get_user_by_id(token[api_settings.USER_ID_CLAIM])
+        if user is None or not user.is_active:
+            raise Exception("کاربر یافت نشد یا غیرفعال است")
+        return str(token.access_token_for(user))
         
     # def set_password(self, user: User, new_password: str) -> None:
     #     """Password setting without validation"""
@@ -39,15 +62,30 @@ class AuthService:
     #     self.repository.update(user)
         
 
+class UserAlreadyExists(Exception):
+    pass
+
+
 class UserService:
     def __init__(self, repository: acc_repo.UserRepository):
         self.repository = repository
+
+    def register_user(self, **params) -> get_user_model:
+        """Creates a new user in one INSERT, raises UserAlreadyExists if the mobile or username is taken"""
+        user = self.repository.create_if_absent(params)
+        if user is None:
+            raise UserAlreadyExists("این شماره موبایل قبلا ثبت شده است")
+        return user
     
     def create_user(self, **params) -> get_user_model:
+        return self.get_or_create_user(**params)[0]
+
+    def get_or_create_user(self, **params):
+        """Returns (user, created) like QuerySet.get_or_create"""
         try:
-            return self.repository.get_by_mobile(params.get('mobile'))
+            return self.repository.get_by_mobile(params.get('mobile')), False
         except ObjectDoesNotExist:
-            return self.repository.create(params)
+            return self.repository.create(params), True
         except ValidationError as e:
             raise ValidationError(e.message_dict)
     
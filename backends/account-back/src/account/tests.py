@@ -1,3 +1,87 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.db import connections
 from django.test import TestCase
 
-# Create your tests here.
+from account import models as acc_mdl
+from account.repository import UserRepository
+from shared.service.hashing import HashingExecutor, HashingUnavailable
+from shared.service.throttling import SlidingWindowThrottle
+
+
+class CreateIfAbsentTests(TestCase):
+    def setUp(self):
+        self.repository = UserRepository()
+
+    def user_data(self, mobile='09120000000', username=None):
+        return {'mobile': mobile, 'username': username or mobile, 'role': 1, 'password': 'secret-pass'}
+
+    def test_creates_the_user(self):
+        user = self.repository.create_if_absent(self.user_data())
+
+        saved = acc_mdl.User.objects.get(pk=user.pk)
+        self.assertEqual((saved.mobile, saved.role), ('09120000000', 1))
+        self.assertTrue(check_password('secret-pass', saved.password))
+        self.assertFalse(user._state.adding)
+
+    def test_duplicate_mobile_or_username_returns_none_in_one_query(self):
+        self.repository.create_if_absent(self.user_data())
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.repository.create_if_absent(self.user_data()))
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.repository.create_if_absent(self.user_data('09130000000', username='09120000000')))
+        self.assertEqual(acc_mdl.User.objects.count(), 1)
+
+    def test_databases_without_on_conflict_save_in_a_savepoint(self):
+        self.repository.create_if_absent(self.user_data())
+        with mock.patch.object(connections['default'], 'vendor', 'mysql'):
+            self.assertIsNone(self.repository.create_if_absent(self.user_data()))
+            self.assertIsNotNone(self.repository.create_if_absent(self.user_data('09130000000')))
+        self.assertEqual(acc_mdl.User.objects.count(), 2)
+
+
+class RegisterTests(TestCase):
+    url = '/api/v1/accounts/auth/register'
+
+    async def register(self, mobile='09120000000'):
+        return await self.async_client.post(self.url, {
+            'mobile': mobile, 'first_name': 'Sara', 'last_name': 'Ahmadi', 'role': 1,
+            'password': 'secret-pass', 'password_confirm': 'secret-pass',
+        }, content_type='application/json')
+
+    async def test_register_then_duplicate_mobile_is_409(self):
+        response = await self.register()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['mobile'], '09120000000')
+
+        response = await self.register()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('mobile', response.json()['errors'])
+        self.assertEqual(await acc_mdl.User.objects.acount(), 1)
+
+
+class LoginTests(TestCase):
+    url = '/api/v1/accounts/auth/login'
+
+    async def login(self):
+        return await self.async_client.post(
+            self.url, {'mobile': '09120000000', 'password': 'secret-pass'}, content_type='application/json'
+        )
+
+    async def test_saturated_pool_answers_429_or_503_with_retry_after(self):
+        for status_code in (429, 503):
+            error = HashingUnavailable('busy', status_code)
+            with mock.patch.object(HashingExecutor, 'acall', side_effect=error):
+                response = await self.login()
+            self.assertEqual(response.status_code, status_code)
+            self.assertEqual(response['Retry-After'], '1')
+            self.assertEqual(response.json()['errors'], {'detail': 'busy'})
+
+    async def test_throttled_login_answers_429_without_hashing(self):
+        with mock.patch.object(SlidingWindowThrottle, 'check', return_value=12.3), \
+                mock.patch.object(HashingExecutor, 'acall') as acall:
+            response = await self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '13')
+        acall.assert_not_called()
@@ -1,8 +1,9 @@
+import math
+
 from django.conf import settings
 from django.http import JsonResponse
 from ninja_extra import NinjaExtraAPI
-from ninja_jwt.controller import NinjaJWTDefaultController
-from ninja.errors import ValidationError
+from ninja.errors import Throttled, ValidationError
 
 from account.api import router as account_router
 
@@ -35,6 +36,21 @@ def custom_validation_error(request, exc: ValidationError):
     )
 
 
-api.register_controllers(NinjaJWTDefaultController)
+@api.exception_handler(Throttled)
+def throttled(request, exc: Throttled):
+    response = JsonResponse(
+        {
+            "success": False,
+            "message": "تعداد درخواست ها بیش از حد مجاز است، لطفا بعدا تلاش کنید.",
+            "data": None,
+            "errors": {"detail": str(exc)}
+        },
+        status=429,
+    )
+    if exc.wait:
+        response["Retry-After"] = str(math.ceil(exc.wait))
+    return response
+
+
 api.add_router("accounts/auth", account_router)    # You can add a router as an object
 # api.add_router("chats", "chat.api.router")     or by Python path
\ No newline at end of file
@@ -5,3 +5,16 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.development')
 from django.core.asgi import get_asgi_application
 
 application = get_asgi_application()
+
+from django.conf import settings
+from shared.message_broker.apps import warm_up_broker
+from shared.message_broker.metrics import start_worker_http_server
+
+if settings.RABBITMQ_METRICS_PORT:
+    start_worker_http_server(
+        settings.RABBITMQ_METRICS_PORT,
+        settings.RABBITMQ_METRICS_PORT_RANGE,
+        settings.RABBITMQ_METRICS_ADDR
+    )
+
+warm_up_broker()
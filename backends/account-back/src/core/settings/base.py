@@ -17,6 +17,8 @@ INSTALLED_APPS = [
     'ninja_extra',
     'ninja_jwt.token_blacklist',
     
+    'shared.message_broker.apps.MessageBrokerConfig',
+    'shared.outbox.apps.OutboxConfig',
     'account.apps.AccountConfig'
 ]
 
@@ -81,6 +83,10 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'account.User'
 
+# login/alogin and the admin go through authenticate(); this backend checks
+# passwords on the hashing pool
+AUTHENTICATION_BACKENDS = ['shared.service.backend.MobileAuthBackend']
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -132,6 +138,29 @@ CACHES = {
         }
     }
 }
+
+# Users read by /me and CookieJWTAuth are cached in the default cache
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 300))
+AUTH_USER_LOADER = 'account.cache.get_user_by_id'
+# Copied into tokens so stateless endpoints need no user lookup
+AUTH_TOKEN_CLAIMS = ('mobile', 'role')
+# Refresh-token blacklist checks are cached; tokens not blacklisted are
+# re-read from the database after this many seconds
+AUTH_TOKEN_BLACKLIST_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_BLACKLIST_CACHE_TIMEOUT', 600))
+
+# Login/register hash passwords on a process pool per web worker; beyond
+# workers + queue size requests get 429, queued past the timeout 503
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASHING_QUEUE_SIZE', 32))
+PASSWORD_HASHING_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASHING_QUEUE_TIMEOUT', 2.0))
+
+# Sliding-window limits of shared.service.throttling, per scope and identity
+# ('ip' or a body field), kept in the default cache
+THROTTLE_RATES = {
+    'login': {'ip': '30/min', 'mobile': '5/15min'},
+    'register': {'ip': '10/hour'},
+}
+
 SESSION_COOKIE_AGE = 3600
 SESSION_COOKIE_NAME = 'admin_sessionid'  # Rename to avoid conflicts with APIs
 SESSION_COOKIE_PATH = '/admin/'
@@ -153,6 +182,35 @@ MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_DB_NAME = os.environ.get('MONGODB_DB_NAME', 'django_logs')
 MONGODB_LOG_COLLECTION = os.environ.get('MONGODB_LOG_COLLECTION', 'account_logs')
 ENABLE_MONGO_LOGGING = os.environ.get('ENABLE_MONGO_LOGGING', 'True').lower() == 'true'
+MONGODB_LOG_USE_QUEUE = os.environ.get('MONGODB_LOG_USE_QUEUE', 'True').lower() == 'true'
+MONGODB_LOG_QUEUE_SIZE = int(os.environ.get('MONGODB_LOG_QUEUE_SIZE', 10000))
+MONGODB_LOG_BATCH_SIZE = int(os.environ.get('MONGODB_LOG_BATCH_SIZE', 200))
+MONGODB_LOG_FLUSH_INTERVAL = float(os.environ.get('MONGODB_LOG_FLUSH_INTERVAL', 1.0))
+MONGODB_LOG_OVERFLOW_POLICY = os.environ.get('MONGODB_LOG_OVERFLOW_POLICY', 'drop_oldest')  # drop_oldest | drop_newest | block
+
+# Web workers (core.asgi) connect to RabbitMQ and declare exchanges in the
+# background at startup; management commands connect on first use
+RABBITMQ_CONNECT_IN_BACKGROUND = os.environ.get('RABBITMQ_CONNECT_IN_BACKGROUND', 'True').lower() == 'true'
+
+# Queues whose depth /metrics samples (passive declares), besides those consumed by the process
+RABBITMQ_METRICS_QUEUES = [
+    q.strip() for q in os.environ.get('RABBITMQ_METRICS_QUEUES', 'dlq.domain_events').split(',') if q.strip()
+]
+RABBITMQ_METRICS_SAMPLE_INTERVAL = float(os.environ.get('RABBITMQ_METRICS_SAMPLE_INTERVAL', 10))
+# Every web worker serves its metrics on its own port, the first free one
+# from RABBITMQ_METRICS_PORT on; keep these ports off the public network
+RABBITMQ_METRICS_PORT = int(os.environ['RABBITMQ_METRICS_PORT']) if os.environ.get('RABBITMQ_METRICS_PORT') else None
+RABBITMQ_METRICS_PORT_RANGE = int(os.environ.get('RABBITMQ_METRICS_PORT_RANGE', 16))
+RABBITMQ_METRICS_ADDR = os.environ.get('RABBITMQ_METRICS_ADDR', '')
+
+# run_event_consumers: processes per queue, overridden per queue with "queue=N,other=M"
+EVENT_CONSUMER_PROCESSES = int(os.environ.get('EVENT_CONSUMER_PROCESSES', 1))
+EVENT_CONSUMER_QUEUE_PROCESSES = {
+    queue.strip(): int(count)
+    for queue, _, count in (
+        item.rpartition('=') for item in os.environ.get('EVENT_CONSUMER_QUEUE_PROCESSES', '').split(',') if item.strip()
+    )
+}
 
 LOGGING = {
     'version': 1,
@@ -183,6 +241,11 @@ LOGGING = {
             'level': 'INFO',
             'class': 'shared.utils.mongo_logger.MongoDBHandler',
             'formatter': 'verbose',
+            'use_queue': MONGODB_LOG_USE_QUEUE,
+            'queue_size': MONGODB_LOG_QUEUE_SIZE,
+            'batch_size': MONGODB_LOG_BATCH_SIZE,
+            'flush_interval': MONGODB_LOG_FLUSH_INTERVAL,
+            'overflow_policy': MONGODB_LOG_OVERFLOW_POLICY,
         } if ENABLE_MONGO_LOGGING else {},
     },
     'loggers': {
@@ -0,0 +1,48 @@
+from .base import *
+
+# manage.py test --settings=core.settings.test: no Postgres, Redis, RabbitMQ or MongoDB needed
+SECRET_KEY = 'test-secret-key-long-enough-for-hs256-signing'
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'session': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'session'},
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+PASSWORD_HASHING_WORKERS = 0
+
+STORAGES = {
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+RABBITMQ_CONNECT_IN_BACKGROUND = False
+RABBITMQ_METRICS_PORT = None
+
+ENABLE_MONGO_LOGGING = False
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'null': {'class': 'logging.NullHandler'}},
+    'root': {'handlers': ['null']},
+}
+
+
+class DisableMigrations:
+    """The account app ships no migrations: test tables are created from the models"""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
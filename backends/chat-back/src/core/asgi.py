@@ -8,7 +8,10 @@ from channels.security.websocket import AllowedHostsOriginValidator
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.development')
 django.setup()
 
+from django.conf import settings
 from chat.routing import websocket_urlpatterns
+from shared.message_broker.apps import warm_up_broker
+from shared.message_broker.metrics import start_worker_http_server
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
@@ -19,4 +22,13 @@ application = ProtocolTypeRouter({
             )
         )
     ),
-})
\ No newline at end of file
+})
+
+if settings.RABBITMQ_METRICS_PORT:
+    start_worker_http_server(
+        settings.RABBITMQ_METRICS_PORT,
+        settings.RABBITMQ_METRICS_PORT_RANGE,
+        settings.RABBITMQ_METRICS_ADDR
+    )
+
+warm_up_broker()
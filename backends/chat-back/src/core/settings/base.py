@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
+    'shared.message_broker.apps.MessageBrokerConfig',
     'chat.apps.ChatConfig'
 ]
 
@@ -155,6 +156,35 @@ MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_DB_NAME = os.environ.get('MONGODB_DB_NAME', 'django_logs')
 MONGODB_LOG_COLLECTION = os.environ.get('MONGODB_LOG_COLLECTION', 'account_logs')
 ENABLE_MONGO_LOGGING = os.environ.get('ENABLE_MONGO_LOGGING', 'True').lower() == 'true'
+MONGODB_LOG_USE_QUEUE = os.environ.get('MONGODB_LOG_USE_QUEUE', 'True').lower() == 'true'
+MONGODB_LOG_QUEUE_SIZE = int(os.environ.get('MONGODB_LOG_QUEUE_SIZE', 10000))
+MONGODB_LOG_BATCH_SIZE = int(os.environ.get('MONGODB_LOG_BATCH_SIZE', 200))
+MONGODB_LOG_FLUSH_INTERVAL = float(os.environ.get('MONGODB_LOG_FLUSH_INTERVAL', 1.0))
+MONGODB_LOG_OVERFLOW_POLICY = os.environ.get('MONGODB_LOG_OVERFLOW_POLICY', 'drop_oldest')  # drop_oldest | drop_newest | block
+
+# Web workers (core.asgi) connect to RabbitMQ and declare exchanges in the
+# background at startup; management commands connect on first use
+RABBITMQ_CONNECT_IN_BACKGROUND = os.environ.get('RABBITMQ_CONNECT_IN_BACKGROUND', 'True').lower() == 'true'
+
+# Queues whose depth /metrics samples (passive declares), besides those consumed by the process
+RABBITMQ_METRICS_QUEUES = [
+    q.strip() for q in os.environ.get('RABBITMQ_METRICS_QUEUES', 'dlq.domain_events').split(',') if q.strip()
+]
+RABBITMQ_METRICS_SAMPLE_INTERVAL = float(os.environ.get('RABBITMQ_METRICS_SAMPLE_INTERVAL', 10))
+# Every web worker serves its metrics on its own port, the first free one
+# from RABBITMQ_METRICS_PORT on; keep these ports off the public network
+RABBITMQ_METRICS_PORT = int(os.environ['RABBITMQ_METRICS_PORT']) if os.environ.get('RABBITMQ_METRICS_PORT') else None
+RABBITMQ_METRICS_PORT_RANGE = int(os.environ.get('RABBITMQ_METRICS_PORT_RANGE', 16))
+RABBITMQ_METRICS_ADDR = os.environ.get('RABBITMQ_METRICS_ADDR', '')
+
+# run_event_consumers: processes per queue, overridden per queue with "queue=N,other=M"
+EVENT_CONSUMER_PROCESSES = int(os.environ.get('EVENT_CONSUMER_PROCESSES', 1))
+EVENT_CONSUMER_QUEUE_PROCESSES = {
+    queue.strip(): int(count)
+    for queue, _, count in (
+        item.rpartition('=') for item in os.environ.get('EVENT_CONSUMER_QUEUE_PROCESSES', '').split(',') if item.strip()
+    )
+}
 
 LOGGING = {
     'version': 1,
@@ -185,6 +215,11 @@ LOGGING = {
             'level': 'INFO',
             'class': 'shared.utils.mongo_logger.MongoDBHandler',
             'formatter': 'verbose',
+            'use_queue': MONGODB_LOG_USE_QUEUE,
+            'queue_size': MONGODB_LOG_QUEUE_SIZE,
+            'batch_size': MONGODB_LOG_BATCH_SIZE,
+            'flush_interval': MONGODB_LOG_FLUSH_INTERVAL,
+            'overflow_policy': MONGODB_LOG_OVERFLOW_POLICY,
         } if ENABLE_MONGO_LOGGING else {},
     },
     'loggers': {
@@ -0,0 +1,78 @@
+# shared/benchmarks/codec_benchmark.py
+"""
+Encode/decode throughput of the message codecs for the events in
+shared/event/base_events.py.
+
+    python -m shared.benchmarks.codec_benchmark [--count 50000]
+"""
+import argparse
+import timeit
+from dataclasses import dataclass
+from typing import List
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(USE_TZ=True)
+
+from shared.event.base_events import BaseEvent, DomainEvent
+from shared.message_broker.codec import get_codec, available_content_types
+from shared.message_broker.envelope import build_event
+
+
+# Fields are declared so to_dict() (asdict) serializes them; the
+# BaseEvent.__init__ taking keyword arguments is kept
+@dataclass(init=False)
+class SampleEvent(BaseEvent):
+    user_id: int = None
+    mobile: str = None
+
+
+@dataclass(init=False)
+class SampleDomainEvent(DomainEvent):
+    user_id: int = None
+    mobile: str = None
+    first_name: str = None
+    last_name: str = None
+    role: int = None
+    grades: List[float] = None
+
+
+def sample_envelopes():
+    """Wire envelopes as EventBus.publish builds them"""
+    base = SampleEvent(user_id=42, mobile='09120000000')
+    domain = SampleDomainEvent(
+        aggregate_id='42',
+        user_id=42,
+        mobile='09120000000',
+        first_name='Ali',
+        last_name='Rezaei',
+        role=0,
+        grades=[17.5, 18.25, 19.0],
+    )
+    return {
+        'BaseEvent': build_event(base.event_type, base.to_dict(), event_id=base.event_id),
+        'DomainEvent': build_event(
+            domain.event_type, domain.to_dict(), domain.correlation_id, domain.event_id
+        ),
+    }
+
+
+def run(count: int) -> None:
+    print(f"{'event':<12} {'codec':<22} {'bytes':>6} {'encode/s':>12} {'decode/s':>12}")
+    for name, envelope in sample_envelopes().items():
+        for content_type in available_content_types():
+            codec = get_codec(content_type)
+            body = codec.encode(envelope)
+            encode = timeit.timeit(lambda: codec.encode(envelope), number=count)
+            decode = timeit.timeit(lambda: codec.decode(body), number=count)
+            print(
+                f"{name:<12} {content_type:<22} {len(body):>6} "
+                f"{count / encode:>12,.0f} {count / decode:>12,.0f}"
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=50000)
+    run(parser.parse_args().count)
@@ -0,0 +1,44 @@
+# shared/benchmarks/event_decode_benchmark.py
+"""
+Rehydration throughput of EventRegistry decoders against calling the
+event constructor, which is what create_event_from_dict used to do.
+
+    python -m shared.benchmarks.event_decode_benchmark [--count 100000]
+"""
+import argparse
+import timeit
+from dataclasses import dataclass
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(USE_TZ=True)
+
+from shared.event.base_events import DomainEvent
+from shared.event.event_registry import EventRegistry
+
+
+@EventRegistry.register
+@dataclass(init=False)
+class BenchmarkUserEvent(DomainEvent):
+    user_id: int = None
+    mobile: str = None
+    role: int = None
+
+
+def run(count: int) -> None:
+    data = BenchmarkUserEvent(
+        aggregate_id='42', user_id=42, mobile='09120000000', role=0
+    ).to_dict()
+    kwargs = {key: value for key, value in data.items() if key != 'event_type'}
+
+    constructor = timeit.timeit(lambda: BenchmarkUserEvent(**kwargs), number=count)
+    decoder = timeit.timeit(lambda: EventRegistry.create_event_from_dict(data), number=count)
+    print(f"{'constructor':<12} {count / constructor:>12,.0f} events/s")
+    print(f"{'decoder':<12} {count / decoder:>12,.0f} events/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000)
+    run(parser.parse_args().count)
@@ -0,0 +1,62 @@
+# shared/benchmarks/event_memory_benchmark.py
+"""
+Memory and throughput of DomainEvent against SlottedDomainEvent.
+
+    python -m shared.benchmarks.event_memory_benchmark [--count 100000]
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(USE_TZ=True)
+
+from shared.event.base_events import DomainEvent, SlottedDomainEvent
+from shared.event.event_registry import EventRegistry
+
+PAYLOAD = {'aggregate_id': '42', 'user_id': 42, 'mobile': '09120000000', 'role': 0}
+
+
+@EventRegistry.register
+class DictUserEvent(DomainEvent):
+    pass
+
+
+@EventRegistry.register
+class SlottedUserEvent(SlottedDomainEvent):
+    user_id: int = None
+    mobile: str = None
+    role: int = None
+
+
+def retained_bytes(event_class, count: int) -> float:
+    """Average bytes held per live instance"""
+    tracemalloc.start()
+    events = [event_class(**PAYLOAD) for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return size / count
+
+
+def run(count: int) -> None:
+    print(f"{'class':<18} {'bytes/event':>12} {'create/s':>12} {'to_dict/s':>12} {'decode/s':>12}")
+    for event_class in (DictUserEvent, SlottedUserEvent):
+        event = event_class(**PAYLOAD)
+        data = event.to_dict()
+        data.update(PAYLOAD)
+        create = timeit.timeit(lambda: event_class(**PAYLOAD), number=count)
+        to_dict = timeit.timeit(event.to_dict, number=count)
+        decode = timeit.timeit(lambda: EventRegistry.create_event_from_dict(data), number=count)
+        print(
+            f"{event_class.__name__:<18} {retained_bytes(event_class, count):>12,.0f} "
+            f"{count / create:>12,.0f} {count / to_dict:>12,.0f} {count / decode:>12,.0f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000)
+    run(parser.parse_args().count)
@@ -1,7 +1,8 @@
 # shared/events/base_events.py
 import uuid
-from abc import ABC
-from typing import Any, Dict
+from abc import ABC, ABCMeta
+from operator import attrgetter
+from typing import Any, ClassVar, Dict, Tuple, get_origin
 from django.utils import timezone
 from dataclasses import dataclass, asdict
 import json
@@ -18,7 +19,7 @@ class BaseEvent(ABC):
         self.event_id = str(uuid.uuid4())
         self.event_type = self.__class__.__name__
         self.timestamp = timezone.now().isoformat()
-        self.version = 1
+        self.version = self.__class__.version
         for key, value in kwargs.items():
             setattr(self, key, value)
     
@@ -46,4 +47,149 @@ class DomainEvent(BaseEvent):
     def __init__(self, aggregate_id: str = None, correlation_id: str = None, **kwargs):
         super().__init__(**kwargs)
         self.aggregate_id = aggregate_id
-        self.correlation_id = correlation_id or str(uuid.uuid4())
\ No newline at end of file
+        self.correlation_id = correlation_id or str(uuid.uuid4())
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+def _now() -> str:
+    return timezone.now().isoformat()
+
+
+class EventMeta(ABCMeta):
+    """
+    Metaclass for slotted events.
+
+    Annotated class attributes become ``__slots__`` and their values become
+    keyword defaults of a generated ``__init__``; ``version`` is the schema
+    version of the class. Subclasses only declare their payload fields:
+
+        class UserRegistered(SlottedDomainEvent):
+            version = 2
+            user_id: int = None
+            mobile: str = None
+    """
+
+    # Envelope fields filled in when the caller does not pass them
+    factories = {'event_id': _new_id, 'timestamp': _now, 'correlation_id': _new_id}
+    # Envelope fields a rehydrated event must carry
+    required = ('event_id', 'timestamp')
+
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        inherited: Tuple[str, ...] = ()
+        defaults: Dict[str, Any] = {}
+        version = 1
+        for base in reversed(bases):
+            if isinstance(base, EventMeta):
+                inherited += tuple(f for f in base.__event_fields__ if f not in inherited)
+                defaults.update(base.__event_defaults__)
+                version = base.__event_version__
+
+        version = namespace.pop('version', version)
+        own = []
+        for field_name, annotation in namespace.get('__annotations__', {}).items():
+            if annotation is ClassVar or get_origin(annotation) is ClassVar:
+                continue
+            if field_name in inherited:
+                raise TypeError(f"{name} redeclares event field {field_name}")
+            default = namespace.pop(field_name, None)
+            if isinstance(default, (list, dict, set)):
+                raise ValueError(f"Mutable default for {name}.{field_name} is not allowed, use None")
+            own.append(field_name)
+            defaults[field_name] = default
+
+        namespace['__slots__'] = tuple(own)
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+
+        cls.__event_fields__ = inherited + tuple(own)
+        cls.__event_defaults__ = defaults
+        cls.__event_version__ = version
+        cls.__event_getter__ = attrgetter(*cls.__event_fields__) if cls.__event_fields__ else None
+        cls.__event_restore__ = mcls._compile_restore(cls)
+        if '__init__' not in namespace:
+            cls.__init__ = mcls._compile_init(cls)
+        return cls
+
+    @classmethod
+    def _compile_init(mcls, cls):
+        """Build ``__init__(self, *, field=default, ...)`` for the class fields"""
+        params = ['self', '*', 'event_type=None']
+        body = [f'self.event_type = {cls.__name__!r}']
+        env = {'factories': mcls.factories, 'defaults': cls.__event_defaults__}
+        for field_name in cls.__event_fields__:
+            if field_name == 'event_type':
+                continue
+            if field_name == 'version':
+                params.append('version=None')
+                body.append(f'self.version = {cls.__event_version__!r} if version is None else version')
+            elif field_name in mcls.factories:
+                params.append(f'{field_name}=None')
+                body.append(
+                    f'self.{field_name} = {field_name} if {field_name} is not None '
+                    f'else factories[{field_name!r}]()'
+                )
+            else:
+                params.append(f'{field_name}=defaults[{field_name!r}]')
+                body.append(f'self.{field_name} = {field_name}')
+        return mcls._compile(cls, '__init__', params, body, env)
+
+    @classmethod
+    def _compile_restore(mcls, cls):
+        """Build ``restore(self, values)`` assigning every field from a complete dict"""
+        body = [f'self.{f} = values[{f!r}]' for f in cls.__event_fields__] or ['pass']
+        return mcls._compile(cls, '__event_restore__', ['self', 'values'], body, {})
+
+    @staticmethod
+    def _compile(cls, func_name, params, body, env):
+        source = f"def {func_name}({', '.join(params)}):\n" + '\n'.join(f'    {line}' for line in body)
+        exec(source, env)
+        func = env[func_name]
+        func.__qualname__ = f'{cls.__qualname__}.{func_name}'
+        return func
+
+
+class SlottedEvent(ABC, metaclass=EventMeta):
+    """
+    Slotted counterpart of BaseEvent: no instance ``__dict__``, fields are
+    declared up front and ``to_dict`` is a shallow read of the slots.
+
+    Unlike BaseEvent, undeclared keyword arguments are rejected.
+    """
+    event_id: str
+    event_type: str
+    timestamp: str
+    version: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert event to dictionary"""
+        return dict(zip(self.__event_fields__, self.__event_getter__(self)))
+
+    def to_json(self) -> str:
+        """Serialize event to JSON"""
+        return json.dumps(self.to_dict(), default=str)
+
+    @classmethod
+    def from_json(cls, json_str: str):
+        """Deserialize event from JSON"""
+        data = json.loads(json_str)
+        data.pop('event_type', None)
+        return cls(**data)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.__event_getter__(self) == other.__event_getter__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{key}={value!r}' for key, value in self.to_dict().items())
+        return f'{self.__class__.__name__}({fields})'
+
+
+class SlottedDomainEvent(SlottedEvent):
+    """Slotted domain events with business context"""
+    aggregate_id: str = None
+    correlation_id: str = None
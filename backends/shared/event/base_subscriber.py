@@ -7,8 +7,8 @@ logger = logging.getLogger(__name__)
 class BaseSubscriber(ABC):
     """Base class for all event subscribers"""
     
-    def __init__(self, service_name: str):
-        self.service_name = service_name
+    def __init__(self, service_name: str = None):
+        self.service_name = service_name or self.__class__.__name__
         self.subscriptions = []
     
     @abstractmethod
@@ -16,16 +16,18 @@ class BaseSubscriber(ABC):
         """Subscribe to relevant events - to be implemented by subclasses"""
         pass
     
-    def register_subscription(self, queue_name: str, event_type: str, callback: callable):
-        """Register a subscription"""
+    def register_subscription(self, queue_name: str, event_type: str, callback: callable, **options):
+        """Register a subscription; options are passed to EventBus.subscribe"""
         from shared.message_broker.event_bus import event_bus
-        event_bus.subscribe(queue_name, event_type, callback)
+        subscribed = event_bus.subscribe(queue_name, event_type, callback, **options)
         self.subscriptions.append({
             'queue': queue_name,
             'event_type': event_type,
-            'callback': callback.__name__
+            'callback': callback.__name__,
+            'active': subscribed
         })
-        logger.info(f"✅ {self.service_name} subscribed to {event_type}")
+        if subscribed:
+            logger.info(f"✅ {self.service_name} subscribed to {event_type}")
     
     def get_subscriptions(self):
         """Get list of active subscriptions"""
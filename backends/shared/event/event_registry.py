@@ -1,33 +1,157 @@
 # shared/events/event_registry.py
-from typing import Dict, Type
-from shared.event.base_events import BaseEvent
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Any, Callable, Dict, FrozenSet, Tuple, Type
+from shared.event.base_events import BaseEvent, EventMeta
+
+Upcaster = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class EventDecoder:
+    """
+    Rehydrates one event class from its dict form.
+
+    Built once at registration: field defaults and required names are resolved
+    up front, so decoding is a dict merge plus a direct ``__dict__`` update
+    of the declared dataclass fields (or, for slotted events, a compiled
+    slot assignment). Keys the class does not declare are dropped.
+    BaseEvent.__init__ is bypassed, no UUID or timestamp is generated only to
+    be overwritten by the incoming values.
+    """
+
+    __slots__ = ('event_class', 'event_type', 'version', 'defaults', 'factories', 'required', 'restore', 'fields')
+
+    def __init__(self, event_class: Type[BaseEvent]):
+        self.event_class = event_class
+        self.event_type = event_class.__name__
+
+        defaults: Dict[str, Any] = {}
+        factories: Dict[str, Callable[[], Any]] = {}
+        required = set()
+        declared = []
+        if isinstance(event_class, EventMeta):
+            # Slotted events: fields are assigned by the class' compiled restore
+            self.version = event_class.__event_version__
+            self.restore = event_class.__event_restore__
+            required.update(f for f in EventMeta.required if f in event_class.__event_fields__)
+            # EventMeta records None for fields declared without a value
+            defaults.update((k, v) for k, v in event_class.__event_defaults__.items() if k not in required)
+        else:
+            self.version = getattr(event_class, 'version', 1)
+            self.restore = None
+        if is_dataclass(event_class):
+            for f in fields(event_class):
+                declared.append(f.name)
+                if f.name == 'event_type':
+                    continue
+                if f.default is not MISSING:
+                    defaults[f.name] = f.default
+                elif f.default_factory is not MISSING:
+                    factories[f.name] = f.default_factory
+                else:
+                    required.add(f.name)
+        defaults['version'] = self.version
+
+        self.defaults = defaults
+        self.factories: Tuple[Tuple[str, Callable[[], Any]], ...] = tuple(factories.items())
+        self.required: FrozenSet[str] = frozenset(required)
+        self.fields: Tuple[str, ...] = tuple(declared)
+
+    def __call__(self, data: Dict[str, Any]) -> BaseEvent:
+        if data.get('version', 1) != self.version:
+            data = EventRegistry.upcast(self.event_type, data, self.version)
+
+        values = {**self.defaults, **data}
+        values['event_type'] = self.event_type
+
+        if self.required.difference(values):
+            missing = ', '.join(sorted(self.required.difference(values)))
+            raise ValueError(f"{self.event_type} is missing required fields: {missing}")
+        for name, factory in self.factories:
+            if name not in values:
+                values[name] = factory()
+
+        event = self.event_class.__new__(self.event_class)
+        if self.restore is not None:
+            self.restore(event, values)
+        else:
+            event.__dict__.update({name: values[name] for name in self.fields})
+        return event
+
 
 class EventRegistry:
     """Registry for event types to enable deserialization"""
-    
+
     _events: Dict[str, Type[BaseEvent]] = {}
-    
+    _decoders: Dict[str, EventDecoder] = {}
+    _upcasters: Dict[Tuple[str, int], Upcaster] = {}
+
     @classmethod
     def register(cls, event_class: Type[BaseEvent]):
         """Register an event class"""
         cls._events[event_class.__name__] = event_class
+        cls._decoders[event_class.__name__] = EventDecoder(event_class)
         return event_class
-    
+
+    @classmethod
+    def register_upcaster(cls, event_type: str, from_version: int):
+        """
+        Decorator registering a function that turns the dict of ``event_type``
+        at ``from_version`` into its ``from_version + 1`` shape.
+
+        Upcasters are chained, so an event several versions behind is
+        migrated step by step before it is rehydrated.
+        """
+        def decorator(func: Upcaster) -> Upcaster:
+            cls._upcasters[(event_type, from_version)] = func
+            return func
+        return decorator
+
+    @classmethod
+    def upcast(cls, event_type: str, data: Dict[str, Any], target_version: int) -> Dict[str, Any]:
+        """Migrate an event dict to target_version; newer versions are left as they are"""
+        version = data.get('version', 1)
+        while version < target_version:
+            upcaster = cls._upcasters.get((event_type, version))
+            if upcaster is None:
+                raise ValueError(f"No upcaster for {event_type} v{version}")
+            data = upcaster(dict(data))
+            version += 1
+            data['version'] = version
+            data['event_type'] = event_type
+        return data
+
     @classmethod
     def get_event_class(cls, event_type: str) -> Type[BaseEvent]:
         """Get event class by type name"""
         return cls._events.get(event_type)
-    
+
+    @classmethod
+    def routing_key(cls, event_type: str) -> str:
+        """
+        Routing key events of this type are published and bound with.
+
+        Event classes may set a ``routing_key`` class attribute (e.g.
+        ``account.user.created``), otherwise it is the lowercased type name.
+        """
+        event_class = cls._events.get(event_type)
+        routing_key = getattr(event_class, 'routing_key', None) if event_class else None
+        return routing_key if isinstance(routing_key, str) else event_type.lower()
+
+    @classmethod
+    def routing_keys(cls) -> Dict[str, str]:
+        """Routing key of every registered event type"""
+        return {event_type: cls.routing_key(event_type) for event_type in cls._events}
+
+    @classmethod
+    def get_decoder(cls, event_type: str) -> EventDecoder:
+        """Get the precompiled decoder for an event type"""
+        return cls._decoders.get(event_type)
+
     @classmethod
     def create_event_from_dict(cls, data: Dict[str, Any]) -> BaseEvent:
         """Create event instance from dictionary"""
         event_type = data.get('event_type')
-        event_class = cls.get_event_class(event_type)
-        if not event_class:
+        decoder = cls._decoders.get(event_type)
+        if decoder is None:
             raise ValueError(f"Unknown event type: {event_type}")
-        
-        # Remove event_type from data as it's not a constructor parameter
-        event_data = data.copy()
-        event_data.pop('event_type', None)
-        
-        return event_class(**event_data)
\ No newline at end of file
+        return decoder(data)
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+
+from django.test import SimpleTestCase
+
+from shared.event.base_events import DomainEvent, SlottedDomainEvent
+from shared.event.event_registry import EventRegistry
+
+
+@EventRegistry.register
+@dataclass(init=False)
+class DataclassUserRenamed(DomainEvent):
+    version = 2
+    user_id: int = None
+    full_name: str = None
+
+
+@EventRegistry.register
+class SlottedUserRenamed(SlottedDomainEvent):
+    version = 2
+    user_id: int = None
+    full_name: str = None
+
+
+def _split_name_to_full_name(data):
+    data['full_name'] = f"{data.pop('first_name')} {data.pop('last_name')}"
+    return data
+
+
+for _event_type in ('DataclassUserRenamed', 'SlottedUserRenamed'):
+    EventRegistry.register_upcaster(_event_type, 1)(_split_name_to_full_name)
+
+
+class EventDecoderTests(SimpleTestCase):
+    event_classes = (DataclassUserRenamed, SlottedUserRenamed)
+
+    def v1_dict(self, event_class) -> dict:
+        data = event_class(aggregate_id='7', user_id=7).to_dict()
+        del data['full_name']
+        data.update(version=1, first_name='Ali', last_name='Rezaei')
+        return data
+
+    def test_current_version_round_trip(self):
+        for event_class in self.event_classes:
+            with self.subTest(event_class.__name__):
+                event = event_class(aggregate_id='7', user_id=7, full_name='Ali Rezaei')
+                decoded = EventRegistry.create_event_from_dict(event.to_dict())
+                self.assertIs(type(decoded), event_class)
+                self.assertEqual(decoded.to_dict(), event.to_dict())
+
+    def test_older_version_is_upcast(self):
+        for event_class in self.event_classes:
+            with self.subTest(event_class.__name__):
+                data = self.v1_dict(event_class)
+                decoded = EventRegistry.create_event_from_dict(data)
+                self.assertEqual(decoded.version, 2)
+                self.assertEqual(decoded.full_name, 'Ali Rezaei')
+                self.assertEqual(decoded.event_id, data['event_id'])
+                self.assertEqual(decoded.user_id, 7)
+
+    def test_missing_upcaster_raises(self):
+        data = {**self.v1_dict(DataclassUserRenamed), 'version': 0}
+        with self.assertRaisesMessage(ValueError, 'No upcaster for DataclassUserRenamed v0'):
+            EventRegistry.create_event_from_dict(data)
+
+    def test_undeclared_keys_are_dropped(self):
+        data = {**DataclassUserRenamed(user_id=7).to_dict(), 'legacy_flag': True}
+        decoded = EventRegistry.create_event_from_dict(data)
+        self.assertNotIn('legacy_flag', decoded.__dict__)
+        self.assertNotIn('legacy_flag', decoded.to_dict())
+
+    def test_missing_envelope_field_raises(self):
+        for event_class in self.event_classes:
+            with self.subTest(event_class.__name__):
+                data = event_class(user_id=7).to_dict()
+                del data['event_id']
+                with self.assertRaisesMessage(ValueError, 'missing required fields: event_id'):
+                    EventRegistry.create_event_from_dict(data)
+
+    def test_unknown_event_type_raises(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown event type: NoSuchEvent'):
+            EventRegistry.create_event_from_dict({'event_type': 'NoSuchEvent'})
+
+
+class EventMetaTests(SimpleTestCase):
+    def test_init_fills_the_envelope(self):
+        event = SlottedUserRenamed(user_id=7)
+        self.assertEqual(event.event_type, 'SlottedUserRenamed')
+        self.assertEqual(event.version, 2)
+        self.assertTrue(event.event_id)
+        self.assertTrue(event.timestamp)
+        self.assertTrue(event.correlation_id)
+        self.assertIsNone(event.aggregate_id)
+        self.assertIsNone(event.full_name)
+        self.assertNotEqual(SlottedUserRenamed().event_id, event.event_id)
+
+    def test_init_keeps_given_values(self):
+        event = SlottedUserRenamed(event_id='e1', timestamp='t1', correlation_id='c1', version=1, user_id=7)
+        self.assertEqual(
+            (event.event_id, event.timestamp, event.correlation_id, event.version),
+            ('e1', 't1', 'c1', 1)
+        )
+
+    def test_fields_are_slots(self):
+        event = SlottedUserRenamed(user_id=7)
+        self.assertFalse(hasattr(event, '__dict__'))
+        with self.assertRaises(AttributeError):
+            event.nickname = 'ali'
+        with self.assertRaises(TypeError):
+            SlottedUserRenamed(nickname='ali')
+
+    def test_to_dict_lists_every_field_in_order(self):
+        event = SlottedUserRenamed(aggregate_id='7', user_id=7, full_name='Ali Rezaei')
+        self.assertEqual(list(event.to_dict()), [
+            'event_id', 'event_type', 'timestamp', 'version',
+            'aggregate_id', 'correlation_id', 'user_id', 'full_name'
+        ])
+
+    def test_restore_and_from_json_rebuild_an_equal_event(self):
+        event = SlottedUserRenamed(aggregate_id='7', user_id=7, full_name='Ali Rezaei')
+        self.assertEqual(EventRegistry.create_event_from_dict(event.to_dict()), event)
+        self.assertEqual(SlottedUserRenamed.from_json(event.to_json()), event)
+
+    def test_subclasses_inherit_fields_and_version(self):
+        class SlottedUserRenamedByAdmin(SlottedUserRenamed):
+            admin_id: int = None
+
+        event = SlottedUserRenamedByAdmin(user_id=7, admin_id=1)
+        self.assertEqual(event.version, 2)
+        self.assertEqual((event.user_id, event.admin_id), (7, 1))
+
+    def test_invalid_declarations_are_rejected(self):
+        with self.assertRaises(ValueError):
+            class WithMutableDefault(SlottedDomainEvent):
+                tags: list = []
+
+        with self.assertRaises(TypeError):
+            class RedeclaringField(SlottedDomainEvent):
+                aggregate_id: str = None
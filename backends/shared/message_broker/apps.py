@@ -0,0 +1,27 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MessageBrokerConfig(AppConfig):
+    name = 'shared.message_broker'
+    label = 'message_broker'
+
+    def ready(self):
+        from shared.message_broker.event_bus import event_bus
+        from shared.message_broker.metrics import REGISTRY, BrokerCollector
+
+        REGISTRY.register_collector(BrokerCollector(
+            event_bus.broker,
+            queues=getattr(settings, 'RABBITMQ_METRICS_QUEUES', ()),
+            sample_interval=getattr(settings, 'RABBITMQ_METRICS_SAMPLE_INTERVAL', 10)
+        ))
+        # No connection here: ready() runs for every management command too
+        # (migrate, shell, ...); the web entry point warms the broker up with
+        # warm_up_broker(), commands connect on first use
+
+
+def warm_up_broker() -> None:
+    """Connect and declare in the background if RABBITMQ_CONNECT_IN_BACKGROUND, startup never waits for RabbitMQ"""
+    if getattr(settings, 'RABBITMQ_CONNECT_IN_BACKGROUND', False):
+        from shared.message_broker.event_bus import event_bus
+        event_bus.broker.connect_in_background()
@@ -0,0 +1,283 @@
+# shared/message_broker/async_rabbitmq.py
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
+
+from shared.utils.singleton import SingletonMeta
+from shared.message_broker.codec import DEFAULT_CONTENT_TYPE, DecodeError, get_codec
+from shared.message_broker.envelope import (
+    PublishResult, BatchPublishResult, build_event, build_properties
+)
+
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class AsyncRabbitMQBroker(metaclass=SingletonMeta):
+    """
+    asyncio-native counterpart of RabbitMQBroker for ASGI code paths.
+
+    Same declare/publish/subscribe surface, but every call is awaitable and
+    nothing blocks the event loop. Connections are opened lazily on first use.
+    """
+
+    def __init__(self,
+                 host: str = 'localhost',
+                 port: int = 5672,
+                 username: str = 'guest',
+                 password: str = 'guest',
+                 virtual_host: str = '/',
+                 confirm_delivery: bool = True,
+                 max_concurrency: int = 10,
+                 content_type: str = DEFAULT_CONTENT_TYPE):
+
+        self.connection_url = f"amqp://{username}:{password}@{host}:{port}/{virtual_host.lstrip('/')}"
+        self.confirm_delivery = confirm_delivery
+        self.max_concurrency = max_concurrency
+        self.content_type = get_codec(content_type).content_type
+
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._consumer_channels: Dict[str, aio_pika.abc.AbstractChannel] = {}
+        # One consumer per queue, dispatching on the event type
+        self._queue_handlers: Dict[str, Dict[str, EventCallback]] = {}
+        self._exchanges: Dict[str, aio_pika.abc.AbstractExchange] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def connect(self) -> None:
+        """Establish connection to RabbitMQ"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._connection and not self._connection.is_closed:
+                return
+            try:
+                # connect_robust restores channels, queues and consumers after a reconnect
+                self._connection = await aio_pika.connect_robust(self.connection_url)
+                self._channel = await self._connection.channel(
+                    publisher_confirms=self.confirm_delivery
+                )
+                self._exchanges = {}
+                logger.info("Successfully connected to RabbitMQ (async)")
+            except Exception as e:
+                logger.error(f"Failed to connect to RabbitMQ (async): {e}")
+                raise
+
+    async def _ensure_connection(self) -> None:
+        """Ensure connection is alive, connect if necessary"""
+        if not self._connection or self._connection.is_closed:
+            await self.connect()
+
+    async def _get_exchange(self, exchange_name: str) -> aio_pika.abc.AbstractExchange:
+        """Resolve an exchange object, '' being the default exchange"""
+        await self._ensure_connection()
+        if not exchange_name:
+            return self._channel.default_exchange
+        if exchange_name not in self._exchanges:
+            self._exchanges[exchange_name] = await self._channel.get_exchange(
+                exchange_name, ensure=False
+            )
+        return self._exchanges[exchange_name]
+
+    async def declare_exchange(self, exchange_name: str, exchange_type: str = 'topic', durable: bool = True) -> None:
+        """Declare an exchange"""
+        await self._ensure_connection()
+        self._exchanges[exchange_name] = await self._channel.declare_exchange(
+            exchange_name,
+            type=exchange_type,
+            durable=durable
+        )
+
+    async def declare_queue(self, queue_name: str, durable: bool = True, **kwargs) -> None:
+        """Declare a queue"""
+        await self._ensure_connection()
+        await self._channel.declare_queue(
+            queue_name,
+            durable=durable,
+            **kwargs
+        )
+
+    async def bind_queue(self, exchange: str, queue: str, routing_key: str) -> None:
+        """Bind queue to exchange with routing key"""
+        await self._ensure_connection()
+        amqp_queue = await self._channel.get_queue(queue, ensure=False)
+        await amqp_queue.bind(exchange, routing_key=routing_key)
+
+    def _build_message(self, event: Dict[str, Any], content_type: Optional[str] = None) -> aio_pika.Message:
+        codec = get_codec(content_type or self.content_type)
+        return aio_pika.Message(
+            body=codec.encode(event),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            **build_properties(event, codec.content_type)
+        )
+
+    async def publish_event(self,
+                            exchange: str,
+                            routing_key: str,
+                            event_type: str,
+                            data: Dict[str, Any],
+                            correlation_id: Optional[str] = None,
+                            event_id: Optional[str] = None,
+                            content_type: Optional[str] = None) -> None:
+        """
+        Publish an event to RabbitMQ; with confirm_delivery this returns once the broker acked it
+        """
+        event = build_event(event_type, data, correlation_id, event_id)
+        try:
+            amqp_exchange = await self._get_exchange(exchange)
+            await amqp_exchange.publish(
+                self._build_message(event, content_type),
+                routing_key=routing_key,
+                mandatory=False
+            )
+            logger.info(f"Published event {event_type} to {routing_key}")
+        except Exception as e:
+            logger.error(f"Failed to publish event {event_type}: {e}")
+            raise
+
+    async def publish_batch(self,
+                            exchange: str,
+                            events: Iterable[Dict[str, Any]],
+                            mandatory: bool = False,
+                            timeout: float = 30,
+                            content_type: Optional[str] = None) -> BatchPublishResult:
+        """
+        Publish many events concurrently, the broker confirms are awaited together
+        """
+        amqp_exchange = await self._get_exchange(exchange)
+
+        async def publish_one(result: PublishResult, event: Dict[str, Any]) -> None:
+            try:
+                await amqp_exchange.publish(
+                    self._build_message(event, content_type),
+                    routing_key=result.routing_key,
+                    mandatory=mandatory,
+                    timeout=timeout
+                )
+                result.success = True
+            except Exception as e:
+                result.error = str(e) or e.__class__.__name__
+
+        results: List[PublishResult] = []
+        publishes = []
+        for index, item in enumerate(events):
+            event = build_event(
+                item['event_type'],
+                item.get('data', {}),
+                item.get('correlation_id'),
+                item.get('event_id')
+            )
+            result = PublishResult(
+                index=index,
+                event_id=event['event_id'],
+                event_type=event['event_type'],
+                routing_key=item['routing_key']
+            )
+            results.append(result)
+            publishes.append(publish_one(result, event))
+
+        await asyncio.gather(*publishes)
+
+        batch = BatchPublishResult(confirmed=self.confirm_delivery, results=results)
+        logger.info(
+            f"Published batch of {len(results)} events to {exchange} "
+            f"({len(batch.failed)} failed, confirmed={self.confirm_delivery})"
+        )
+        return batch
+
+    async def subscribe_event(self,
+                              queue: str,
+                              event_type: str,
+                              callback: EventCallback,
+                              auto_ack: bool = False,
+                              max_concurrency: Optional[int] = None) -> None:
+        """
+        Subscribe to events on a specific queue.
+
+        Like RabbitMQBroker.subscribe_event, every queue has a single consumer
+        dispatching deliveries to the handler registered for their AMQP
+        ``type`` property; subscribing another event type on the same queue
+        only adds a handler. ``auto_ack`` and ``max_concurrency`` are taken
+        from the first subscription.
+
+        ``callback`` may be a coroutine function or a plain function (run in a
+        worker thread). At most ``max_concurrency`` messages of this queue are
+        in flight at once; prefetch is set to the same value.
+        """
+        await self._ensure_connection()
+        handlers = self._queue_handlers.get(queue)
+        if handlers is not None:
+            handlers[event_type] = callback
+            logger.info(f"Added {event_type} handler to the consumer of {queue}")
+            return
+        handlers = self._queue_handlers[queue] = {event_type: callback}
+
+        concurrency = max_concurrency or self.max_concurrency
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # A channel per queue so prefetch applies to this consumer only
+        channel = self._consumer_channels.get(queue)
+        if channel is None or channel.is_closed:
+            channel = await self._connection.channel()
+            await channel.set_qos(prefetch_count=concurrency)
+            self._consumer_channels[queue] = channel
+
+        async def message_callback(message: AbstractIncomingMessage) -> None:
+            async with semaphore:
+                try:
+                    handler = handlers.get(message.type)
+                    if message.type and handler is None:
+                        # Bound here for a type nobody handles (anymore): drop undecoded
+                        logger.debug(f"No handler for {message.type} on queue {queue}")
+                    else:
+                        payload = get_codec(message.content_type).decode(message.body)
+                        if handler is None:
+                            # Publisher without the type property: dispatch on the body
+                            handler = handlers.get(payload.get('event_type'))
+                        if handler is not None:
+                            logger.info(f"Processing event {payload.get('event_type')} from queue {queue}")
+                            if inspect.iscoroutinefunction(handler):
+                                await handler(payload)
+                            else:
+                                await asyncio.to_thread(handler, payload)
+
+                    if not auto_ack:
+                        await message.ack()
+
+                except DecodeError as e:
+                    logger.error(f"Failed to decode message: {e}")
+                    if not auto_ack:
+                        await message.reject(requeue=False)
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}")
+                    if not auto_ack:
+                        await message.nack(requeue=True)
+
+        amqp_queue = await channel.get_queue(queue, ensure=False)
+        await amqp_queue.consume(message_callback, no_ack=auto_ack)
+        logger.info(f"Subscribed to {event_type} on queue {queue} (concurrency={concurrency})")
+
+    async def close_connection(self) -> None:
+        """Close RabbitMQ connection"""
+        try:
+            for channel in self._consumer_channels.values():
+                if not channel.is_closed:
+                    await channel.close()
+            self._consumer_channels = {}
+            self._queue_handlers = {}
+            if self._connection and not self._connection.is_closed:
+                await self._connection.close()
+            self._exchanges = {}
+            logger.info("RabbitMQ connection closed (async)")
+        except Exception as e:
+            logger.error(f"Error closing RabbitMQ connection (async): {e}")
+
+
+# Global async broker instance, connects on first use
+async_rabbitmq_broker = AsyncRabbitMQBroker()
@@ -0,0 +1,188 @@
+# shared/message_broker/channel_pool.py
+import pika
+import logging
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+from typing import Dict, Optional
+
+from shared.message_broker.confirms import ConfirmChannel
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelPoolTimeout(Exception):
+    """Raised when no channel becomes available in time"""
+    pass
+
+
+class PooledChannel:
+    """
+    A channel together with the connection it lives on.
+
+    pika's BlockingConnection is not thread-safe, so every pooled channel gets
+    its own connection and is only ever used by the thread that checked it out.
+    """
+
+    def __init__(self, connection_params: pika.ConnectionParameters):
+        self.connection = pika.BlockingConnection(connection_params)
+        self.channel = self.connection.channel()
+        self.last_used = monotonic()
+        self.broken = False
+        self._confirms: Optional[ConfirmChannel] = None
+
+    @property
+    def confirms(self) -> ConfirmChannel:
+        """Publisher-confirm channel on the same connection, opened on first use"""
+        if self._confirms is None or not self._confirms.is_open:
+            self._confirms = ConfirmChannel(self.connection)
+        return self._confirms
+
+    @property
+    def is_open(self) -> bool:
+        return (not self.broken
+                and self.connection.is_open
+                and self.channel.is_open)
+
+    def check_health(self) -> bool:
+        """Service heartbeats and make sure the connection is still usable"""
+        if not self.is_open:
+            return False
+        try:
+            self.connection.process_data_events(time_limit=0)
+        except Exception as e:
+            logger.warning(f"Pooled RabbitMQ channel failed health check: {e}")
+            self.broken = True
+            return False
+        return self.is_open
+
+    def close(self) -> None:
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except Exception as e:
+            logger.error(f"Error closing pooled RabbitMQ connection: {e}")
+
+
+class ChannelPool:
+    """
+    Bounded checkout/checkin pool of publishing channels.
+
+    Every pooled channel owns its connection (see PooledChannel), so a
+    process opens at most ``max_size`` publishing connections, plus one for
+    consuming. Broker-wide that is max_size x web workers x consumer
+    processes: keep ``max_size`` small (RABBITMQ_POOL_MAX_SIZE for the
+    global broker); callers beyond it wait up to ``acquire_timeout``.
+
+    Network I/O (opening, health-checking and closing connections) never
+    happens while holding the pool lock, so a slow probe does not block
+    the other checkouts.
+    """
+
+    def __init__(self,
+                 connection_params: pika.ConnectionParameters,
+                 max_size: int = 10,
+                 acquire_timeout: float = 5,
+                 max_idle: float = 300):
+        self.connection_params = connection_params
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+
+        self._idle = deque()
+        self._size = 0
+        self._cond = Condition()
+        self._closed = False
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Check a channel out for the duration of the block"""
+        entry = self._checkout(self.acquire_timeout if timeout is None else timeout)
+        try:
+            yield entry
+        except Exception:
+            # Channel state is unknown after a failure, never reuse it
+            entry.broken = True
+            raise
+        finally:
+            self._checkin(entry)
+
+    def _checkout(self, timeout: float) -> PooledChannel:
+        deadline = monotonic() + timeout
+        while True:
+            entry = self._reserve(deadline, timeout)
+            if entry is None:
+                break
+            # Probed outside the lock, it is ours until checked in
+            if monotonic() - entry.last_used < self.max_idle and entry.check_health():
+                return entry
+            self._discard(entry)
+
+        # A slot was reserved: open the connection outside the lock
+        try:
+            return PooledChannel(self.connection_params)
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _reserve(self, deadline: float, timeout: float) -> Optional[PooledChannel]:
+        """An idle entry, or None once a slot for a new one is reserved"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ChannelPoolTimeout("Channel pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise ChannelPoolTimeout(
+                        f"No RabbitMQ channel available after {timeout}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+    def _checkin(self, entry: PooledChannel) -> None:
+        with self._cond:
+            if not self._closed and entry.is_open:
+                entry.last_used = monotonic()
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._discard(entry)
+
+    def _discard(self, entry: PooledChannel) -> None:
+        """Close an entry and free its slot"""
+        entry.close()
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def close(self) -> None:
+        """Close idle channels; checked-out ones are closed on checkin"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def reopen(self) -> None:
+        with self._cond:
+            self._closed = False
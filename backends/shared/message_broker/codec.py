@@ -0,0 +1,92 @@
+# shared/message_broker/codec.py
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON keeps working without it
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+class DecodeError(ValueError):
+    """Raised when a message body cannot be decoded"""
+    pass
+
+
+class Codec(ABC):
+    """Serializes message bodies; selected through the AMQP content_type"""
+    content_type: str = None
+
+    @abstractmethod
+    def encode(self, payload: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Any:
+        pass
+
+
+class JSONCodec(Codec):
+    """Default codec, readable by every consumer"""
+    content_type = 'application/json'
+
+    def encode(self, payload: Any) -> bytes:
+        return json.dumps(payload, default=str, separators=(',', ':')).encode()
+
+    def decode(self, body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise DecodeError(str(e)) from e
+
+
+class MsgPackCodec(Codec):
+    """Compact binary codec for high-volume events"""
+    content_type = 'application/msgpack'
+
+    def encode(self, payload: Any) -> bytes:
+        return msgpack.packb(payload, default=str, use_bin_type=True)
+
+    def decode(self, body: bytes) -> Any:
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise DecodeError(str(e)) from e
+
+
+DEFAULT_CONTENT_TYPE = JSONCodec.content_type
+
+_codecs: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> Codec:
+    """Make a codec available for publishing and decoding"""
+    _codecs[codec.content_type] = codec
+    return codec
+
+
+def get_codec(content_type: Optional[str] = None) -> Codec:
+    """
+    Codec for a content type.
+
+    Messages without a content_type (or from older publishers) are JSON.
+    """
+    if not content_type:
+        return _codecs[DEFAULT_CONTENT_TYPE]
+    try:
+        return _codecs[content_type]
+    except KeyError:
+        raise DecodeError(f"Unsupported content type: {content_type}")
+
+
+def available_content_types():
+    return list(_codecs)
+
+
+register_codec(JSONCodec())
+if msgpack is not None:
+    register_codec(MsgPackCodec())
@@ -0,0 +1,177 @@
+# shared/message_broker/confirms.py
+import logging
+from time import monotonic
+from typing import Dict, List
+
+import pika
+from pika.adapters.blocking_connection import BlockingConnection
+
+from shared.message_broker.envelope import PublishResult
+
+logger = logging.getLogger(__name__)
+
+# pika versions whose private Channel API ConfirmChannel pipelines through;
+# requirements.txt pins pika to one of them
+PIPELINED_PIKA_VERSIONS = ('1.3.',)
+PIPELINING_SUPPORTED = pika.__version__.startswith(PIPELINED_PIKA_VERSIONS)
+
+
+class PublishNotConfirmed(Exception):
+    """The broker nacked, returned or did not confirm a message in time"""
+    pass
+
+
+class ConfirmChannel:
+    """
+    Publisher-confirm channel on a BlockingConnection that writes a whole
+    batch before waiting for the broker's acks.
+
+    BlockingChannel.basic_publish waits for the confirm of every single
+    message. To pipeline, messages are written through the asynchronous
+    pika.channel.Channel the blocking one wraps (``_impl``), and Basic.Ack,
+    Basic.Nack and Basic.Return frames are collected by callbacks registered
+    on it. That is private pika API: all of its use is in this class, and
+    only with PIPELINED_PIKA_VERSIONS. Any other pika version gets the
+    public blocking confirm API instead, same results at one round trip per
+    message.
+
+    Like its connection, it may only be used by one thread at a time.
+    """
+
+    def __init__(self, connection: BlockingConnection):
+        self.connection = connection
+        self.channel = connection.channel()
+        self.pipelined = PIPELINING_SUPPORTED
+        self.broken = False
+        self._delivery_tag = 0
+        self._pending: Dict[int, PublishResult] = {}
+        self._returned: Dict[str, PublishResult] = {}
+
+        if not self.pipelined:
+            self.channel.confirm_delivery()
+            return
+        selected = []
+        self.channel._impl.confirm_delivery(
+            ack_nack_callback=self._on_confirmation,
+            callback=selected.append
+        )
+        self.channel._impl.add_on_return_callback(self._on_returned)
+        while not selected and self.channel.is_open:
+            connection.process_data_events(time_limit=1)
+
+    @property
+    def is_open(self) -> bool:
+        return not self.broken and self.channel.is_open
+
+    def publish(self,
+                exchange: str,
+                messages: list,
+                results: List[PublishResult],
+                mandatory: bool = False,
+                timeout: float = 30) -> None:
+        """
+        Publish ``(routing_key, body, properties)`` tuples and wait up to
+        ``timeout`` for their confirms, setting ``success``/``error`` on the
+        matching results. Connection errors propagate.
+        """
+        if self.pipelined:
+            self._publish_pipelined(exchange, messages, results, mandatory, timeout)
+        else:
+            self._publish_blocking(exchange, messages, results, mandatory)
+
+    def _publish_pipelined(self,
+                           exchange: str,
+                           messages: list,
+                           results: List[PublishResult],
+                           mandatory: bool,
+                           timeout: float) -> None:
+        self._pending = {}
+        self._returned = {}
+        try:
+            for (routing_key, body, properties), result in zip(messages, results):
+                self.channel._impl.basic_publish(
+                    exchange=exchange,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=properties,
+                    mandatory=mandatory
+                )
+                self._delivery_tag += 1
+                self._pending[self._delivery_tag] = result
+                if mandatory:
+                    self._returned[result.event_id] = result
+
+            deadline = monotonic() + timeout
+            while self._pending and not self.channel.is_closed:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self.connection.process_data_events(time_limit=remaining)
+
+        finally:
+            unresolved = list(self._pending.values())
+            self._pending = {}
+            self._returned = {}
+
+        for result in unresolved:
+            result.error = result.error or (
+                'channel closed' if self.channel.is_closed else 'confirm timeout'
+            )
+        if unresolved:
+            # Late acks would be attributed to the next batch, start over
+            self.close()
+
+    def _publish_blocking(self,
+                          exchange: str,
+                          messages: list,
+                          results: List[PublishResult],
+                          mandatory: bool) -> None:
+        for (routing_key, body, properties), result in zip(messages, results):
+            try:
+                self.channel.basic_publish(
+                    exchange=exchange,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=properties,
+                    mandatory=mandatory
+                )
+                result.success = True
+            except pika.exceptions.UnroutableError:
+                result.error = 'unroutable'
+            except pika.exceptions.NackError:
+                result.error = 'nacked by broker'
+
+    def _on_confirmation(self, frame) -> None:
+        """Resolve pending results from a Basic.Ack / Basic.Nack"""
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = [tag for tag in self._pending if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+
+        for tag in tags:
+            result = self._pending.pop(tag, None)
+            if result is None:
+                continue
+            if not acked:
+                result.error = result.error or 'nacked by broker'
+            result.success = acked and result.error is None
+
+        if not self._pending:
+            # Wake process_data_events up instead of waiting for its time limit
+            self.connection.add_callback_threadsafe(lambda: None)
+
+    def _on_returned(self, channel, method, properties, body) -> None:
+        """Mark mandatory messages the broker could not route"""
+        result = self._returned.get(properties.message_id)
+        if result is not None:
+            result.error = f"unroutable: {method.reply_text}"
+
+    def close(self) -> None:
+        self.broken = True
+        try:
+            if self.channel.is_open:
+                self.channel.close()
+        except Exception as e:
+            logger.warning(f"Error closing RabbitMQ confirm channel: {e}")
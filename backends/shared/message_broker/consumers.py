@@ -0,0 +1,204 @@
+# shared/message_broker/consumers.py
+import inspect
+import logging
+import multiprocessing
+import signal
+from dataclasses import dataclass, field
+from threading import Event, Thread
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Type
+
+from shared.event.base_subscriber import BaseSubscriber
+from shared.message_broker.publish_buffer import Backoff
+
+logger = logging.getLogger(__name__)
+
+# Consumer processes are spawned, not forked: a child must not inherit the
+# parent's RabbitMQ sockets, database connections or background threads
+_mp = multiprocessing.get_context('spawn')
+
+
+def discover_subscribers() -> List[Type[BaseSubscriber]]:
+    """Import the ``subscribers`` module of every installed app and return the concrete BaseSubscriber subclasses"""
+    from django.utils.module_loading import autodiscover_modules
+    autodiscover_modules('subscribers')
+
+    found: List[Type[BaseSubscriber]] = []
+    pending = list(BaseSubscriber.__subclasses__())
+    while pending:
+        subscriber_class = pending.pop(0)
+        pending.extend(subscriber_class.__subclasses__())
+        if not inspect.isabstract(subscriber_class) and subscriber_class not in found:
+            found.append(subscriber_class)
+    return found
+
+
+def subscribe_all(queues: Optional[Iterable[str]] = None) -> List[BaseSubscriber]:
+    """Instantiate every discovered subscriber and register its subscriptions on ``queues`` (all when None)"""
+    from shared.message_broker.event_bus import event_bus
+    event_bus.restrict_to_queues(queues)
+
+    subscribers = []
+    for subscriber_class in discover_subscribers():
+        subscriber = subscriber_class()
+        subscriber.subscribe_to_events()
+        subscribers.append(subscriber)
+    return subscribers
+
+
+def discover_queues() -> List[str]:
+    """Queues the discovered subscribers consume, found without connecting to RabbitMQ"""
+    from shared.message_broker.event_bus import event_bus
+    try:
+        subscribers = subscribe_all(queues=())
+    finally:
+        event_bus.restrict_to_queues(None)
+    return list(dict.fromkeys(
+        subscription['queue']
+        for subscriber in subscribers
+        for subscription in subscriber.get_subscriptions()
+    ))
+
+
+def run_consumer(queues: List[str], metrics_port: Optional[int] = None) -> None:
+    """
+    Entry point of a consumer process: consume ``queues`` until SIGTERM or
+    SIGINT, then finish the in-flight deliveries and send their acks.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from shared.message_broker.event_bus import event_bus
+    from shared.message_broker.metrics import start_http_server
+
+    stopping = Event()
+
+    def exit_now(signum, frame):
+        # Nothing is in flight before consuming starts
+        raise SystemExit(0)
+
+    def drain(signum, frame):
+        stopping.set()
+        # The main thread is inside pika's ioloop, stop it from another one
+        Thread(target=event_bus.stop, daemon=True).start()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, exit_now)
+
+    if metrics_port:
+        start_http_server(metrics_port)
+
+    subscribe_all(queues)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, drain)
+    if not stopping.is_set():
+        event_bus.start()
+    event_bus.broker.close_connection()
+    logger.info(f"Consumer of {', '.join(queues)} stopped")
+
+
+@dataclass
+class ConsumerSlot:
+    """One supervised consumer process and its restart state"""
+    queue: str
+    index: int
+    metrics_port: Optional[int] = None
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    started_at: float = 0.0
+    restart_at: Optional[float] = None
+    backoff: Backoff = field(default_factory=lambda: Backoff(initial=1, max_delay=60))
+
+    @property
+    def name(self) -> str:
+        return f'consumer-{self.queue}-{self.index}'
+
+
+class ConsumerSupervisor:
+    """
+    Runs ``processes[queue]`` consumer processes per queue and restarts
+    the ones that die.
+
+    A child that exits before ``min_uptime`` seconds is restarted with
+    jittered exponential backoff, so a crash loop (RabbitMQ down, broken
+    handler import) does not spin. On stop() every child gets SIGTERM and
+    ``shutdown_timeout`` seconds to drain before it is killed.
+    """
+
+    def __init__(self,
+                 processes: Dict[str, int],
+                 shutdown_timeout: float = 30,
+                 min_uptime: float = 30,
+                 metrics_port: Optional[int] = None):
+        self.shutdown_timeout = shutdown_timeout
+        self.min_uptime = min_uptime
+        self.slots: List[ConsumerSlot] = []
+        for queue, count in processes.items():
+            for index in range(count):
+                port = metrics_port + len(self.slots) if metrics_port else None
+                self.slots.append(ConsumerSlot(queue, index, port))
+        self._stopping = Event()
+
+    def _spawn(self, slot: ConsumerSlot) -> None:
+        slot.process = _mp.Process(
+            target=run_consumer,
+            args=([slot.queue], slot.metrics_port),
+            name=slot.name
+        )
+        slot.process.start()
+        slot.started_at = monotonic()
+        slot.restart_at = None
+        logger.info(f"Started {slot.name} (pid {slot.process.pid})")
+
+    def _check(self, slot: ConsumerSlot) -> None:
+        """Schedule the restart of a dead child, or restart it when due"""
+        if slot.process.is_alive():
+            return
+        now = monotonic()
+        if slot.restart_at is None:
+            uptime = now - slot.started_at
+            if uptime >= self.min_uptime:
+                slot.backoff.reset()
+            delay = slot.backoff.next_delay()
+            slot.restart_at = now + delay
+            logger.error(
+                f"{slot.name} (pid {slot.process.pid}) exited with {slot.process.exitcode} "
+                f"after {uptime:.0f}s, restarting in {delay:.1f}s"
+            )
+        if now >= slot.restart_at:
+            self._spawn(slot)
+
+    def run(self) -> None:
+        """Start the children and supervise them until stop() is called"""
+        for slot in self.slots:
+            self._spawn(slot)
+        try:
+            while not self._stopping.wait(0.5):
+                for slot in self.slots:
+                    self._check(slot)
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def install_signal_handlers(self) -> None:
+        """Stop gracefully on SIGTERM / SIGINT"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.stop())
+
+    def _shutdown(self) -> None:
+        """SIGTERM every child, wait for them to drain, kill the stragglers"""
+        alive = [slot.process for slot in self.slots if slot.process and slot.process.is_alive()]
+        for process in alive:
+            process.terminate()
+
+        deadline = monotonic() + self.shutdown_timeout
+        for process in alive:
+            process.join(max(deadline - monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"{process.name} did not stop in {self.shutdown_timeout}s, killing it")
+                process.kill()
+                process.join()
+        logger.info(f"Stopped {len(alive)} consumer processes")
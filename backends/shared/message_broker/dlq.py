@@ -0,0 +1,95 @@
+# shared/message_broker/dlq.py
+import logging
+from typing import Any, Dict, List, Optional
+
+from shared.message_broker.retry import (
+    ATTEMPT_HEADER, ERROR_HEADER, ORIGINAL_QUEUE_HEADER, REASON_HEADER, with_headers
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterQueue:
+    """Inspect, replay and purge a dead letter queue"""
+
+    def __init__(self, broker=None, queue: str = 'dlq.domain_events'):
+        if broker is None:
+            from shared.message_broker.rabbitmq import rabbitmq_broker
+            broker = rabbitmq_broker
+        self.broker = broker
+        self.queue = queue
+
+    def count(self) -> int:
+        """Messages waiting in the queue"""
+        with self.broker.channel() as pooled:
+            result = pooled.channel.queue_declare(queue=self.queue, passive=True)
+        return result.method.message_count
+
+    def peek(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Describe up to ``limit`` messages without removing them"""
+        messages = []
+        with self.broker.channel() as pooled:
+            last_tag = None
+            while len(messages) < limit:
+                method, properties, body = pooled.channel.basic_get(self.queue, auto_ack=False)
+                if method is None:
+                    break
+                last_tag = method.delivery_tag
+                messages.append(self._describe(properties, body))
+            if last_tag is not None:
+                pooled.channel.basic_nack(delivery_tag=last_tag, multiple=True, requeue=True)
+        return messages
+
+    def replay(self, limit: Optional[int] = None, target_queue: Optional[str] = None) -> int:
+        """
+        Move messages back to the queue they failed on (or ``target_queue``)
+        with a fresh attempt count. Returns the number of replayed messages.
+        """
+        replayed = 0
+        skipped_tag = None
+        with self.broker.channel() as pooled:
+            while limit is None or replayed < limit:
+                method, properties, body = pooled.channel.basic_get(self.queue, auto_ack=False)
+                if method is None:
+                    break
+
+                headers = dict(properties.headers or {})
+                destination = target_queue or headers.get(ORIGINAL_QUEUE_HEADER)
+                if not destination:
+                    # Kept unacked until the end so it is not fetched again
+                    logger.warning(f"No original queue for {properties.message_id}, skipped")
+                    skipped_tag = method.delivery_tag
+                    continue
+
+                for header in (ATTEMPT_HEADER, ERROR_HEADER, ORIGINAL_QUEUE_HEADER, REASON_HEADER):
+                    headers.pop(header, None)
+                if self.broker.republish('', destination, body, with_headers(properties, headers)):
+                    pooled.channel.basic_ack(delivery_tag=method.delivery_tag)
+                    replayed += 1
+                else:
+                    pooled.channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+                    break
+
+            if skipped_tag is not None:
+                pooled.channel.basic_nack(delivery_tag=skipped_tag, multiple=True, requeue=True)
+        logger.info(f"Replayed {replayed} messages from {self.queue}")
+        return replayed
+
+    def purge(self) -> int:
+        """Drop every message, returns how many were removed"""
+        with self.broker.channel() as pooled:
+            result = pooled.channel.queue_purge(self.queue)
+        return result.method.message_count
+
+    @staticmethod
+    def _describe(properties, body: bytes) -> Dict[str, Any]:
+        headers = properties.headers or {}
+        return {
+            'message_id': properties.message_id,
+            'event_type': properties.type,
+            'original_queue': headers.get(ORIGINAL_QUEUE_HEADER),
+            'reason': headers.get(REASON_HEADER),
+            'attempts': headers.get(ATTEMPT_HEADER, 1),
+            'last_error': headers.get(ERROR_HEADER),
+            'size': len(body),
+        }
@@ -0,0 +1,64 @@
+# shared/message_broker/envelope.py
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class PublishResult:
+    """Outcome of a single message inside a batch publish"""
+    index: int
+    event_id: str
+    event_type: str
+    routing_key: str
+    success: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchPublishResult:
+    """Outcome of publish_batch"""
+    confirmed: bool
+    results: List[PublishResult] = field(default_factory=list)
+
+    @property
+    def published(self) -> List[PublishResult]:
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed(self) -> List[PublishResult]:
+        return [r for r in self.results if not r.success]
+
+    @property
+    def all_succeeded(self) -> bool:
+        return all(r.success for r in self.results)
+
+
+def get_current_timestamp() -> str:
+    """Get current timestamp in ISO format"""
+    from django.utils import timezone
+    return timezone.now().isoformat()
+
+
+def build_event(event_type: str,
+                data: Dict[str, Any],
+                correlation_id: Optional[str] = None,
+                event_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build the event envelope sent over the wire"""
+    return {
+        'event_id': event_id or str(uuid.uuid4()),
+        'event_type': event_type,
+        'timestamp': get_current_timestamp(),
+        'correlation_id': correlation_id or str(uuid.uuid4()),
+        'data': data
+    }
+
+
+def build_properties(event: Dict[str, Any], content_type: str = 'application/json') -> Dict[str, Any]:
+    """AMQP properties for an event envelope, as keyword arguments"""
+    return {
+        'content_type': content_type,
+        'correlation_id': event['correlation_id'],
+        'message_id': event['event_id'],
+        'type': event['event_type'],
+    }
@@ -1,19 +1,43 @@
 # shared/message_broker/event_bus.py
 import logging
 import time
-from typing import Callable
+from functools import partial
+from typing import Callable, FrozenSet, Iterable, Optional
 from shared.message_broker.rabbitmq import rabbitmq_broker
+from shared.message_broker.codec import DecodeError
+from shared.message_broker.idempotency import get_default_store
+from shared.message_broker.retry import DEFAULT_RETRY_POLICY, RetryPolicy
 from shared.event.event_registry import EventRegistry
 
 logger = logging.getLogger(__name__)
 
+
+def handle_message(callback: Callable, message):
+    """Rehydrate a consumed envelope and pass the event to ``callback``"""
+    try:
+        event = EventRegistry.create_event_from_dict(message.get('data', message))
+    except ValueError as e:
+        # Unknown or malformed events would fail on every redelivery
+        logger.error(f"❌ Failed to rehydrate event: {e}")
+        raise DecodeError(str(e)) from e
+    try:
+        logger.info(f"🔄 Processing event: {event.event_type}")
+        callback(event)
+    except Exception as e:
+        logger.error(f"❌ Failed to process event: {e}")
+        raise
+
+
 class EventBus:
     """Enhanced event bus with better control"""
     
     def __init__(self):
         self.broker = rabbitmq_broker
         self._running = False
-        self._setup_infrastructure()
+        # Queues this process consumes, None for all (see restrict_to_queues)
+        self._queues: Optional[FrozenSet[str]] = None
+        # Declared on first use (or by connect_in_background), not at import
+        self.broker.add_setup_hook(self._setup_infrastructure)
     
     def _setup_infrastructure(self):
         """Setup required exchanges and queues"""
@@ -25,37 +49,101 @@ class EventBus:
     def publish(self, event, routing_key: str = None) -> bool:
         """Publish a domain event"""
         if not routing_key:
-            routing_key = event.event_type.lower()
+            routing_key = EventRegistry.routing_key(event.event_type)
         
-        message = event.to_dict()
+        try:
+            self.broker.publish_event(
+                exchange='domain_events',
+                routing_key=routing_key,
+                event_type=event.event_type,
+                data=event.to_dict(),
+                correlation_id=getattr(event, 'correlation_id', None),
+                event_id=event.event_id
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to publish event {event.event_type}: {e}")
+            return False
         
-        success = self.broker.publish(
+        logger.info(f"📤 Published event: {event.event_type}")
+        return True
+
+    def publish_batch(self, events, confirm: bool = True):
+        """Publish many domain events, returning per-event results"""
+        batch = self.broker.publish_batch(
             exchange='domain_events',
-            routing_key=routing_key,
-            message=message
+            events=[
+                {
+                    'routing_key': EventRegistry.routing_key(event.event_type),
+                    'event_type': event.event_type,
+                    'data': event.to_dict(),
+                    'correlation_id': getattr(event, 'correlation_id', None),
+                    'event_id': event.event_id,
+                }
+                for event in events
+            ],
+            confirm=confirm
         )
-        
-        if success:
-            logger.info(f"📤 Published event: {event.event_type}")
-        return success
+        for failure in batch.failed:
+            logger.error(f"❌ Failed to publish event {failure.event_type} ({failure.event_id}): {failure.error}")
+        logger.info(f"📤 Published {len(batch.published)}/{len(batch.results)} events")
+        return batch
     
-    def subscribe(self, queue_name: str, event_type: str, callback: Callable, durable: bool = True) -> None:
-        """Subscribe to events"""
+    def restrict_to_queues(self, queues: Optional[Iterable[str]]) -> None:
+        """
+        Only subscribe on ``queues`` from now on, other subscriptions are
+        skipped; None lifts the restriction. Consumer processes use this to
+        split the queues between them.
+        """
+        self._queues = frozenset(queues) if queues is not None else None
+
+    def subscribe(self,
+                  queue_name: str,
+                  event_type: str,
+                  callback: Callable,
+                  durable: bool = True,
+                  prefetch_count: int = None,
+                  concurrency: int = 1,
+                  ordered: bool = True,
+                  idempotent: bool = False,
+                  retry_policy: Optional[RetryPolicy] = DEFAULT_RETRY_POLICY,
+                  processes: int = 0) -> bool:
+        """
+        Subscribe to events
+
+        ``concurrency``/``ordered``/``prefetch_count``/``processes`` are per
+        queue, see RabbitMQBroker.subscribe_event; with ``processes`` the
+        callback must be a module-level function. ``idempotent`` callbacks run at most
+        once per event_id and queue, redeliveries are acked without calling them.
+        Failed events are retried with the ``retry_policy`` backoff and end up
+        in dlq.domain_events; ``retry_policy=None`` requeues them immediately.
+
+        Returns False when the queue is excluded by restrict_to_queues().
+        """
+        if self._queues is not None and queue_name not in self._queues:
+            logger.debug(f"Skipping {event_type} on queue {queue_name}, not consumed by this process")
+            return False
+
+        # The queue only receives the types bound here; several subscriptions
+        # on one queue share a single consumer that dispatches on the type
+        self.broker.ensure_setup()
         self.broker.declare_queue(queue_name, durable=durable)
-        routing_key = event_type.lower()
-        self.broker.bind_queue('domain_events', queue_name, routing_key)
+        self.broker.bind_queue('domain_events', queue_name, EventRegistry.routing_key(event_type))
         
-        def message_handler(message):
-            try:
-                event = EventRegistry.create_event_from_dict(message)
-                logger.info(f"🔄 Processing event: {event.event_type}")
-                callback(event)
-            except Exception as e:
-                logger.error(f"❌ Failed to process event: {e}")
-                raise
-        
-        self.broker.consume(queue_name, message_handler, auto_ack=False)
+        self.broker.subscribe_event(
+            queue_name,
+            event_type,
+            # Picklable as long as callback is, for processes
+            partial(handle_message, callback),
+            auto_ack=False,
+            prefetch_count=prefetch_count,
+            concurrency=concurrency,
+            ordered=ordered,
+            idempotency=get_default_store() if idempotent else None,
+            retry_policy=retry_policy,
+            processes=processes
+        )
         logger.info(f"📥 Subscribed to {event_type} on queue {queue_name}")
+        return True
     
     def start(self):
         """Start consuming events"""
@@ -65,7 +153,10 @@ class EventBus:
         
         self._running = True
         logger.info("🔄 Starting event bus...")
-        self.broker.start_consuming()
+        try:
+            self.broker.start_consuming()
+        finally:
+            self._running = False
     
     def stop(self):
         """Stop consuming events"""
@@ -0,0 +1,119 @@
+# shared/message_broker/idempotency.py
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# claim() outcomes
+CLAIMED = 'claimed'
+DUPLICATE = 'duplicate'
+IN_PROGRESS = 'in_progress'
+
+_PROCESSING = 'processing'
+_DONE = 'done'
+
+
+class IdempotencyStore:
+    """
+    Remembers which event_ids a consumer group already handled.
+
+    An in-process LRU answers repeated redeliveries without a round trip;
+    the Django cache (Redis) shares the state between consumer processes
+    and survives restarts for ``ttl`` seconds. Keys are scoped per queue,
+    so two queues receiving the same event each handle it once.
+
+    When the cache is unreachable the store fails open: the event is
+    handled again, delivery stays at least once.
+    """
+
+    def __init__(self,
+                 cache_alias: str = 'default',
+                 local_size: int = 10000,
+                 ttl: int = 86400,
+                 processing_ttl: int = 60,
+                 key_prefix: str = 'idempotency'):
+        self.cache_alias = cache_alias
+        self.local_size = local_size
+        self.ttl = ttl
+        self.processing_ttl = processing_ttl
+        self.key_prefix = key_prefix
+
+        self._local: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def _key(self, scope: str, event_id: str) -> str:
+        return f'{self.key_prefix}:{scope}:{event_id}'
+
+    def _seen_locally(self, key: str) -> bool:
+        with self._lock:
+            if key in self._local:
+                self._local.move_to_end(key)
+                return True
+            return False
+
+    def _remember_locally(self, key: str) -> None:
+        with self._lock:
+            self._local[key] = None
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def claim(self, scope: str, event_id: str) -> str:
+        """
+        Try to take ownership of an event before handling it.
+
+        Returns CLAIMED when the caller should run the handler, DUPLICATE
+        when it already completed, IN_PROGRESS while another consumer holds
+        it (for at most ``processing_ttl`` seconds).
+        """
+        key = self._key(scope, event_id)
+        if self._seen_locally(key):
+            return DUPLICATE
+
+        try:
+            added = self.cache.add(key, _PROCESSING, timeout=self.processing_ttl)
+        except Exception as e:
+            logger.warning(f"Idempotency cache unavailable, handling {event_id} anyway: {e}")
+            return CLAIMED
+        if added is not False:
+            # True, or None when django-redis swallowed a connection error
+            return CLAIMED
+
+        if self.cache.get(key) == _DONE:
+            self._remember_locally(key)
+            return DUPLICATE
+        return IN_PROGRESS
+
+    def complete(self, scope: str, event_id: str) -> None:
+        """Record a successfully handled event"""
+        key = self._key(scope, event_id)
+        self._remember_locally(key)
+        try:
+            self.cache.set(key, _DONE, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to record handled event {event_id}: {e}")
+
+    def release(self, scope: str, event_id: str) -> None:
+        """Give up a claim after a failure so the redelivery is handled again"""
+        try:
+            self.cache.delete(self._key(scope, event_id))
+        except Exception as e:
+            logger.warning(f"Failed to release event {event_id}: {e}")
+
+
+_default_store: Optional[IdempotencyStore] = None
+
+
+def get_default_store() -> IdempotencyStore:
+    """Store shared by every idempotent subscription of this process"""
+    global _default_store
+    if _default_store is None:
+        _default_store = IdempotencyStore()
+    return _default_store
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.message_broker.dlq import DeadLetterQueue
+
+
+class Command(BaseCommand):
+    help = 'Inspect, replay or purge the dead letter queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['count', 'peek', 'replay', 'purge'])
+        parser.add_argument('--queue', default='dlq.domain_events',
+                            help='Dead letter queue to work on')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Messages to peek (default 20) or replay (default all)')
+        parser.add_argument('--to', dest='target_queue', default=None,
+                            help='Replay into this queue instead of the one each message failed on')
+        parser.add_argument('--yes', action='store_true',
+                            help='Do not ask before purging')
+
+    def handle(self, *args, **options):
+        dlq = DeadLetterQueue(queue=options['queue'])
+        action = options['action']
+
+        if action == 'count':
+            self.stdout.write(f'{dlq.count()} messages in {dlq.queue}')
+
+        elif action == 'peek':
+            for message in dlq.peek(options['limit'] or 20):
+                self.stdout.write(
+                    f"{message['message_id']}  {message['event_type']}  "
+                    f"queue={message['original_queue']}  attempts={message['attempts']}  "
+                    f"reason={message['reason']}"
+                )
+
+        elif action == 'replay':
+            replayed = dlq.replay(limit=options['limit'], target_queue=options['target_queue'])
+            self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} messages from {dlq.queue}'))
+
+        elif action == 'purge':
+            if not options['yes']:
+                answer = input(f'Purge every message in {dlq.queue}? [y/N] ')
+                if answer.lower() != 'y':
+                    raise CommandError('Aborted')
+            self.stdout.write(self.style.SUCCESS(f'Purged {dlq.purge()} messages from {dlq.queue}'))
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.message_broker.consumers import ConsumerSupervisor, discover_queues
+
+
+class Command(BaseCommand):
+    help = 'Run supervised event consumer processes for the discovered subscribers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Consumer processes per queue (default EVENT_CONSUMER_PROCESSES)')
+        parser.add_argument('--queue', dest='queues', action='append', default=[], metavar='QUEUE=N',
+                            help='Processes for one queue, 0 to skip it; may be repeated')
+        parser.add_argument('--shutdown-timeout', type=float, default=30,
+                            help='Seconds children get to drain in-flight deliveries on shutdown')
+        parser.add_argument('--metrics-port', type=int, default=None,
+                            help='Serve Prometheus metrics from this port, one port per child')
+        parser.add_argument('--list', action='store_true',
+                            help='Print the discovered queues and exit')
+
+    def _parse_queue(self, value):
+        queue, sep, count = value.rpartition('=')
+        if not sep or not queue or not count.isdigit():
+            raise CommandError(f'Invalid --queue {value!r}, expected QUEUE=N')
+        return queue, int(count)
+
+    def handle(self, *args, **options):
+        queues = discover_queues()
+        if options['list']:
+            for queue in queues:
+                self.stdout.write(queue)
+            return
+        if not queues:
+            raise CommandError('No subscriptions found, nothing to consume')
+
+        default = options['processes']
+        if default is None:
+            default = getattr(settings, 'EVENT_CONSUMER_PROCESSES', 1)
+        processes = {queue: default for queue in queues}
+        processes.update(getattr(settings, 'EVENT_CONSUMER_QUEUE_PROCESSES', {}))
+        for queue, count in map(self._parse_queue, options['queues']):
+            processes[queue] = count
+
+        unknown = set(processes) - set(queues)
+        if unknown:
+            raise CommandError(f'No subscriptions on {", ".join(sorted(unknown))}')
+        processes = {queue: count for queue, count in processes.items() if count > 0}
+
+        supervisor = ConsumerSupervisor(
+            processes,
+            shutdown_timeout=options['shutdown_timeout'],
+            metrics_port=options['metrics_port']
+        )
+        supervisor.install_signal_handlers()
+        summary = ', '.join(f'{queue} x{count}' for queue, count in processes.items())
+        self.stdout.write(f'Running {len(supervisor.slots)} consumer processes: {summary}')
+        supervisor.run()
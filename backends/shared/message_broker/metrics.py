@@ -0,0 +1,329 @@
+# shared/message_broker/metrics.py
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic, perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; publishes and handlers range from sub-millisecond to confirm timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named family of samples, one per combination of label values"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, usually set by a collector at scrape time"""
+
+    type = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed, cumulative buckets"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block, also when it raises"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class Registry:
+    """
+    Metrics of this process, rendered in the Prometheus text format.
+
+    Collectors are called on every render and return metrics built on the
+    spot, for values that are sampled rather than counted (queue depths,
+    buffer sizes). A failing collector is logged and skipped.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[Metric]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+        return metrics
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Publishing
+PUBLISHED = REGISTRY.register(Counter(
+    'broker_published_total',
+    'Events handed to RabbitMQ by outcome (published, buffered, drained, failed)',
+    ('exchange', 'outcome')
+))
+PUBLISH_LATENCY = REGISTRY.register(Histogram(
+    'broker_publish_seconds',
+    'Time spent publishing, per call (a batch is one observation)',
+    ('exchange', 'mode')
+))
+
+# Consuming
+HANDLER_LATENCY = REGISTRY.register(Histogram(
+    'broker_handler_seconds',
+    'Time spent in event handlers',
+    ('queue', 'event_type', 'status')
+))
+ACKS = REGISTRY.register(Counter(
+    'broker_acks_total',
+    'Deliveries acknowledged',
+    ('queue',)
+))
+NACKS = REGISTRY.register(Counter(
+    'broker_nacks_total',
+    'Deliveries negatively acknowledged',
+    ('queue', 'requeue')
+))
+REDELIVERIES = REGISTRY.register(Counter(
+    'broker_redeliveries_total',
+    'Deliveries flagged as redelivered by RabbitMQ',
+    ('queue',)
+))
+RETRIES = REGISTRY.register(Counter(
+    'broker_retries_total',
+    'Failed deliveries parked in a delay queue',
+    ('queue',)
+))
+DEAD_LETTERS = REGISTRY.register(Counter(
+    'broker_dead_letters_total',
+    'Deliveries moved to the dead letter exchange',
+    ('queue',)
+))
+
+
+class BrokerCollector:
+    """
+    Samples the broker at scrape time: connectivity, channel pool, publish
+    buffer and, through passive queue declares, the depth and consumer
+    count of ``queues`` plus every queue consumed by this process.
+
+    Samples are reused for ``sample_interval`` seconds so frequent scrapes
+    (or several scrapers) do not turn into a stream of declares.
+    """
+
+    def __init__(self, broker=None, queues: Iterable[str] = (), sample_interval: float = 10):
+        if broker is None:
+            from shared.message_broker.rabbitmq import rabbitmq_broker
+            broker = rabbitmq_broker
+        self.broker = broker
+        self.queues = tuple(queues)
+        self.sample_interval = sample_interval
+
+        self._sampled_at: Optional[float] = None
+        self._up = False
+        self._depths: Dict[str, Tuple[int, int]] = {}
+        self._lock = Lock()
+
+    def _watched_queues(self) -> List[str]:
+        return list(dict.fromkeys([*self.queues, *self.broker.consumed_queues()]))
+
+    def _sample(self) -> None:
+        now = monotonic()
+        if self._sampled_at is not None and now - self._sampled_at < self.sample_interval:
+            return
+        self._sampled_at = now
+        self._up = self.broker.health_check()
+        if not self._up:
+            self._depths = {}
+            return
+
+        depths = {}
+        for queue in self._watched_queues():
+            try:
+                depths[queue] = self.broker.queue_depth(queue)
+            except Exception as e:
+                # A missing queue closes the channel, the pool replaces it
+                logger.warning(f"Could not sample queue {queue}: {e!r}")
+        self._depths = depths
+
+    def __call__(self) -> List[Metric]:
+        with self._lock:
+            self._sample()
+            up, depths = self._up, dict(self._depths)
+
+        connected = Gauge('broker_up', 'Whether RabbitMQ answered the last health check')
+        connected.set(1 if up else 0)
+
+        messages = Gauge('broker_queue_messages', 'Messages ready in the queue', ('queue',))
+        consumers = Gauge('broker_queue_consumers', 'Consumers attached to the queue', ('queue',))
+        for queue, (message_count, consumer_count) in depths.items():
+            messages.set(message_count, queue=queue)
+            consumers.set(consumer_count, queue=queue)
+
+        pool = Gauge('broker_channel_pool', 'Publishing channel pool usage', ('state',))
+        for state, value in self.broker.pool_stats().items():
+            pool.set(value, state=state)
+
+        buffered = Gauge('broker_publish_buffer', 'Events waiting for the connection to come back', ('state',))
+        for state, value in self.broker.publish_buffer_stats().items():
+            buffered.set(value, state=state)
+
+        return [connected, messages, consumers, pool, buffered]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, addr: str = '') -> ThreadingHTTPServer:
+    """
+    Serve the registry on a daemon thread, for processes without a web
+    server of their own (consumers, the outbox relay).
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Serving metrics on port {port}")
+    return server
+
+
+def start_worker_http_server(base_port: int, max_workers: int = 16, addr: str = '') -> Optional[ThreadingHTTPServer]:
+    """
+    start_http_server() for one of several web workers sharing a base port:
+    each takes the first free port of ``base_port .. base_port + max_workers - 1``,
+    so every worker is scraped on its own port instead of a random one
+    answering a shared route.
+    """
+    for port in range(base_port, base_port + max_workers):
+        try:
+            return start_http_server(port, addr)
+        except OSError:
+            continue
+    logger.error(f"No free metrics port in {base_port}-{base_port + max_workers - 1}")
+    return None
@@ -0,0 +1,248 @@
+# shared/message_broker/publish_buffer.py
+import base64
+import glob
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+import pika
+
+logger = logging.getLogger(__name__)
+
+# Properties kept when a message is written to disk
+_SPILLED_PROPERTIES = ('content_type', 'correlation_id', 'message_id', 'type', 'delivery_mode', 'headers')
+
+
+class Backoff:
+    """Exponential backoff with full jitter: uniform(0, min(max_delay, initial * multiplier ** n))"""
+
+    def __init__(self, initial: float = 0.5, multiplier: float = 2.0, max_delay: float = 30.0):
+        self.initial = initial
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.max_delay, self.initial * self.multiplier ** self.attempts)
+        self.attempts += 1
+        return random.uniform(0, delay)
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+@dataclass
+class BufferedMessage:
+    """An encoded message waiting for the connection to come back"""
+    exchange: str
+    routing_key: str
+    body: bytes
+    properties: pika.BasicProperties
+    spill_id: Optional[int] = None
+
+
+def process_spill_path(path: str, pid: Optional[int] = None) -> str:
+    """``path`` with the host and pid inserted: /data/spill.db -> /data/spill.<host>.<pid>.db"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{socket.gethostname()}.{pid or os.getpid()}{ext}'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _SpillFile:
+    """SQLite-backed FIFO for messages that do not fit in memory"""
+
+    def __init__(self, path: str, timeout: float = 5):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, exchange TEXT, routing_key TEXT, '
+            'body TEXT, properties TEXT)'
+        )
+
+    def push(self, message: BufferedMessage) -> None:
+        properties = {
+            name: getattr(message.properties, name)
+            for name in _SPILLED_PROPERTIES
+            if getattr(message.properties, name) is not None
+        }
+        self._db.execute(
+            'INSERT INTO messages (exchange, routing_key, body, properties) VALUES (?, ?, ?, ?)',
+            (message.exchange, message.routing_key,
+             base64.b64encode(message.body).decode(), json.dumps(properties, default=str))
+        )
+
+    def peek(self, limit: int) -> List[BufferedMessage]:
+        rows = self._db.execute(
+            'SELECT id, exchange, routing_key, body, properties FROM messages ORDER BY id LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [
+            BufferedMessage(
+                exchange=exchange,
+                routing_key=routing_key,
+                body=base64.b64decode(body),
+                properties=pika.BasicProperties(**json.loads(properties)),
+                spill_id=row_id
+            )
+            for row_id, exchange, routing_key, body, properties in rows
+        ]
+
+    def delete_through(self, spill_id: int) -> None:
+        self._db.execute('DELETE FROM messages WHERE id <= ?', (spill_id,))
+
+    def count(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def adopt(self, path: str) -> int:
+        """
+        Move the rows of another process' spill file into this one and
+        delete it. The write lock taken on it makes concurrent adopters wait,
+        the later ones find it empty.
+        """
+        orphan = _SpillFile(path)
+        try:
+            orphan._db.execute('BEGIN IMMEDIATE')
+            rows = orphan._db.execute(
+                'SELECT exchange, routing_key, body, properties FROM messages ORDER BY id'
+            ).fetchall()
+            self._db.executemany(
+                'INSERT INTO messages (exchange, routing_key, body, properties) VALUES (?, ?, ?, ?)', rows
+            )
+            orphan._db.execute('DELETE FROM messages')
+            orphan._db.execute('COMMIT')
+        finally:
+            orphan.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+        return len(rows)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class PublishBuffer:
+    """
+    Bounded FIFO of messages published while RabbitMQ was unreachable.
+
+    Up to ``max_size`` messages are kept in memory. Beyond that they are
+    spilled to a SQLite file next to ``spill_path`` (so they also survive a
+    restart) or, without one, the oldest buffered message is dropped. Once
+    anything sits on disk new messages go there too, so draining stays in
+    order.
+
+    Every process spills to its own file (host and pid appended to the
+    name, see process_spill_path), opened on first use so a forked worker
+    does not share its parent's. Files left by dead processes of the same
+    host are adopted and drained by the next process opening its own.
+    """
+
+    def __init__(self, max_size: int = 10000, spill_path: Optional[str] = None):
+        self.max_size = max_size
+        self.spill_path = spill_path
+        self._memory: "deque[BufferedMessage]" = deque()
+        self._spill: Optional[_SpillFile] = None
+        self._spill_pid: Optional[int] = None
+        self._spilled = 0
+        self._lock = Lock()
+        self.dropped = 0
+
+    def _get_spill(self) -> Optional[_SpillFile]:
+        """This process' spill file; caller must hold _lock"""
+        if self.spill_path is None:
+            return None
+        if self._spill_pid != os.getpid():
+            self._spill = _SpillFile(process_spill_path(self.spill_path))
+            self._spill_pid = os.getpid()
+            self._adopt_orphans()
+            self._spilled = self._spill.count()
+        return self._spill
+
+    def _adopt_orphans(self) -> None:
+        root, ext = os.path.splitext(self.spill_path)
+        prefix = f'{root}.{socket.gethostname()}.'
+        for path in glob.glob(glob.escape(prefix) + '*' + glob.escape(ext)):
+            pid = path[len(prefix):len(path) - len(ext)]
+            if not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                continue
+            try:
+                adopted = self._spill.adopt(path)
+                if adopted:
+                    logger.warning(f"Adopted {adopted} buffered messages of dead process {pid} from {path}")
+            except Exception as e:
+                logger.error(f"Could not adopt spill file {path}: {e!r}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._get_spill()
+            return len(self._memory) + self._spilled
+
+    def append(self, message: BufferedMessage) -> None:
+        with self._lock:
+            spill = self._get_spill()
+            if spill is not None and (self._spilled or len(self._memory) >= self.max_size):
+                spill.push(message)
+                self._spilled += 1
+                return
+            if len(self._memory) >= self.max_size:
+                self._memory.popleft()
+                self.dropped += 1
+                logger.error(f"Publish buffer full, dropped oldest message ({self.dropped} so far)")
+            self._memory.append(message)
+
+    def peek(self, limit: int) -> List[BufferedMessage]:
+        """Oldest messages first, without removing them"""
+        with self._lock:
+            messages = [self._memory[i] for i in range(min(limit, len(self._memory)))]
+            if len(messages) < limit and self._spilled:
+                wanted = limit - len(messages)
+                spilled = self._get_spill().peek(wanted)
+                if len(spilled) < wanted:
+                    # Everything left on disk was read, keep the counter honest
+                    self._spilled = len(spilled)
+                messages.extend(spilled)
+            return messages
+
+    def remove(self, messages: List[BufferedMessage]) -> None:
+        """Drop messages previously returned by peek() once they are published"""
+        with self._lock:
+            last_spill_id = None
+            for message in messages:
+                if message.spill_id is None:
+                    # It may already have been dropped to make room
+                    if self._memory and self._memory[0] is message:
+                        self._memory.popleft()
+                else:
+                    last_spill_id = message.spill_id
+                    self._spilled -= 1
+            if last_spill_id is not None:
+                self._get_spill().delete_through(last_spill_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._get_spill()
+            return {
+                'memory': len(self._memory),
+                'spilled': self._spilled,
+                'dropped': self.dropped,
+            }
@@ -1,14 +1,74 @@
 # shared/message_broker/rabbitmq_broker.py
+import os
 import pika
-import json
 import logging
-import uuid
-from typing import Callable, Dict, Any, Optional
-from threading import Lock
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from time import monotonic, sleep
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+from threading import Event, Lock, Thread
 from shared.utils.singleton import SingletonMeta
+from shared.message_broker.channel_pool import ChannelPool, ChannelPoolTimeout, PooledChannel
+from shared.message_broker.confirms import PublishNotConfirmed
+from shared.message_broker.codec import DEFAULT_CONTENT_TYPE, DecodeError, get_codec
+from shared.message_broker.idempotency import DUPLICATE, IN_PROGRESS, IdempotencyStore
+from shared.message_broker.metrics import (
+    ACKS, DEAD_LETTERS, HANDLER_LATENCY, NACKS, PUBLISH_LATENCY, PUBLISHED, REDELIVERIES, RETRIES
+)
+from shared.message_broker.retry import (
+    ATTEMPT_HEADER, DEFAULT_RETRY_POLICY, ERROR_HEADER, ORIGINAL_QUEUE_HEADER, REASON_HEADER, RetryPolicy,
+    delay_queue_arguments, delay_queue_name, get_attempt, with_headers
+)
+from shared.message_broker.publish_buffer import Backoff, BufferedMessage, PublishBuffer
+from shared.message_broker.envelope import (
+    PublishResult, BatchPublishResult, build_event, build_properties
+)
 
 logger = logging.getLogger(__name__)
 
+# Errors meaning RabbitMQ is unreachable rather than the request being wrong
+CONNECTION_ERRORS = (
+    pika.exceptions.AMQPConnectionError,
+    pika.exceptions.ConnectionWrongStateError,
+    pika.exceptions.ChannelWrongStateError,
+    ChannelPoolTimeout,
+    OSError,
+)
+
+
+@dataclass
+class Subscription:
+    """Handler of one event type on a queue"""
+    event_type: str
+    callback: Callable[[Dict[str, Any]], None]
+    idempotency: Optional[IdempotencyStore] = None
+    retry_policy: Optional[RetryPolicy] = None
+
+
+@dataclass
+class QueueConsumer:
+    """The single consumer of a queue and its handlers keyed by event type"""
+    queue: str
+    executor: ThreadPoolExecutor
+    auto_ack: bool
+    prefetch_count: int
+    handlers: Dict[str, Subscription] = field(default_factory=dict)
+    # Runs the callbacks when the queue was subscribed with processes
+    processes: int = 0
+    process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_handler_process() -> None:
+    """Spawned callback processes run Django code (the ORM) of the consumer"""
+    import django
+    from django.apps import apps
+    if not apps.ready and os.environ.get('DJANGO_SETTINGS_MODULE'):
+        django.setup()
+
+
 class RabbitMQBroker(metaclass=SingletonMeta):
     """Singleton RabbitMQ broker for event-driven communication"""
     
@@ -17,7 +77,15 @@ class RabbitMQBroker(metaclass=SingletonMeta):
                  port: int = 5672,
                  username: str = 'guest',
                  password: str = 'guest',
-                 virtual_host: str = '/'):
+                 virtual_host: str = '/',
+                 confirm_delivery: bool = False,
+                 pool_max_size: int = 10,
+                 pool_acquire_timeout: float = 5,
+                 content_type: str = DEFAULT_CONTENT_TYPE,
+                 connect_timeout: float = 30,
+                 reconnect_max_delay: float = 30,
+                 publish_buffer_size: int = 10000,
+                 publish_spill_path: Optional[str] = None):
         
         self.connection_params = pika.ConnectionParameters(
             host=host,
@@ -28,13 +96,42 @@ class RabbitMQBroker(metaclass=SingletonMeta):
             blocked_connection_timeout=300
         )
         
+        # Publishing and declarations go through the pool; the consuming
+        # connection below belongs to the thread running start_consuming()
+        self._pool = ChannelPool(
+            self.connection_params,
+            max_size=pool_max_size,
+            acquire_timeout=pool_acquire_timeout
+        )
         self._connection: Optional[pika.BlockingConnection] = None
-        self._channel: Optional[pika.adapters.blocking_connection.BlockingChannel] = None
         self._consuming_channel: Optional[pika.adapters.blocking_connection.BlockingChannel] = None
+        self._consumer_executors: Dict[str, ThreadPoolExecutor] = {}
+        self._queue_consumers: Dict[str, QueueConsumer] = {}
         self._lock = Lock()
         self._is_connected = False
-        
-        self._connect()
+
+        # Publisher confirms for publish_event and publish_batch (overridable per batch)
+        self.confirm_delivery = confirm_delivery
+        # Codec used for publishing; consumers decode by each message's content_type
+        self.content_type = get_codec(content_type).content_type
+
+        # Declarations run once before the first publish/subscribe, see add_setup_hook
+        self._setup_hooks: List[Callable[[], None]] = []
+        self._setup_done = False
+        self._setup_lock = Lock()
+        self._warmup_thread: Optional[Thread] = None
+        # Nothing connects here: importing the module never waits for RabbitMQ
+
+        # Reconnects back off exponentially with jitter up to reconnect_max_delay;
+        # callers give up after connect_timeout, consumers never do
+        self.connect_timeout = connect_timeout
+        self.reconnect_max_delay = reconnect_max_delay
+        self._consume_stopped = Event()
+
+        # Events published during an outage wait here and drain in order
+        self._publish_buffer = PublishBuffer(publish_buffer_size, publish_spill_path) if publish_buffer_size else None
+        self._drain_thread: Optional[Thread] = None
+        self._drain_lock = Lock()
     
     def _connect(self) -> None:
         """Establish connection to RabbitMQ with retry logic"""
@@ -44,12 +141,8 @@ class RabbitMQBroker(metaclass=SingletonMeta):
                     return
                 
                 self._connection = pika.BlockingConnection(self.connection_params)
-                self._channel = self._connection.channel()
                 self._consuming_channel = self._connection.channel()
-                
-                # Configure quality of service
-                self._channel.basic_qos(prefetch_count=1)
-                self._consuming_channel.basic_qos(prefetch_count=1)
+                self._pool.reopen()
                 
                 self._is_connected = True
                 logger.info("Successfully connected to RabbitMQ")
@@ -59,135 +152,670 @@ class RabbitMQBroker(metaclass=SingletonMeta):
             self._is_connected = False
             raise
     
-    def _ensure_connection(self) -> None:
-        """Ensure connection is alive, reconnect if necessary"""
-        if not self._is_connected or self._connection.is_closed:
-            logger.warning("RabbitMQ connection lost, reconnecting...")
-            self._connect()
+    def add_setup_hook(self, hook: Callable[[], None]) -> None:
+        """
+        Register declarations (exchanges, queues, bindings) to run before the
+        broker is first used, or in the background by connect_in_background().
+        """
+        with self._setup_lock:
+            self._setup_hooks.append(hook)
+            if not self._setup_done:
+                return
+        hook()
+
+    def ensure_setup(self) -> None:
+        """Run the setup hooks once; raises if RabbitMQ is unreachable"""
+        if self._setup_done:
+            return
+        with self._setup_lock:
+            if self._setup_done:
+                return
+            # close_connection() closes the pool; publishing after it reconnects
+            self._pool.reopen()
+            for hook in self._setup_hooks:
+                hook()
+            self._setup_done = True
+
+    def connect_in_background(self, retry_interval: float = 5) -> Thread:
+        """
+        Open a publishing connection and run the setup hooks on a daemon
+        thread, retrying until RabbitMQ answers. Startup does not wait for it;
+        callers that come first simply connect themselves.
+        """
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            return self._warmup_thread
+
+        def warmup():
+            while not self._setup_done:
+                try:
+                    self.ensure_setup()
+                    with self._pool.acquire():
+                        pass
+                    logger.info("RabbitMQ connected and set up in the background")
+                except Exception as e:
+                    logger.warning(f"RabbitMQ not ready ({e}), retrying in {retry_interval}s")
+                    sleep(retry_interval)
+
+        self._warmup_thread = Thread(target=warmup, name='rabbitmq-warmup', daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def _ensure_connection(self, forever: bool = False) -> None:
+        """
+        Ensure connection is alive, reconnecting with jittered exponential
+        backoff. Gives up after connect_timeout, or with ``forever`` only
+        when stop_consuming() is called.
+        """
+        if self._is_connected and self._connection and not self._connection.is_closed:
+            return
+
+        logger.warning("RabbitMQ connection lost, reconnecting...")
+        backoff = Backoff(max_delay=self.reconnect_max_delay)
+        deadline = monotonic() + self.connect_timeout
+        while True:
+            try:
+                self._connect()
+                return
+            except CONNECTION_ERRORS:
+                delay = backoff.next_delay()
+                if forever:
+                    if self._consume_stopped.wait(delay):
+                        raise
+                elif monotonic() + delay > deadline:
+                    raise
+                else:
+                    sleep(delay)
     
     def declare_exchange(self, exchange_name: str, exchange_type: str = 'topic', durable: bool = True) -> None:
         """Declare an exchange"""
-        self._ensure_connection()
-        self._channel.exchange_declare(
-            exchange=exchange_name,
-            exchange_type=exchange_type,
-            durable=durable
-        )
+        with self._pool.acquire() as pooled:
+            pooled.channel.exchange_declare(
+                exchange=exchange_name,
+                exchange_type=exchange_type,
+                durable=durable
+            )
     
     def declare_queue(self, queue_name: str, durable: bool = True, **kwargs) -> None:
         """Declare a queue"""
-        self._ensure_connection()
-        self._channel.queue_declare(
-            queue=queue_name,
-            durable=durable,
-            **kwargs
-        )
+        with self._pool.acquire() as pooled:
+            pooled.channel.queue_declare(
+                queue=queue_name,
+                durable=durable,
+                **kwargs
+            )
     
     def bind_queue(self, exchange: str, queue: str, routing_key: str) -> None:
         """Bind queue to exchange with routing key"""
-        self._ensure_connection()
-        self._channel.queue_bind(
-            exchange=exchange,
-            queue=queue,
-            routing_key=routing_key
-        )
+        with self._pool.acquire() as pooled:
+            pooled.channel.queue_bind(
+                exchange=exchange,
+                queue=queue,
+                routing_key=routing_key
+            )
     
     def publish_event(self, 
                      exchange: str, 
                      routing_key: str, 
                      event_type: str,
                      data: Dict[str, Any],
-                      correlation_id: Optional[str] = None) -> None:
+                      correlation_id: Optional[str] = None,
+                      event_id: Optional[str] = None,
+                      content_type: Optional[str] = None) -> None:
         """
-        Publish an event to RabbitMQ
+        Publish an event to RabbitMQ; with confirm_delivery this returns once
+        the broker acked it and raises PublishNotConfirmed otherwise
         """
-        self._ensure_connection()
-        
-        event = {
-            'event_id': str(uuid.uuid4()),
-            'event_type': event_type,
-            'timestamp': self._get_current_timestamp(),
-            'correlation_id': correlation_id or str(uuid.uuid4()),
-            'data': data
-        }
+        event = self._build_event(event_type, data, correlation_id, event_id)
+        body, properties = self._encode(event, content_type)
+
+        if self._publish_buffer is not None and len(self._publish_buffer):
+            # Stay behind the events still waiting for the connection
+            self._buffer(BufferedMessage(exchange, routing_key, body, properties))
+            PUBLISHED.inc(exchange=exchange, outcome='buffered')
+            logger.info(f"Buffered event {event_type} for {routing_key}")
+            return
         
         try:
-            self._channel.basic_publish(
-                exchange=exchange,
-                routing_key=routing_key,
-                body=json.dumps(event, default=str),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Persistent message
-                    content_type='application/json',
-                    correlation_id=event['correlation_id']
-                )
+            self.ensure_setup()
+            result = PublishResult(
+                index=0,
+                event_id=event['event_id'],
+                event_type=event_type,
+                routing_key=routing_key
             )
+            with PUBLISH_LATENCY.time(exchange=exchange, mode='single'):
+                with self._pool.acquire() as pooled:
+                    if self.confirm_delivery:
+                        pooled.confirms.publish(exchange, [(routing_key, body, properties)], [result])
+                    else:
+                        pooled.channel.basic_publish(
+                            exchange=exchange,
+                            routing_key=routing_key,
+                            body=body,
+                            properties=properties
+                        )
+                        result.success = True
+            if not result.success:
+                raise PublishNotConfirmed(f"Event {result.event_id} not confirmed: {result.error}")
+            PUBLISHED.inc(exchange=exchange, outcome='published')
             logger.info(f"Published event {event_type} to {routing_key}")
+
+        except CONNECTION_ERRORS as e:
+            if self._publish_buffer is None:
+                PUBLISHED.inc(exchange=exchange, outcome='failed')
+                logger.error(f"Failed to publish event {event_type}: {e}")
+                raise
+            logger.warning(f"RabbitMQ unavailable, buffering event {event_type}: {e!r}")
+            self._buffer(BufferedMessage(exchange, routing_key, body, properties))
+            PUBLISHED.inc(exchange=exchange, outcome='buffered')
             
         except Exception as e:
+            # The broken pooled channel is discarded on checkin
+            PUBLISHED.inc(exchange=exchange, outcome='failed')
             logger.error(f"Failed to publish event {event_type}: {e}")
-            self._reconnect()
             raise
-    
+
+    def _buffer(self, message: BufferedMessage) -> None:
+        self._publish_buffer.append(message)
+        with self._drain_lock:
+            if self._drain_thread is None:
+                self._drain_thread = Thread(target=self._drain_buffer, name='rabbitmq-drain', daemon=True)
+                self._drain_thread.start()
+
+    def _drain_buffer(self) -> None:
+        """Supervisor thread: republish buffered events once RabbitMQ is back"""
+        backoff = Backoff(max_delay=self.reconnect_max_delay)
+        while True:
+            with self._drain_lock:
+                if not len(self._publish_buffer):
+                    self._drain_thread = None
+                    return
+            try:
+                self.ensure_setup()
+                if self._drain_once():
+                    backoff.reset()
+                else:
+                    # Nothing to publish though the buffer is not empty, don't spin
+                    sleep(backoff.next_delay())
+            except Exception as e:
+                delay = backoff.next_delay()
+                logger.warning(
+                    f"Draining {len(self._publish_buffer)} buffered events failed ({e!r}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                sleep(delay)
+
+    def _drain_once(self, batch_size: int = 100, timeout: float = 30) -> int:
+        """Publish the oldest buffered events with confirms, stopping at the first failure"""
+        messages = self._publish_buffer.peek(batch_size)
+        if not messages:
+            return 0
+        published: List[BufferedMessage] = []
+        try:
+            with self._pool.acquire() as pooled:
+                start = 0
+                while start < len(messages):
+                    # Consecutive messages for the same exchange share one confirm round
+                    exchange = messages[start].exchange
+                    end = start
+                    while end < len(messages) and messages[end].exchange == exchange:
+                        end += 1
+                    run = messages[start:end]
+                    results = [
+                        PublishResult(
+                            index=index,
+                            event_id=message.properties.message_id or '',
+                            event_type=message.properties.type or '',
+                            routing_key=message.routing_key
+                        )
+                        for index, message in enumerate(run)
+                    ]
+                    pooled.confirms.publish(
+                        exchange,
+                        [(message.routing_key, message.body, message.properties) for message in run],
+                        results, timeout=timeout
+                    )
+                    for message, result in zip(run, results):
+                        if not result.success:
+                            raise RuntimeError(f"Buffered event {result.event_id} not confirmed: {result.error}")
+                        published.append(message)
+                        PUBLISHED.inc(exchange=exchange, outcome='drained')
+                    start = end
+        finally:
+            self._publish_buffer.remove(published)
+            if published:
+                logger.info(f"Drained {len(published)} buffered events")
+        return len(published)
+
+    def publish_buffer_stats(self) -> Dict[str, Any]:
+        """Events waiting for the connection to come back"""
+        return self._publish_buffer.stats() if self._publish_buffer is not None else {}
+
+    def publish_batch(self,
+                      exchange: str,
+                      events: Iterable[Dict[str, Any]],
+                      confirm: Optional[bool] = None,
+                      mandatory: bool = False,
+                      timeout: float = 30,
+                      content_type: Optional[str] = None) -> BatchPublishResult:
+        """
+        Publish many events at once.
+
+        Each item is a dict with ``routing_key``, ``event_type`` and ``data``
+        (``correlation_id`` and ``event_id`` are optional). In confirm mode all
+        messages are written before waiting and broker acks/nacks are collected
+        in bulk, so the batch costs roughly one round trip. With ``mandatory``
+        unroutable messages are reported as failures too.
+        """
+        self.ensure_setup()
+        confirm = self.confirm_delivery if confirm is None else confirm
+
+        messages = []
+        results = []
+        for index, item in enumerate(events):
+            event = self._build_event(
+                item['event_type'],
+                item.get('data', {}),
+                item.get('correlation_id'),
+                item.get('event_id')
+            )
+            messages.append((item['routing_key'], *self._encode(event, content_type)))
+            results.append(PublishResult(
+                index=index,
+                event_id=event['event_id'],
+                event_type=event['event_type'],
+                routing_key=item['routing_key']
+            ))
+
+        try:
+            with PUBLISH_LATENCY.time(exchange=exchange, mode='batch'):
+                with self._pool.acquire() as pooled:
+                    if confirm:
+                        pooled.confirms.publish(exchange, messages, results, mandatory, timeout)
+                    else:
+                        self._publish_unconfirmed(pooled, exchange, messages, results)
+        except Exception as e:
+            logger.error(f"Batch publish to {exchange} failed: {e}")
+            for result in results:
+                if not result.success:
+                    result.error = result.error or str(e)
+
+        batch = BatchPublishResult(confirmed=confirm, results=results)
+        if batch.published:
+            PUBLISHED.inc(len(batch.published), exchange=exchange, outcome='published')
+        if batch.failed:
+            PUBLISHED.inc(len(batch.failed), exchange=exchange, outcome='failed')
+        logger.info(
+            f"Published batch of {len(results)} events to {exchange} "
+            f"({len(batch.failed)} failed, confirmed={confirm})"
+        )
+        return batch
+
+    def _publish_unconfirmed(self,
+                             pooled: PooledChannel,
+                             exchange: str,
+                             messages: list,
+                             results: List[PublishResult]) -> None:
+        """Write all messages back to back without waiting for the broker"""
+        for (routing_key, body, properties), result in zip(messages, results):
+            pooled.channel.basic_publish(
+                exchange=exchange,
+                routing_key=routing_key,
+                body=body,
+                properties=properties
+            )
+            result.success = True
+
     def subscribe_event(self, 
                        queue: str, 
                        event_type: str, 
                        callback: Callable[[Dict[str, Any]], None],
-                       auto_ack: bool = False) -> None:
+                       auto_ack: bool = False,
+                       prefetch_count: Optional[int] = None,
+                       concurrency: int = 1,
+                       ordered: bool = True,
+                       idempotency: Optional[IdempotencyStore] = None,
+                       retry_policy: Optional[RetryPolicy] = None,
+                       processes: int = 0) -> None:
         """
-        Subscribe to events on a specific queue
+        Subscribe to events on a specific queue.
+
+        Every queue has a single consumer dispatching deliveries to the
+        handler registered for their AMQP ``type`` property, so messages are
+        never decoded just to be discarded; subscribing another event type on
+        the same queue only adds a handler. ``auto_ack``, ``prefetch_count``,
+        ``concurrency``, ``ordered`` and ``processes`` are taken from the first
+        subscription.
+
+        Callbacks run on a per-queue worker pool, so a slow subscriber no longer
+        stalls the other queues. ``ordered`` queues get a single worker and are
+        processed one delivery at a time in order; unordered queues run up to
+        ``concurrency`` callbacks at once. Acks and nacks are always sent from
+        the connection thread. ``prefetch_count`` defaults to the worker count.
+
+        CPU-bound callbacks can run on a per-queue pool of ``processes``
+        spawned processes instead (Django is set up in each). The worker
+        threads still dispatch, ack and track idempotency, each waiting for
+        its callback, so give unordered queues ``concurrency >= processes``.
+        The callback and the decoded message must be picklable: use a
+        module-level function, not a closure.
+
+        With an ``idempotency`` store, deliveries whose message_id was already
+        handled on this queue are acked before being decoded.
+
+        Without a ``retry_policy`` failed deliveries are requeued immediately.
+        With one they are parked in a delay queue and come back after the
+        policy's backoff; exhausted and undecodable messages are moved to the
+        policy's dead letter exchange.
         """
+        self.ensure_setup()
         self._ensure_connection()
-        
+        if retry_policy is not None:
+            self.declare_retry_queues(queue, retry_policy)
+        elif idempotency is not None:
+            # Deliveries claimed by another consumer wait in a delay queue
+            self.declare_retry_queues(queue, DEFAULT_RETRY_POLICY)
+
+        subscription = Subscription(event_type, callback, idempotency, retry_policy)
+        consumer = self._queue_consumers.get(queue)
+        if consumer is not None:
+            consumer.handlers[event_type] = subscription
+            logger.info(f"Added {event_type} handler to the consumer of {queue}")
+            return
+
+        workers = 1 if ordered else max(concurrency, 1)
+        consumer = QueueConsumer(
+            queue=queue,
+            executor=self._get_consumer_executor(queue, workers),
+            auto_ack=auto_ack,
+            prefetch_count=prefetch_count or workers,
+            handlers={event_type: subscription},
+            processes=processes
+        )
+        self._queue_consumers[queue] = consumer
+        self._start_consumer(consumer)
+
+    def _start_consumer(self, consumer: QueueConsumer) -> None:
+        """basic_consume on the consuming channel, also used after a reconnect"""
         def message_callback(ch, method, properties, body):
-            try:
-                message = json.loads(body.decode())
-                
-                if message.get('event_type') == event_type:
-                    logger.info(f"Processing event {event_type} from queue {queue}")
-                    callback(message)
-                
-                if not auto_ack:
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
-                    
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to decode message: {e}")
-                if not auto_ack:
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                if not auto_ack:
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            if method.redelivered:
+                REDELIVERIES.inc(queue=consumer.queue)
+            consumer.executor.submit(self._process_message, consumer, ch, method.delivery_tag, properties, body)
         
+        # Per-consumer prefetch: applies to consumers started after this call
+        self._consuming_channel.basic_qos(prefetch_count=consumer.prefetch_count)
         self._consuming_channel.basic_consume(
-            queue=queue,
+            queue=consumer.queue,
             on_message_callback=message_callback,
-            auto_ack=auto_ack
+            auto_ack=consumer.auto_ack
+        )
+
+    def _process_message(self, consumer: 'QueueConsumer', channel, delivery_tag: int, properties, body: bytes) -> None:
+        """Dispatch one delivery to its handler; runs on a worker thread"""
+        queue = consumer.queue
+        ack, requeue = True, False
+        subscription = consumer.handlers.get(properties.type)
+
+        if properties.type and subscription is None:
+            # Bound here for a type nobody handles (anymore): drop undecoded
+            logger.debug(f"No handler for {properties.type} on queue {queue}")
+        else:
+            handle, event_id = True, None
+            idempotency = subscription.idempotency if subscription else None
+            if idempotency is not None and properties.message_id:
+                state = idempotency.claim(queue, properties.message_id)
+                if state == DUPLICATE:
+                    logger.info(f"Skipping already handled event {properties.message_id} on queue {queue}")
+                    handle = False
+                elif state == IN_PROGRESS:
+                    # Another consumer holds the claim: come back after the shortest
+                    # backoff instead of bouncing off the queue head
+                    handle, requeue = False, True
+                    ack = self._defer(queue, properties, body, subscription.retry_policy or DEFAULT_RETRY_POLICY)
+                else:
+                    event_id = properties.message_id
+
+            if handle:
+                try:
+                    message = get_codec(properties.content_type).decode(body)
+                    if subscription is None:
+                        # Publisher without the type property: dispatch on the body
+                        subscription = consumer.handlers.get(message.get('event_type'))
+
+                    if subscription is not None:
+                        logger.info(f"Processing event {subscription.event_type} from queue {queue}")
+                        self._run_handler(consumer, subscription, message)
+
+                except DecodeError as e:
+                    logger.error(f"Failed to decode message: {e}")
+                    ack, requeue = False, False
+                    policy = self._retry_policy_for(consumer, subscription)
+                    if policy is not None:
+                        ack = self._dead_letter(queue, properties, body, policy, f'undecodable: {e}')
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}")
+                    ack, requeue = False, True
+                    policy = self._retry_policy_for(consumer, subscription)
+                    if policy is not None:
+                        # Parked or dead-lettered copy replaces this delivery
+                        ack = self._retry_later(queue, properties, body, policy, str(e))
+                else:
+                    if event_id is not None:
+                        idempotency.complete(queue, event_id)
+                    event_id = None
+
+                if event_id is not None:
+                    idempotency.release(queue, event_id)
+
+        if not consumer.auto_ack:
+            try:
+                self._connection.add_callback_threadsafe(
+                    partial(self._settle, channel, delivery_tag, ack, requeue)
+                )
+            except CONNECTION_ERRORS as e:
+                logger.warning(f"Could not settle delivery {delivery_tag}, it will be redelivered: {e!r}")
+            else:
+                if ack:
+                    ACKS.inc(queue=queue)
+                else:
+                    NACKS.inc(queue=queue, requeue=str(requeue).lower())
+
+    def _run_handler(self, consumer: 'QueueConsumer', subscription: 'Subscription', message: Dict[str, Any]) -> None:
+        """Call the handler, in the queue's process pool if it has one, recording its latency"""
+        start = monotonic()
+        status = 'error'
+        try:
+            if consumer.processes:
+                self._run_in_process(consumer, subscription, message)
+            else:
+                subscription.callback(message)
+            status = 'ok'
+        finally:
+            HANDLER_LATENCY.observe(
+                monotonic() - start, queue=consumer.queue, event_type=subscription.event_type, status=status
+            )
+
+    def _run_in_process(self, consumer: 'QueueConsumer', subscription: 'Subscription', message: Dict[str, Any]) -> None:
+        with self._lock:
+            if consumer.process_pool is None:
+                # Spawned, a fork would copy the connection thread's sockets
+                consumer.process_pool = ProcessPoolExecutor(
+                    max_workers=consumer.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_handler_process
+                )
+            pool = consumer.process_pool
+        try:
+            pool.submit(subscription.callback, message).result()
+        except BrokenProcessPool:
+            # A child died (e.g. OOM killed): the next delivery gets a fresh pool
+            logger.error(f"Callback process pool of {consumer.queue} broken, restarting it")
+            with self._lock:
+                if consumer.process_pool is pool:
+                    consumer.process_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    @staticmethod
+    def _retry_policy_for(consumer: 'QueueConsumer', subscription: Optional['Subscription']) -> Optional[RetryPolicy]:
+        """Policy of the handler, or of any handler of the queue when none matched"""
+        if subscription is not None:
+            return subscription.retry_policy
+        return next(
+            (s.retry_policy for s in consumer.handlers.values() if s.retry_policy is not None),
+            None
+        )
+
+    def declare_retry_queues(self, queue: str, policy: RetryPolicy) -> None:
+        """Declare the delay queues feeding failed deliveries back into ``queue``"""
+        for delay_ms in policy.delay_levels():
+            self.declare_queue(
+                delay_queue_name(queue, delay_ms),
+                durable=True,
+                arguments=delay_queue_arguments(queue, delay_ms)
+            )
+
+    def _retry_later(self, queue: str, properties, body: bytes, policy: RetryPolicy, error: str) -> bool:
+        """Park a failed delivery in its delay queue, or dead-letter it when exhausted"""
+        attempt = get_attempt(properties.headers)
+        if policy.exhausted(attempt):
+            return self._dead_letter(queue, properties, body, policy, f'max attempts reached: {error}')
+
+        delay_ms = policy.delay_ms(attempt)
+        headers = dict(properties.headers or {})
+        headers[ATTEMPT_HEADER] = attempt + 1
+        headers[ERROR_HEADER] = error[:1024]
+        logger.warning(f"Retrying {properties.message_id} from {queue} in {delay_ms}ms (attempt {attempt})")
+        parked = self.republish('', delay_queue_name(queue, delay_ms), body, with_headers(properties, headers))
+        if parked:
+            RETRIES.inc(queue=queue)
+        return parked
+
+    def _defer(self, queue: str, properties, body: bytes, policy: RetryPolicy) -> bool:
+        """Park a delivery in the shortest delay queue without counting an attempt"""
+        delay_ms = policy.delay_ms(1)
+        logger.info(f"Deferring {properties.message_id} on {queue} by {delay_ms}ms, another consumer is handling it")
+        return self.republish('', delay_queue_name(queue, delay_ms), body, with_headers(properties, properties.headers or {}))
+
+    def _dead_letter(self, queue: str, properties, body: bytes, policy: RetryPolicy, reason: str) -> bool:
+        """Quarantine a delivery on the dead letter exchange"""
+        headers = dict(properties.headers or {})
+        headers[ORIGINAL_QUEUE_HEADER] = queue
+        headers[REASON_HEADER] = reason[:1024]
+        logger.error(f"Dead-lettering {properties.message_id} from {queue}: {reason}")
+        quarantined = self.republish(policy.dead_letter_exchange, queue, body, with_headers(properties, headers))
+        if quarantined:
+            DEAD_LETTERS.inc(queue=queue)
+        return quarantined
+
+    def republish(self,
+                  exchange: str,
+                  routing_key: str,
+                  body: bytes,
+                  properties: pika.BasicProperties,
+                  timeout: float = 10) -> bool:
+        """Publish an already encoded message and wait for the broker to confirm it"""
+        result = PublishResult(
+            index=0,
+            event_id=properties.message_id or '',
+            event_type=properties.type or '',
+            routing_key=routing_key
         )
+        try:
+            with self._pool.acquire() as pooled:
+                pooled.confirms.publish(exchange, [(routing_key, body, properties)], [result], timeout=timeout)
+        except Exception as e:
+            logger.error(f"Failed to republish {properties.message_id} to {exchange or routing_key}: {e}")
+            return False
+        if not result.success:
+            logger.error(f"Republish of {properties.message_id} not confirmed: {result.error}")
+        return result.success
+
+    def _get_consumer_executor(self, queue: str, workers: int) -> ThreadPoolExecutor:
+        """Worker pool running the callbacks of one queue"""
+        executor = self._consumer_executors.get(queue)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix=f'consumer-{queue}'
+            )
+            self._consumer_executors[queue] = executor
+        return executor
+
+    def _settle(self, channel, delivery_tag: int, ack: bool, requeue: bool) -> None:
+        """Ack or nack a delivery; runs on the connection thread"""
+        if not channel.is_open:
+            # Broker redelivers unacked messages of a closed channel
+            logger.warning(f"Channel closed before delivery {delivery_tag} was settled")
+            return
+        if ack:
+            channel.basic_ack(delivery_tag=delivery_tag)
+        else:
+            channel.basic_nack(delivery_tag=delivery_tag, requeue=requeue)
     
     def start_consuming(self) -> None:
-        """Start consuming messages"""
-        self._ensure_connection()
+        """
+        Start consuming messages until stop_consuming() is called.
+
+        A lost connection is re-established with backoff and every consumer
+        is started again; unacked deliveries are redelivered by the broker.
+        """
+        self._consume_stopped.clear()
+        self._ensure_connection(forever=True)
         logger.info("Starting event consumption...")
-        self._consuming_channel.start_consuming()
+        try:
+            while True:
+                try:
+                    self._consuming_channel.start_consuming()
+                    break
+                except pika.exceptions.AMQPConnectionError as e:
+                    if self._consume_stopped.is_set():
+                        break
+                    logger.warning(f"Consuming connection lost ({e!r}), reconnecting...")
+                    self._is_connected = False
+                    try:
+                        self._ensure_connection(forever=True)
+                    except CONNECTION_ERRORS:
+                        break  # stop_consuming() was called while reconnecting
+                    for consumer in self._queue_consumers.values():
+                        self._start_consumer(consumer)
+        finally:
+            self._drain_consumers()
     
     def stop_consuming(self) -> None:
-        """Stop consuming messages"""
+        """Stop consuming messages (safe to call from any thread)"""
+        self._consume_stopped.set()
         if self._consuming_channel and self._consuming_channel.is_open:
-            self._consuming_channel.stop_consuming()
+            try:
+                self._connection.add_callback_threadsafe(self._consuming_channel.stop_consuming)
+            except CONNECTION_ERRORS:
+                pass
+
+    def _drain_consumers(self) -> None:
+        """Wait for in-flight callbacks and send their acks"""
+        executors, self._consumer_executors = self._consumer_executors, {}
+        consumers, self._queue_consumers = self._queue_consumers, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        for consumer in consumers.values():
+            if consumer.process_pool is not None:
+                consumer.process_pool.shutdown(wait=True)
+        if self._connection and self._connection.is_open:
+            # Run the queued _settle callbacks
+            self._connection.process_data_events(time_limit=0)
     
     def close_connection(self) -> None:
         """Close RabbitMQ connection"""
         with self._lock:
             try:
-                if self._channel and self._channel.is_open:
-                    self._channel.close()
+                self._pool.close()
                 if self._consuming_channel and self._consuming_channel.is_open:
                     self._consuming_channel.close()
                 if self._connection and self._connection.is_open:
                     self._connection.close()
                 
                 self._is_connected = False
+                self._setup_done = False
                 logger.info("RabbitMQ connection closed")
                 
             except Exception as e:
@@ -197,16 +825,64 @@ class RabbitMQBroker(metaclass=SingletonMeta):
         """Reconnect to RabbitMQ"""
         self.close_connection()
         self._connect()
+        self.ensure_setup()
     
-    def _get_current_timestamp(self) -> str:
-        """Get current timestamp in ISO format"""
-        from django.utils import timezone
-        return timezone.now().isoformat()
-    
+    def _build_event(self,
+                     event_type: str,
+                     data: Dict[str, Any],
+                     correlation_id: Optional[str] = None,
+                     event_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build the event envelope sent over the wire"""
+        return build_event(event_type, data, correlation_id, event_id)
+
+    def _build_properties(self, event: Dict[str, Any], content_type: str) -> pika.BasicProperties:
+        """AMQP properties for an event envelope"""
+        return pika.BasicProperties(
+            delivery_mode=2,  # Persistent message
+            **build_properties(event, content_type)
+        )
+
+    def _encode(self, event: Dict[str, Any], content_type: Optional[str] = None):
+        """Serialize an envelope, returning (body, properties)"""
+        codec = get_codec(content_type or self.content_type)
+        return codec.encode(event), self._build_properties(event, codec.content_type)
+
+    def channel(self, timeout: Optional[float] = None):
+        """Check out a pooled channel, ``with broker.channel() as pooled: pooled.channel...``"""
+        return self._pool.acquire(timeout)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Channel pool usage"""
+        return self._pool.stats()
+
+    def health_check(self, timeout: float = 2) -> bool:
+        """Whether RabbitMQ answers on a pooled connection"""
+        try:
+            with self._pool.acquire(timeout) as pooled:
+                pooled.connection.process_data_events(time_limit=0)
+            return True
+        except Exception as e:
+            logger.warning(f"RabbitMQ health check failed: {e!r}")
+            return False
+
+    def queue_depth(self, queue: str) -> Tuple[int, int]:
+        """(ready messages, consumers) of an existing queue, via a passive declare"""
+        with self._pool.acquire() as pooled:
+            result = pooled.channel.queue_declare(queue=queue, passive=True)
+        return result.method.message_count, result.method.consumer_count
+
+    def consumed_queues(self) -> List[str]:
+        """Queues this process consumes from"""
+        return list(self._queue_consumers)
+
     def __del__(self):
         """Destructor to ensure proper cleanup"""
         self.close_connection()
 
 
-# Global broker instance
-rabbitmq_broker = RabbitMQBroker()
\ No newline at end of file
+# Global broker instance, connects on first use
+rabbitmq_broker = RabbitMQBroker(
+    # One publishing connection per pooled channel, per process
+    pool_max_size=int(os.environ.get('RABBITMQ_POOL_MAX_SIZE', 4)),
+    publish_spill_path=os.environ.get('RABBITMQ_PUBLISH_SPILL_PATH') or None
+)
\ No newline at end of file
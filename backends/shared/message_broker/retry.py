@@ -0,0 +1,72 @@
+# shared/message_broker/retry.py
+import copy
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+ATTEMPT_HEADER = 'x-attempt'
+ERROR_HEADER = 'x-last-error'
+ORIGINAL_QUEUE_HEADER = 'x-original-queue'
+REASON_HEADER = 'x-dead-letter-reason'
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a subscription retries failed deliveries.
+
+    A failed delivery is parked in a delay queue whose messages expire after
+    the backoff and dead-letter back into the subscription queue. Delays are
+    ``initial_delay * multiplier ** (attempt - 1)`` capped at ``max_delay``;
+    after ``max_attempts`` deliveries the message goes to the dead letter
+    exchange instead.
+    """
+    max_attempts: int = 5
+    initial_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 300.0
+    dead_letter_exchange: str = 'dlx.domain_events'
+
+    def delay_ms(self, attempt: int) -> int:
+        """Backoff after the given (1-based) failed attempt"""
+        delay = min(self.initial_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        return int(delay * 1000)
+
+    def delay_levels(self) -> List[int]:
+        """Distinct delays in ms, one delay queue each"""
+        # The first level is always there, deferred deliveries use it
+        return sorted({self.delay_ms(attempt) for attempt in range(1, max(self.max_attempts, 2))})
+
+    def exhausted(self, attempt: int) -> bool:
+        return attempt >= self.max_attempts
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def delay_queue_name(queue: str, delay_ms: int) -> str:
+    return f'retry.{queue}.{delay_ms}'
+
+
+def delay_queue_arguments(queue: str, delay_ms: int) -> Dict[str, Any]:
+    """Expired messages are routed back to ``queue`` through the default exchange"""
+    return {
+        'x-message-ttl': delay_ms,
+        'x-dead-letter-exchange': '',
+        'x-dead-letter-routing-key': queue,
+    }
+
+
+def get_attempt(headers: Optional[Dict[str, Any]]) -> int:
+    """Delivery attempt recorded on the message, the first delivery being 1"""
+    try:
+        return int((headers or {}).get(ATTEMPT_HEADER, 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def with_headers(properties, headers: Dict[str, Any]):
+    """Copy of persistent message properties carrying ``headers``"""
+    properties = copy.copy(properties)
+    properties.headers = headers
+    properties.delivery_mode = 2
+    return properties
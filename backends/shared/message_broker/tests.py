@@ -0,0 +1,139 @@
+from decimal import Decimal
+from unittest import mock
+
+import pika
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from shared.message_broker.codec import DecodeError, JSONCodec, available_content_types, get_codec
+from shared.message_broker.envelope import build_event
+from shared.message_broker.idempotency import CLAIMED, DUPLICATE, IN_PROGRESS, IdempotencyStore
+from shared.message_broker.rabbitmq import RabbitMQBroker
+from shared.message_broker.retry import (
+    ATTEMPT_HEADER, ERROR_HEADER, ORIGINAL_QUEUE_HEADER, REASON_HEADER, RetryPolicy,
+    delay_queue_arguments, delay_queue_name, get_attempt
+)
+
+
+class CodecTests(SimpleTestCase):
+    def setUp(self):
+        self.event = build_event('UserCreated', {'user_id': 7, 'mobile': '09120000000', 'tags': ['a', 'b']})
+
+    def test_json_round_trip(self):
+        codec = get_codec('application/json')
+        self.assertEqual(codec.decode(codec.encode(self.event)), self.event)
+
+    def test_msgpack_round_trip(self):
+        self.assertIn('application/msgpack', available_content_types())
+        codec = get_codec('application/msgpack')
+        body = codec.encode(self.event)
+        self.assertEqual(codec.decode(body), self.event)
+        self.assertLess(len(body), len(JSONCodec().encode(self.event)))
+
+    def test_values_without_a_native_type_are_sent_as_strings(self):
+        for content_type in available_content_types():
+            codec = get_codec(content_type)
+            self.assertEqual(codec.decode(codec.encode({'fee': Decimal('1.50')})), {'fee': '1.50'})
+
+    def test_missing_content_type_is_json(self):
+        self.assertIsInstance(get_codec(None), JSONCodec)
+        self.assertIsInstance(get_codec(''), JSONCodec)
+
+    def test_unknown_content_type_and_garbage_raise_decode_error(self):
+        with self.assertRaises(DecodeError):
+            get_codec('application/xml')
+        for content_type in available_content_types():
+            with self.assertRaises(DecodeError):
+                get_codec(content_type).decode(b'\xc1\xff{not a message')
+
+
+class IdempotencyStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # Two consumer processes sharing the cache
+        self.store, self.other = IdempotencyStore(), IdempotencyStore()
+
+    def test_claim_complete_and_duplicate(self):
+        self.assertEqual(self.store.claim('orders', 'e1'), CLAIMED)
+        self.assertEqual(self.other.claim('orders', 'e1'), IN_PROGRESS)
+
+        self.store.complete('orders', 'e1')
+        self.assertEqual(self.other.claim('orders', 'e1'), DUPLICATE)
+        self.assertEqual(self.store.claim('orders', 'e1'), DUPLICATE)
+
+    def test_scopes_are_independent(self):
+        self.store.claim('orders', 'e1')
+        self.store.complete('orders', 'e1')
+        self.assertEqual(self.store.claim('notifications', 'e1'), CLAIMED)
+
+    def test_release_lets_the_redelivery_run_again(self):
+        self.store.claim('orders', 'e1')
+        self.store.release('orders', 'e1')
+        self.assertEqual(self.other.claim('orders', 'e1'), CLAIMED)
+
+    def test_completed_events_are_answered_locally(self):
+        store = IdempotencyStore(local_size=2)
+        for event_id in ('e1', 'e2', 'e3'):
+            store.claim('orders', event_id)
+            store.complete('orders', event_id)
+        cache.clear()
+
+        self.assertEqual(store.claim('orders', 'e3'), DUPLICATE)
+        self.assertEqual(store.claim('orders', 'e2'), DUPLICATE)
+        # Evicted from the bounded LRU and gone from the cache
+        self.assertEqual(store.claim('orders', 'e1'), CLAIMED)
+
+    def test_fails_open_when_the_cache_is_down(self):
+        with mock.patch.object(LocMemCache, 'add', side_effect=ConnectionError('redis down')):
+            self.assertEqual(self.store.claim('orders', 'e1'), CLAIMED)
+            self.assertEqual(self.store.claim('orders', 'e1'), CLAIMED)
+
+
+class RetryPolicyTests(SimpleTestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=5, initial_delay=1, multiplier=2, max_delay=5)
+        # Bypass the singleton; it connects lazily and republish() is replaced
+        self.broker = RabbitMQBroker.__new__(RabbitMQBroker)
+        self.broker.__init__()
+        self.broker.republish = mock.Mock(return_value=True)
+
+    def properties(self, **headers) -> pika.BasicProperties:
+        return pika.BasicProperties(message_id='m1', type='UserCreated', headers=headers)
+
+    def test_delays_grow_and_are_capped(self):
+        self.assertEqual([self.policy.delay_ms(attempt) for attempt in range(1, 6)], [1000, 2000, 4000, 5000, 5000])
+        self.assertEqual(self.policy.delay_levels(), [1000, 2000, 4000, 5000])
+        # The first level exists even without retries, deferred deliveries use it
+        self.assertEqual(RetryPolicy(max_attempts=1).delay_levels(), [1000])
+
+    def test_delay_queues_expire_back_into_the_queue(self):
+        self.assertEqual(delay_queue_name('orders', 2000), 'retry.orders.2000')
+        self.assertEqual(delay_queue_arguments('orders', 2000), {
+            'x-message-ttl': 2000,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': 'orders',
+        })
+
+    def test_attempt_header(self):
+        self.assertEqual(get_attempt(None), 1)
+        self.assertEqual(get_attempt({ATTEMPT_HEADER: 3}), 3)
+        self.assertEqual(get_attempt({ATTEMPT_HEADER: 'garbage'}), 1)
+
+    def test_failed_delivery_is_parked_in_its_delay_queue(self):
+        self.assertTrue(self.broker._retry_later('orders', self.properties(**{ATTEMPT_HEADER: 2}), b'body', self.policy, 'boom'))
+
+        exchange, routing_key, body, properties = self.broker.republish.call_args.args
+        self.assertEqual((exchange, routing_key, body), ('', 'retry.orders.2000', b'body'))
+        self.assertEqual(properties.headers[ATTEMPT_HEADER], 3)
+        self.assertEqual(properties.headers[ERROR_HEADER], 'boom')
+        self.assertEqual(properties.delivery_mode, 2)
+
+    def test_last_attempt_goes_to_the_dead_letter_exchange(self):
+        self.broker._retry_later('orders', self.properties(**{ATTEMPT_HEADER: 5}), b'body', self.policy, 'boom')
+
+        exchange, routing_key, body, properties = self.broker.republish.call_args.args
+        self.assertEqual((exchange, routing_key), ('dlx.domain_events', 'orders'))
+        self.assertEqual(properties.headers[ORIGINAL_QUEUE_HEADER], 'orders')
+        self.assertEqual(properties.headers[REASON_HEADER], 'max attempts reached: boom')
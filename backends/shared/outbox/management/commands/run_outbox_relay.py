@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from shared.message_broker.metrics import start_http_server
+from shared.outbox.relay import OutboxRelay
+
+
+class Command(BaseCommand):
+    help = 'Publish events stored in the transactional outbox to RabbitMQ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Outbox rows locked and published per round')
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help='Seconds to wait when the outbox is drained')
+        parser.add_argument('--metrics-port', type=int, default=None,
+                            help='Serve Prometheus metrics on this port')
+
+    def handle(self, *args, **options):
+        relay = OutboxRelay(batch_size=options['batch_size'], poll_interval=options['interval'])
+        relay.install_signal_handlers()
+        if options['metrics_port']:
+            start_http_server(options['metrics_port'])
+        self.stdout.write(f'Relaying outbox in batches of {relay.batch_size}...')
+        relay.run()
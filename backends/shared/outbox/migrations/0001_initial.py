@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(unique=True)),
+                ('event_type', models.CharField(max_length=128)),
+                ('exchange', models.CharField(default='domain_events', max_length=128)),
+                ('routing_key', models.CharField(max_length=255)),
+                ('correlation_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbox Message',
+                'verbose_name_plural': 'Outbox Messages',
+                'indexes': [models.Index(fields=['available_at', 'id'], name='outbox_outb_availab_98344b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    An event written in the same transaction as the change that produced it.
+
+    Rows are removed by the relay once the broker confirmed them, so the
+    table only holds events that still have to be published.
+    """
+    event_id = models.UUIDField(unique=True)
+    event_type = models.CharField(max_length=128)
+    exchange = models.CharField(max_length=128, default='domain_events')
+    routing_key = models.CharField(max_length=255)
+    correlation_id = models.CharField(max_length=64, null=True, blank=True)
+    payload = models.JSONField()
+
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        indexes = [
+            models.Index(fields=['available_at', 'id']),  # Relay scan order
+        ]
+
+    def __str__(self):
+        return f'{self.event_type} ({self.event_id})'
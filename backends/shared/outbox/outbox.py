@@ -0,0 +1,42 @@
+# shared/outbox/outbox.py
+import logging
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+
+from shared.event.event_registry import EventRegistry
+from shared.outbox.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _to_message(event, routing_key: Optional[str], exchange: str) -> OutboxMessage:
+    return OutboxMessage(
+        event_id=event.event_id,
+        event_type=event.event_type,
+        exchange=exchange,
+        routing_key=routing_key or EventRegistry.routing_key(event.event_type),
+        correlation_id=getattr(event, 'correlation_id', None),
+        payload=event.to_dict(),
+    )
+
+
+def enqueue(event, routing_key: Optional[str] = None, exchange: str = 'domain_events') -> OutboxMessage:
+    """
+    Store an event for publishing once the surrounding transaction commits.
+
+    Call it inside the transaction that makes the change: a rollback drops
+    the event with it, and the commit never waits for RabbitMQ.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        logger.warning(f"Outbox event {event.event_type} enqueued outside a transaction")
+    message = _to_message(event, routing_key, exchange)
+    message.save()
+    return message
+
+
+def enqueue_many(events: Iterable, exchange: str = 'domain_events') -> List[OutboxMessage]:
+    """Store several events with one INSERT"""
+    return OutboxMessage.objects.bulk_create(
+        [_to_message(event, None, exchange) for event in events]
+    )
@@ -0,0 +1,149 @@
+# shared/outbox/relay.py
+import logging
+import signal
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from shared.outbox.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """
+    Drains the outbox into RabbitMQ.
+
+    Each round claims a batch in a short transaction: SELECT ... FOR UPDATE
+    SKIP LOCKED, then ``available_at`` is pushed ``lease`` seconds ahead so
+    no other relay picks the rows up. The batch is published with publisher
+    confirms outside any transaction, and a second short transaction deletes
+    the confirmed rows and postpones the failed ones. No row lock or idle
+    transaction is held while waiting for the broker, and several relays can
+    run side by side.
+
+    A relay dying after the claim leaves its rows to be published again once
+    the lease runs out, as does a crash between the broker ack and the
+    delete: delivery is at least once and consumers deduplicate on event_id.
+    """
+
+    def __init__(self,
+                 broker=None,
+                 batch_size: int = 100,
+                 poll_interval: float = 0.5,
+                 max_backoff: float = 300,
+                 lease: float = 120):
+        if broker is None:
+            from shared.message_broker.rabbitmq import rabbitmq_broker
+            broker = rabbitmq_broker
+        self.broker = broker
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        # Longer than a publish round (confirm timeout included)
+        self.lease = lease
+        self._running = False
+
+    def relay_once(self) -> int:
+        """Publish one batch; returns the number of rows handled"""
+        messages = self._claim()
+        if not messages:
+            return 0
+
+        by_exchange: Dict[str, List[OutboxMessage]] = defaultdict(list)
+        for message in messages:
+            by_exchange[message.exchange].append(message)
+
+        published, failed = [], []
+        for exchange, batch in by_exchange.items():
+            self._publish(exchange, batch, published, failed)
+
+        with transaction.atomic():
+            if published:
+                OutboxMessage.objects.filter(pk__in=published).delete()
+            for message, error in failed:
+                self._postpone(message, error)
+
+        logger.info(f"Outbox relay published {len(published)} events ({len(failed)} failed)")
+        return len(messages)
+
+    def _claim(self) -> List[OutboxMessage]:
+        """Lease the next batch to this relay and commit"""
+        with transaction.atomic():
+            now = timezone.now()
+            messages = list(
+                OutboxMessage.objects
+                .select_for_update(skip_locked=True)
+                .filter(available_at__lte=now)
+                .order_by('id')[:self.batch_size]
+            )
+            if messages:
+                OutboxMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+                    available_at=now + timedelta(seconds=self.lease)
+                )
+        return messages
+
+    def _publish(self, exchange: str, batch: List[OutboxMessage], published: list, failed: list) -> None:
+        try:
+            result = self.broker.publish_batch(
+                exchange,
+                [
+                    {
+                        'routing_key': message.routing_key,
+                        'event_type': message.event_type,
+                        'data': message.payload,
+                        'correlation_id': message.correlation_id,
+                        'event_id': str(message.event_id),
+                    }
+                    for message in batch
+                ],
+                confirm=True
+            )
+        except Exception as e:
+            logger.error(f"Outbox relay failed to publish to {exchange}: {e}")
+            failed.extend((message, str(e)) for message in batch)
+            return
+
+        for item in result.results:
+            if item.success:
+                published.append(batch[item.index].pk)
+            else:
+                failed.append((batch[item.index], item.error))
+
+    def _postpone(self, message: OutboxMessage, error: str) -> None:
+        """Back off exponentially so a poison event does not block the batch"""
+        delay = min(self.poll_interval * 2 ** message.attempts, self.max_backoff)
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            attempts=F('attempts') + 1,
+            last_error=error,
+            available_at=timezone.now() + timedelta(seconds=delay)
+        )
+
+    def run(self) -> None:
+        """Relay until stop() is called (blocking)"""
+        self._running = True
+        logger.info(f"Outbox relay started (batch_size={self.batch_size})")
+        while self._running:
+            close_old_connections()
+            try:
+                handled = self.relay_once()
+            except Exception as e:
+                logger.error(f"Outbox relay round failed: {e}", exc_info=True)
+                handled = 0
+            # A full batch means there is probably more waiting
+            if handled < self.batch_size:
+                time.sleep(self.poll_interval)
+        logger.info("Outbox relay stopped")
+
+    def stop(self) -> None:
+        self._running = False
+
+    def install_signal_handlers(self) -> None:
+        """Stop gracefully on SIGTERM / SIGINT"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.stop())
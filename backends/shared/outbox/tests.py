@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from shared.event.base_events import SlottedDomainEvent
+from shared.event.event_registry import EventRegistry
+from shared.message_broker.envelope import BatchPublishResult, PublishResult
+from shared.outbox import outbox
+from shared.outbox.models import OutboxMessage
+from shared.outbox.relay import OutboxRelay
+
+
+@EventRegistry.register
+class OutboxTestEvent(SlottedDomainEvent):
+    user_id: int = None
+
+
+class FakeBroker:
+    """publish_batch() confirming every event except the event_ids in ``fail``"""
+
+    def __init__(self, fail=(), error: Exception = None):
+        self.fail = set(fail)
+        self.error = error
+        self.batches = []
+
+    def publish_batch(self, exchange, events, confirm=False):
+        self.batches.append((exchange, events))
+        if self.error:
+            raise self.error
+        return BatchPublishResult(confirmed=confirm, results=[
+            PublishResult(
+                index=index,
+                event_id=event['event_id'],
+                event_type=event['event_type'],
+                routing_key=event['routing_key'],
+                success=event['event_id'] not in self.fail,
+                error='nacked by broker' if event['event_id'] in self.fail else None
+            )
+            for index, event in enumerate(events)
+        ])
+
+
+class OutboxEnqueueTests(TestCase):
+    def test_enqueue_stores_the_event(self):
+        event = OutboxTestEvent(aggregate_id='7', user_id=7)
+        with transaction.atomic():
+            outbox.enqueue(event)
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(str(message.event_id), event.event_id)
+        self.assertEqual(message.event_type, 'OutboxTestEvent')
+        self.assertEqual(message.exchange, 'domain_events')
+        self.assertEqual(message.routing_key, 'outboxtestevent')
+        self.assertEqual(message.correlation_id, event.correlation_id)
+        self.assertEqual(message.payload, event.to_dict())
+
+    def test_rollback_drops_the_event(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.enqueue(OutboxTestEvent(user_id=7))
+                raise RuntimeError('command failed')
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_enqueue_many(self):
+        outbox.enqueue_many([OutboxTestEvent(user_id=i) for i in range(3)], exchange='audit')
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('payload__user_id', 'exchange')),
+            [(0, 'audit'), (1, 'audit'), (2, 'audit')]
+        )
+
+
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        self.events = [OutboxTestEvent(aggregate_id=str(i), user_id=i) for i in range(4)]
+        outbox.enqueue_many(self.events)
+
+    def test_relay_once_deletes_confirmed_and_postpones_failed(self):
+        failed = self.events[1].event_id
+        broker = FakeBroker(fail=[failed])
+        relay = OutboxRelay(broker=broker, poll_interval=1)
+
+        self.assertEqual(relay.relay_once(), 4)
+
+        exchange, published = broker.batches[0]
+        self.assertEqual(exchange, 'domain_events')
+        self.assertEqual([e['event_id'] for e in published], [e.event_id for e in self.events])
+        message = OutboxMessage.objects.get()
+        self.assertEqual(str(message.event_id), failed)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.last_error, 'nacked by broker')
+        self.assertGreater(message.available_at, timezone.now())
+
+        # Backing off: nothing is due yet
+        self.assertEqual(relay.relay_once(), 0)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(OutboxRelay(broker=FakeBroker()).relay_once(), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_broker_error_postpones_the_whole_batch(self):
+        relay = OutboxRelay(broker=FakeBroker(error=ConnectionError('broker down')))
+        self.assertEqual(relay.relay_once(), 4)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('attempts', 'last_error').distinct()),
+            [(1, 'broker down')]
+        )
+
+    def test_claimed_rows_are_leased_to_one_relay(self):
+        relay = OutboxRelay(broker=FakeBroker(), batch_size=3, lease=60)
+        before = timezone.now()
+        claimed = relay._claim()
+
+        self.assertEqual([m.payload['user_id'] for m in claimed], [0, 1, 2])
+        leased = OutboxMessage.objects.filter(pk__in=[m.pk for m in claimed])
+        self.assertTrue(all(m.available_at >= before + timedelta(seconds=60) for m in leased))
+        # Another relay only gets what is left
+        self.assertEqual([m.payload['user_id'] for m in OutboxRelay(broker=FakeBroker())._claim()], [3])
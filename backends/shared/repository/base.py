@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, List, Optional, Type
-from django.db import models
+from typing import Generic, TypeVar, List, Optional, Sequence, Type
+from django.db import IntegrityError, connections, models, router, transaction
 
 
 T = TypeVar('T', bound=models.Model)
@@ -56,6 +56,46 @@ class DjangoRepository(BaseRepository[T]):
         """Creates and saves a new instance from raw data."""
         return self.model_class.objects.create(**data)
     
+    def insert_ignore_conflict(self, entity: T, conflict_fields: Sequence[str] = ()) -> Optional[T]:
+        """
+        Saves a new entity with a single INSERT ... ON CONFLICT DO NOTHING
+        RETURNING pk (PostgreSQL, SQLite). Without conflict_fields every unique
+        constraint of the table counts as a conflict.
+        Returns the saved entity, or None if it conflicts with an existing
+        row. Model save() and signals are skipped.
+        Other databases save() in a savepoint instead, an IntegrityError
+        counting as the conflict.
+        """
+        meta = self.model_class._meta
+        connection = connections[router.db_for_write(self.model_class)]
+        on_conflict = connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert
+        if not on_conflict:
+            try:
+                with transaction.atomic(using=connection.alias):
+                    entity.save(force_insert=True, using=connection.alias)
+            except IntegrityError:
+                return None
+            return entity
+
+        quote = connection.ops.quote_name
+        fields = [f for f in meta.concrete_fields if f is not meta.auto_field]
+        params = [f.get_db_prep_save(f.pre_save(entity, True), connection) for f in fields]
+        target = f'({", ".join(quote(meta.get_field(name).column) for name in conflict_fields)}) ' if conflict_fields else ''
+        sql = (
+            f'INSERT INTO {quote(meta.db_table)} ({", ".join(quote(f.column) for f in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))}) '
+            f'ON CONFLICT {target}DO NOTHING RETURNING {quote(meta.pk.column)}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        entity.pk = row[0]
+        entity._state.adding = False
+        entity._state.db = connection.alias
+        return entity
+
     def update(self, id: int, data: dict) -> Optional[T]:
         """
         Updates an entity by ID and returns the updated object.
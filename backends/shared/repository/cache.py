@@ -0,0 +1,148 @@
+import logging
+import math
+import random
+from time import monotonic, sleep, time
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ReadThroughCache:
+    """
+    Read-through cache in front of a repository lookup.
+
+    Keys are ``<namespace>:v<version>:<key>``; bump ``version`` when the
+    cached shape changes and old entries are simply never read again.
+
+    Stampede protection:
+      - single-flight: on a miss only the holder of a short lock loads,
+        the others wait up to ``lock_wait`` seconds for its result
+      - early recompute (XFetch): a hit may be refreshed before it expires,
+        with a probability growing as expiry nears and with the load cost
+
+    Invalidation bumps a generation counter ("fence") per key before
+    deleting it. A loader that raced with an invalidation sees the fence
+    moved and does not write its result back.
+
+    Cache errors never fail a lookup, the loader is called instead.
+    """
+
+    def __init__(self,
+                 namespace: str,
+                 version: int = 1,
+                 timeout: int = 300,
+                 cache_alias: str = 'default',
+                 lock_timeout: float = 5,
+                 lock_wait: float = 1,
+                 beta: float = 1.0):
+        self.namespace = namespace
+        self.version = version
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.beta = beta
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def key(self, *parts) -> str:
+        return ':'.join([self.namespace, f'v{self.version}', *map(str, parts)])
+
+    def _fence_key(self, key: str) -> str:
+        return f'{key}:fence'
+
+    def _lock_key(self, key: str) -> str:
+        return f'{key}:lock'
+
+    def _get(self, key: str, default=None):
+        try:
+            return self.cache.get(key, default)
+        except Exception as e:
+            logger.warning(f"Cache read of {key} failed: {e}")
+            return default
+
+    def get_or_load(self,
+                    key: str,
+                    loader: Callable[[], Any],
+                    keys_for: Optional[Callable[[Any], Iterable[str]]] = None) -> Any:
+        """
+        Cached value of ``key``, calling ``loader`` on a miss.
+
+        ``keys_for(value)`` lists every key the loaded value is stored under
+        (e.g. by id and by mobile), ``key`` itself by default. ``None``
+        results and loader exceptions are not cached.
+        """
+        entry = self._get(key)
+        if entry is not None:
+            value, delta, expires_at = entry
+            if time() - delta * self.beta * math.log(random.random()) < expires_at:
+                return value
+            # Close to expiry: one caller refreshes, the others keep the cached value
+            if not self._lock(key):
+                return value
+            return self._load(key, loader, keys_for, locked=True)
+
+        if self._lock(key):
+            return self._load(key, loader, keys_for, locked=True)
+
+        # Someone else is loading it, wait for their result
+        deadline = monotonic() + self.lock_wait
+        while monotonic() < deadline:
+            sleep(0.02)
+            entry = self._get(key)
+            if entry is not None:
+                return entry[0]
+        return self._load(key, loader, keys_for, locked=False)
+
+    def _lock(self, key: str) -> bool:
+        try:
+            # None: the cache swallowed a connection error, go ahead
+            return self.cache.add(self._lock_key(key), 1, timeout=self.lock_timeout) is not False
+        except Exception:
+            return True
+
+    def _load(self, key: str, loader: Callable[[], Any], keys_for, locked: bool) -> Any:
+        fence = self._get(self._fence_key(key), 0)
+        try:
+            start = time()
+            value = loader()
+            delta = time() - start
+        finally:
+            if locked:
+                self._unlock(key)
+
+        if value is None or self._get(self._fence_key(key), 0) != fence:
+            return value
+        keys = list(keys_for(value)) if keys_for else [key]
+        entry = (value, delta, time() + self.timeout)
+        try:
+            self.cache.set_many({k: entry for k in keys}, timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Cache write of {key} failed: {e}")
+        return value
+
+    def _unlock(self, key: str) -> None:
+        try:
+            self.cache.delete(self._lock_key(key))
+        except Exception:
+            pass
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """Drop ``keys`` and fence off loads that started before this call"""
+        keys = list(keys)
+        try:
+            for key in keys:
+                fence_key = self._fence_key(key)
+                try:
+                    self.cache.incr(fence_key)
+                except ValueError:
+                    # Missing counter; entries outlive their fence by at most timeout
+                    self.cache.set(fence_key, 1, timeout=self.timeout)
+            self.cache.delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation of {', '.join(keys)} failed: {e}")
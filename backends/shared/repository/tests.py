@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from shared.repository.cache import ReadThroughCache
+
+
+class ReadThroughCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = ReadThroughCache('test:user', lock_wait=0.1)
+        self.key = self.users.key('id', 1)
+        self.loads = 0
+
+    def loader(self, value=None):
+        def load():
+            self.loads += 1
+            return value if value is not None else {'id': 1, 'mobile': '09120000000'}
+        return load
+
+    def test_miss_loads_once_then_hits(self):
+        for _ in range(3):
+            self.assertEqual(self.users.get_or_load(self.key, self.loader())['id'], 1)
+        self.assertEqual(self.loads, 1)
+
+    def test_value_is_stored_under_every_key(self):
+        by_mobile = self.users.key('mobile', '09120000000')
+        self.users.get_or_load(self.key, self.loader(), lambda value: [self.key, by_mobile])
+        self.assertEqual(self.users.get_or_load(by_mobile, self.loader())['id'], 1)
+        self.assertEqual(self.loads, 1)
+
+    def test_none_and_errors_are_not_cached(self):
+        self.assertIsNone(self.users.get_or_load(self.key, lambda: None))
+        with self.assertRaises(RuntimeError):
+            self.users.get_or_load(self.key, mock.Mock(side_effect=RuntimeError('db down')))
+        # The lock was released, the next caller loads right away
+        self.assertEqual(self.users.get_or_load(self.key, self.loader())['id'], 1)
+
+    def test_invalidate_drops_the_entry(self):
+        self.users.get_or_load(self.key, self.loader())
+        self.users.invalidate([self.key])
+        self.users.get_or_load(self.key, self.loader())
+        self.assertEqual(self.loads, 2)
+
+    def test_load_racing_an_invalidate_is_not_written_back(self):
+        def stale_load():
+            # The row changes and is invalidated while this read is in flight
+            self.users.invalidate([self.key])
+            return {'id': 1, 'mobile': 'stale'}
+
+        self.assertEqual(self.users.get_or_load(self.key, stale_load)['mobile'], 'stale')
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(self.users.get_or_load(self.key, self.loader())['mobile'], '09120000000')
+        self.assertEqual(self.loads, 1)
+
+    def test_cache_errors_fall_back_to_the_loader(self):
+        with mock.patch.object(LocMemCache, 'get', side_effect=ConnectionError('redis down')), \
+                mock.patch.object(LocMemCache, 'set_many', side_effect=ConnectionError('redis down')):
+            self.assertEqual(self.users.get_or_load(self.key, self.loader())['id'], 1)
@@ -2,121 +2,316 @@
 import pika
 import json
 import uuid
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from functools import partial
+from threading import Event, Lock, Thread
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 from shared.utils.singleton import SingletonMeta
 
 logger = logging.getLogger(__name__)
 
+
 class RPCClient(metaclass=SingletonMeta):
-    """Singleton RPC client for synchronous service communication"""
-    
-    def __init__(self, 
+    """
+    Singleton RPC client multiplexing many in-flight calls over one reply queue.
+
+    A background I/O thread owns the pika connection; callers hand their
+    publishes to it with add_callback_threadsafe and wait on a Future that is
+    resolved by correlation_id, so any number of threads (or coroutines via
+    acall) can have calls outstanding at the same time.
+    """
+
+    def __init__(self,
                  host: str = 'localhost',
                  port: int = 5672,
-                 username: str = 'guest', 
-                 password: str = 'guest'):
-        
+                 username: str = 'guest',
+                 password: str = 'guest',
+                 connect_timeout: float = 10):
+
         self.connection_params = pika.ConnectionParameters(
             host=host,
             port=port,
             credentials=pika.PlainCredentials(username, password)
         )
-        
+        self.connect_timeout = connect_timeout
+
         self._connection: Optional[pika.BlockingConnection] = None
         self._channel: Optional[pika.adapters.blocking_connection.BlockingChannel] = None
         self._response_queue: Optional[str] = None
-        self._correlation_map: Dict[str, Any] = {}
-        self._connect()
-    
+        self._pending: Dict[str, Tuple[Future, Any]] = {}
+        self._pending_lock = Lock()
+        self._start_lock = Lock()
+        self._io_thread: Optional[Thread] = None
+        self._ready = Event()
+        self._running = False
+        self._connect_error: Optional[Exception] = None
+        # Connects on the first call (or connect_in_background), never at import
+
     def _connect(self) -> None:
-        """Establish RPC connection"""
+        """Start the I/O thread and wait until the reply queue is consumed"""
+        with self._start_lock:
+            if self._io_thread and self._io_thread.is_alive():
+                return
+
+            self._ready.clear()
+            self._connect_error = None
+            self._running = True
+            self._io_thread = Thread(target=self._io_loop, name='rpc-client-io', daemon=True)
+            self._io_thread.start()
+
+            if not self._ready.wait(self.connect_timeout):
+                self._running = False
+                raise TimeoutError("RPC client could not connect in time")
+            if self._connect_error:
+                raise self._connect_error
+
+    def connect_in_background(self) -> Thread:
+        """Start connecting without waiting; a failure is retried by the next call"""
+        def connect():
+            try:
+                self._connect()
+            except Exception as e:
+                logger.warning(f"RPC client background connect failed: {e}")
+
+        thread = Thread(target=connect, name='rpc-client-connect', daemon=True)
+        thread.start()
+        return thread
+
+    def _io_loop(self) -> None:
+        """Own the connection: consume replies and run queued publishes"""
         try:
             self._connection = pika.BlockingConnection(self.connection_params)
             self._channel = self._connection.channel()
-            
+
             # Declare exclusive callback queue for responses
             result = self._channel.queue_declare(queue='', exclusive=True)
             self._response_queue = result.method.queue
-            
+
             self._channel.basic_consume(
                 queue=self._response_queue,
                 on_message_callback=self._on_response,
                 auto_ack=True
             )
-            
+
             logger.info("RPC client connected successfully")
-            
+
         except Exception as e:
             logger.error(f"Failed to connect RPC client: {e}")
-            raise
-    
+            self._connect_error = e
+            self._running = False
+            self._ready.set()
+            return
+
+        self._ready.set()
+        try:
+            while self._running:
+                # Returns as soon as a reply or a threadsafe callback arrives
+                self._connection.process_data_events(time_limit=1)
+        except Exception as e:
+            logger.error(f"RPC client connection lost: {e}")
+            self._fail_pending(ConnectionError(f"RPC connection lost: {e}"))
+        finally:
+            self._running = False
+            try:
+                if self._connection and self._connection.is_open:
+                    self._connection.close()
+            except Exception as e:
+                logger.error(f"Error closing RPC connection: {e}")
+
     def _on_response(self, ch, method, props, body):
         """Handle RPC responses"""
-        if props.correlation_id in self._correlation_map:
-            self._correlation_map[props.correlation_id] = json.loads(body.decode())
-    
-    def call(self, 
-             service: str, 
-             method: str, 
-             params: Dict[str, Any],
-             timeout: int = 30) -> Dict[str, Any]:
+        with self._pending_lock:
+            entry = self._pending.pop(props.correlation_id, None)
+        if entry is None:
+            return  # Late reply of a call that already timed out
+
+        future, timer = entry
+        if timer is not None:
+            self._connection.remove_timeout(timer)
+        if future.done():
+            return
+
+        try:
+            response = json.loads(body.decode())
+        except Exception as e:
+            future.set_exception(RPCException(f"Invalid RPC response: {e}"))
+            return
+
+        if response.get('error'):
+            future.set_exception(RPCException(response['error']))
+        else:
+            future.set_result(response.get('result'))
+
+    def _publish_request(self, correlation_id: str, routing_key: str, body: str, timeout: float) -> None:
+        """Runs on the I/O thread"""
+        with self._pending_lock:
+            entry = self._pending.get(correlation_id)
+        if entry is None or entry[0].done():
+            return
+
+        try:
+            self._channel.basic_publish(
+                exchange='',
+                routing_key=routing_key,
+                properties=pika.BasicProperties(
+                    reply_to=self._response_queue,
+                    correlation_id=correlation_id,
+                    expiration=str(int(timeout * 1000)),
+                ),
+                body=body
+            )
+        except Exception as e:
+            # The I/O loop notices the broken connection on its next iteration
+            logger.error(f"RPC publish failed: {e}")
+            self._resolve_exception(correlation_id, e)
+            return
+
+        timer = self._connection.call_later(
+            timeout, partial(self._expire, correlation_id, routing_key)
+        )
+        with self._pending_lock:
+            if correlation_id in self._pending:
+                self._pending[correlation_id] = (entry[0], timer)
+            else:
+                self._connection.remove_timeout(timer)
+
+    def _expire(self, correlation_id: str, routing_key: str) -> None:
+        """I/O-thread timer fired: nobody answered in time"""
+        self._resolve_exception(
+            correlation_id, TimeoutError(f"RPC call to {routing_key} timed out")
+        )
+
+    def _resolve_exception(self, correlation_id: str, exc: Exception) -> None:
+        with self._pending_lock:
+            entry = self._pending.pop(correlation_id, None)
+        if entry and not entry[0].done():
+            entry[0].set_exception(exc)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def call_async(self,
+                   service: str,
+                   method: str,
+                   params: Dict[str, Any],
+                   timeout: float = 30) -> Future:
         """
-        Make RPC call to another service
+        Send an RPC request and return a Future resolved with its result
         """
-        if not self._channel or self._channel.is_closed:
+        if not self._running or not self._io_thread or not self._io_thread.is_alive():
             self._connect()
-        
+
         correlation_id = str(uuid.uuid4())
-        self._correlation_map[correlation_id] = None
-        
+        future = Future()
+        future.correlation_id = correlation_id
+        with self._pending_lock:
+            self._pending[correlation_id] = (future, None)
+
         request = {
             'service': service,
             'method': method,
             'params': params,
             'correlation_id': correlation_id
         }
-        
+
         try:
-            self._channel.basic_publish(
-                exchange='',
-                routing_key=f'rpc_{service}',
-                properties=pika.BasicProperties(
-                    reply_to=self._response_queue,
-                    correlation_id=correlation_id,
-                ),
-                body=json.dumps(request)
-            )
-            
-            # Wait for response with timeout
-            import time
-            start_time = time.time()
-            while self._correlation_map[correlation_id] is None:
-                self._connection.process_data_events(time_limit=1)
-                if time.time() - start_time > timeout:
-                    raise TimeoutError(f"RPC call to {service}.{method} timed out")
-            
-            response = self._correlation_map.pop(correlation_id)
-            
-            if response.get('error'):
-                raise RPCException(response['error'])
-                
-            return response.get('result')
-            
+            self._connection.add_callback_threadsafe(partial(
+                self._publish_request,
+                correlation_id,
+                f'rpc_{service}',
+                json.dumps(request, default=str),
+                timeout
+            ))
+        except Exception as e:
+            logger.error(f"RPC call failed: {e}")
+            self._resolve_exception(correlation_id, e)
+        return future
+
+    def call(self,
+             service: str,
+             method: str,
+             params: Dict[str, Any],
+             timeout: float = 30) -> Dict[str, Any]:
+        """
+        Make RPC call to another service
+        """
+        future = self.call_async(service, method, params, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._resolve_exception_for(future)
+            raise TimeoutError(f"RPC call to {service}.{method} timed out")
         except Exception as e:
             logger.error(f"RPC call failed: {e}")
-            self._correlation_map.pop(correlation_id, None)
             raise
-    
+
+    async def acall(self,
+                    service: str,
+                    method: str,
+                    params: Dict[str, Any],
+                    timeout: float = 30) -> Dict[str, Any]:
+        """
+        Awaitable RPC call for async views and consumers
+        """
+        future = self.call_async(service, method, params, timeout)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._resolve_exception_for(future)
+            raise TimeoutError(f"RPC call to {service}.{method} timed out")
+
+    def call_many(self,
+                  calls: Iterable[Sequence[Any]],
+                  timeout: float = 30) -> List[Any]:
+        """
+        Fan out (service, method, params) calls and wait for all of them.
+
+        Results are returned in order; a failed call yields its exception
+        instead of raising, so one slow or broken service does not hide the rest.
+        """
+        futures = [
+            self.call_async(service, method, params, timeout)
+            for service, method, params in calls
+        ]
+        wait(futures, timeout=timeout)
+
+        results = []
+        for future in futures:
+            if not future.done():
+                self._resolve_exception_for(future)
+            try:
+                results.append(future.result(timeout=0))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _resolve_exception_for(self, future: Future) -> None:
+        """Drop a pending call the caller stopped waiting for"""
+        self._resolve_exception(future.correlation_id, TimeoutError("RPC call timed out"))
+
+    def pending_count(self) -> int:
+        """Number of calls waiting for a reply"""
+        with self._pending_lock:
+            return len(self._pending)
+
     def close(self):
         """Close RPC connection"""
+        self._running = False
         try:
-            if self._channel and self._channel.is_open:
-                self._channel.close()
             if self._connection and self._connection.is_open:
-                self._connection.close()
+                # Wake the I/O loop so it notices _running is False
+                self._connection.add_callback_threadsafe(lambda: None)
+            if self._io_thread:
+                self._io_thread.join(timeout=5)
         except Exception as e:
             logger.error(f"Error closing RPC connection: {e}")
+        self._fail_pending(ConnectionError("RPC client closed"))
 
 
 class RPCException(Exception):
@@ -124,5 +319,5 @@ class RPCException(Exception):
     pass
 
 
-# Global RPC client instance
-rpc_client = RPCClient()
\ No newline at end of file
+# Global RPC client instance, connects on first call
+rpc_client = RPCClient()
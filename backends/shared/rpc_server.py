@@ -0,0 +1,285 @@
+# shared/rpc_server.py
+import pika
+import json
+import logging
+import signal
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# _claim_shared() result when the caller should execute the request
+_CLAIMED = object()
+_PROCESSING = 'processing'
+
+
+class RPCServer:
+    """
+    Serves RPCClient requests published to ``rpc_{service}``.
+
+    Methods are registered with the ``method`` decorator and executed on a
+    thread pool; the pika connection stays on the thread that called start().
+    Replies produced by workers are queued and written (together with their
+    acks) in one I/O-thread callback, so bursts share a single wake-up.
+
+    Requests are deduplicated by correlation_id. An in-process LRU answers
+    channel-level redeliveries; the Django cache (``dedup_cache_alias``)
+    shares replies between server processes and across restarts, which is
+    when redeliveries actually happen. A request another process is still
+    executing is acked without a reply, that process answers it. When the
+    cache is unreachable requests are executed again.
+    """
+
+    def __init__(self,
+                 service: str,
+                 host: str = 'localhost',
+                 port: int = 5672,
+                 username: str = 'guest',
+                 password: str = 'guest',
+                 concurrency: int = 8,
+                 prefetch_count: Optional[int] = None,
+                 dedup_size: int = 10000,
+                 dedup_ttl: float = 300,
+                 dedup_cache_alias: Optional[str] = 'default',
+                 processing_ttl: float = 60):
+
+        self.service = service
+        self.queue_name = f'rpc_{service}'
+        self.connection_params = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=pika.PlainCredentials(username, password),
+            heartbeat=600,
+            blocked_connection_timeout=300
+        )
+        self.concurrency = concurrency
+        self.prefetch_count = prefetch_count or concurrency * 2
+        self.dedup_size = dedup_size
+        self.dedup_ttl = dedup_ttl
+        self.dedup_cache_alias = dedup_cache_alias
+        self.processing_ttl = processing_ttl
+
+        self._methods: Dict[str, Callable[..., Any]] = {}
+        self._connection: Optional[pika.BlockingConnection] = None
+        self._channel: Optional[pika.adapters.blocking_connection.BlockingChannel] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = False
+
+        # correlation_id -> (expires_at, reply body) of answered requests
+        self._completed: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._in_flight: set = set()
+        self._dedup_lock = Lock()
+
+        # (reply_to, correlation_id, body, delivery_tag) waiting for the I/O thread
+        self._replies: List[Tuple[Optional[str], str, bytes, int]] = []
+        self._replies_lock = Lock()
+        self._flush_scheduled = False
+
+    def method(self, name: Optional[str] = None):
+        """Decorator registering a function as an RPC method"""
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            self.register(name or func.__name__, func)
+            return func
+        return decorator
+
+    def register(self, name: str, func: Callable[..., Any]) -> None:
+        """Register an RPC method"""
+        if name in self._methods:
+            raise ValueError(f"RPC method {self.service}.{name} already registered")
+        self._methods[name] = func
+        logger.info(f"Registered RPC method {self.service}.{name}")
+
+    def start(self) -> None:
+        """Connect and serve requests until stop() is called (blocking)"""
+        self._connection = pika.BlockingConnection(self.connection_params)
+        self._channel = self._connection.channel()
+        self._channel.queue_declare(queue=self.queue_name, durable=True)
+        self._channel.basic_qos(prefetch_count=self.prefetch_count)
+        self._channel.basic_consume(
+            queue=self.queue_name,
+            on_message_callback=self._on_request,
+            auto_ack=False
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix=f'rpc-{self.service}'
+        )
+        self._running = True
+        logger.info(
+            f"RPC server for {self.service} listening on {self.queue_name} "
+            f"(concurrency={self.concurrency}, prefetch={self.prefetch_count})"
+        )
+
+        try:
+            while self._running:
+                self._connection.process_data_events(time_limit=1)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._flush_replies()
+            if self._connection.is_open:
+                self._connection.close()
+            logger.info(f"RPC server for {self.service} stopped")
+
+    def stop(self) -> None:
+        """Stop consuming; in-flight requests are finished and answered first"""
+        self._running = False
+        if self._connection and self._connection.is_open:
+            self._connection.add_callback_threadsafe(lambda: None)
+
+    def install_signal_handlers(self) -> None:
+        """Stop gracefully on SIGTERM / SIGINT"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.stop())
+
+    def _on_request(self, ch, method, props, body) -> None:
+        """Runs on the I/O thread for every delivered request"""
+        correlation_id = props.correlation_id
+
+        with self._dedup_lock:
+            cached = self._get_completed(correlation_id)
+            duplicate = cached is None and correlation_id in self._in_flight
+            if cached is None and not duplicate and correlation_id:
+                self._in_flight.add(correlation_id)
+
+        if cached is not None:
+            # Redelivered request we already answered: resend, do not re-execute
+            self._send_reply(props.reply_to, correlation_id, cached)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+        if duplicate:
+            # The original is still being executed and will be answered
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+
+        self._executor.submit(
+            self._execute, body, props.reply_to, correlation_id, method.delivery_tag
+        )
+
+    def _execute(self, body: bytes, reply_to: Optional[str], correlation_id: str, delivery_tag: int) -> None:
+        """Runs on a worker thread"""
+        from django.db import close_old_connections
+
+        close_old_connections()
+        shared = self._claim_shared(correlation_id)
+        if shared is not _CLAIMED:
+            # Answered by an earlier delivery (resend that reply), or being
+            # executed by another server process (only ack, it answers)
+            with self._dedup_lock:
+                self._in_flight.discard(correlation_id)
+                if shared is not None:
+                    self._remember(correlation_id, shared)
+            if shared is None:
+                reply_to, shared = None, b''
+            self._queue_reply(reply_to, correlation_id, shared, delivery_tag)
+            return
+
+        try:
+            request = json.loads(body.decode())
+            method_name = request.get('method')
+            func = self._methods.get(method_name)
+            if func is None:
+                response = {'error': f"Unknown RPC method {self.service}.{method_name}"}
+            else:
+                response = {'result': func(**(request.get('params') or {}))}
+        except Exception as e:
+            logger.error(f"RPC method failed: {e}", exc_info=True)
+            response = {'error': str(e)}
+        finally:
+            close_old_connections()
+
+        reply = json.dumps(response, default=str).encode()
+        with self._dedup_lock:
+            self._in_flight.discard(correlation_id)
+            if correlation_id:
+                self._remember(correlation_id, reply)
+        self._remember_shared(correlation_id, reply)
+        self._queue_reply(reply_to, correlation_id, reply, delivery_tag)
+
+    def _queue_reply(self, reply_to: Optional[str], correlation_id: str, reply: bytes, delivery_tag: int) -> None:
+        """Hand a reply and the ack of its request to the I/O thread"""
+        with self._replies_lock:
+            self._replies.append((reply_to, correlation_id, reply, delivery_tag))
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
+        if schedule:
+            self._connection.add_callback_threadsafe(self._flush_replies)
+
+    def _flush_replies(self) -> None:
+        """Runs on the I/O thread: publish every queued reply and ack its request"""
+        with self._replies_lock:
+            replies, self._replies = self._replies, []
+            self._flush_scheduled = False
+
+        for reply_to, correlation_id, reply, delivery_tag in replies:
+            self._send_reply(reply_to, correlation_id, reply)
+            if self._channel.is_open:
+                self._channel.basic_ack(delivery_tag=delivery_tag)
+
+    def _send_reply(self, reply_to: Optional[str], correlation_id: str, reply: bytes) -> None:
+        if not reply_to or not self._channel.is_open:
+            return
+        try:
+            self._channel.basic_publish(
+                exchange='',
+                routing_key=reply_to,
+                properties=pika.BasicProperties(
+                    correlation_id=correlation_id,
+                    content_type='application/json'
+                ),
+                body=reply
+            )
+        except Exception as e:
+            logger.error(f"Failed to send RPC reply {correlation_id}: {e}")
+
+    def _get_completed(self, correlation_id: str) -> Optional[bytes]:
+        """Cached reply for a correlation_id; caller must hold _dedup_lock"""
+        entry = self._completed.get(correlation_id)
+        if entry is None:
+            return None
+        expires_at, reply = entry
+        if expires_at < monotonic():
+            del self._completed[correlation_id]
+            return None
+        return reply
+
+    def _remember(self, correlation_id: str, reply: bytes) -> None:
+        """Cache a reply for dedup; caller must hold _dedup_lock"""
+        self._completed[correlation_id] = (monotonic() + self.dedup_ttl, reply)
+        self._completed.move_to_end(correlation_id)
+        while len(self._completed) > self.dedup_size:
+            self._completed.popitem(last=False)
+
+    def _shared_key(self, correlation_id: str) -> str:
+        return f'rpc:{self.service}:{correlation_id}'
+
+    def _claim_shared(self, correlation_id: str):
+        """
+        _CLAIMED when this process should execute the request, the cached
+        reply when one was already sent, None while another process runs it
+        """
+        if not correlation_id or not self.dedup_cache_alias:
+            return _CLAIMED
+        from django.core.cache import caches
+        cache = caches[self.dedup_cache_alias]
+        key = self._shared_key(correlation_id)
+        try:
+            if cache.add(key, _PROCESSING, timeout=self.processing_ttl) is not False:
+                # True, or None when django-redis swallowed a connection error
+                return _CLAIMED
+            reply = cache.get(key)
+        except Exception as e:
+            logger.warning(f"RPC dedup cache unavailable, executing {correlation_id} anyway: {e}")
+            return _CLAIMED
+        return reply if isinstance(reply, bytes) else None
+
+    def _remember_shared(self, correlation_id: str, reply: bytes) -> None:
+        if not correlation_id or not self.dedup_cache_alias:
+            return
+        from django.core.cache import caches
+        try:
+            caches[self.dedup_cache_alias].set(self._shared_key(correlation_id), reply, timeout=self.dedup_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to share RPC reply {correlation_id}: {e}")
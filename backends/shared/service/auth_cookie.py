@@ -1,28 +1,159 @@
+from functools import lru_cache
+from asgiref.sync import sync_to_async
 from ninja.security import HttpBearer
 from ninja_jwt.authentication import JWTBaseAuthentication
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken
+from ninja_jwt.settings import api_settings
 from ninja.errors import AuthenticationError
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
 import logging
 
+from shared.service.tokens import get_token_claims
+
 logger = logging.getLogger('application')
 
+
+@lru_cache(maxsize=None)
+def get_user_loader():
+    """
+    Callable resolving the token's user id to a user (or None), from the
+    AUTH_USER_LOADER setting; None to query the user model directly.
+    """
+    path = getattr(settings, 'AUTH_USER_LOADER', None)
+    return import_string(path) if path else None
+
+
+class TokenPrincipal:
+    """
+    Authenticated user as described by its access token.
+
+    ``id``/``pk`` and the AUTH_TOKEN_CLAIMS (mobile, role, ...) are read from
+    the token. Anything else (ORM fields, model methods) needs the user:
+    load it explicitly with ``.user`` (or ``await .auser()`` in async code),
+    after that it is served from it. Attribute access never queries.
+    """
+
+    __slots__ = ('id', 'pk', 'claims', '_loader', '_user')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, claims: dict, loader):
+        self.id = self.pk = user_id
+        self.claims = claims
+        self._loader = loader
+        self._user = None
+
+    @property
+    def has_all_claims(self) -> bool:
+        """False for tokens issued before some AUTH_TOKEN_CLAIMS existed"""
+        return all(claim in self.claims for claim in get_token_claims())
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = self._loader()
+        return self._user
+
+    async def auser(self):
+        """``.user`` for async views, loaded on a worker thread"""
+        if self._user is None:
+            self._user = await sync_to_async(self._loader)()
+        return self._user
+
+    def __getattr__(self, name):
+        # Only called for names that are not slots or class attributes
+        claims = object.__getattribute__(self, 'claims')
+        if name in claims:
+            return claims[name]
+        if name.startswith('__'):
+            raise AttributeError(name)
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            raise AttributeError(
+                f"{name!r} is not a token claim and the user is not loaded, "
+                f"use .user (or await .auser() in async code)"
+            )
+        return getattr(user, name)
+
+    def __repr__(self):
+        return f'<TokenPrincipal {self.id}>'
+
+
 class CookieJWTAuth(JWTBaseAuthentication, HttpBearer):
     """
     Custom JWT auth: reads token from Authorization header OR 'access' cookie.
+
+    With ``stateless=True`` request.auth is a TokenPrincipal built from the
+    token alone, no query is made unless the view loads the user model or
+    the token lacks some AUTH_TOKEN_CLAIMS (issued before they were added).
+    A deactivated user keeps access until the token expires.
     """
 
-    def __call__(self, request: HttpRequest):
+    def __init__(self, stateless: bool = False):
+        super().__init__()
+        self.stateless = stateless
+
+    @staticmethod
+    def get_token(request: HttpRequest):
         auth_header = request.headers.get("Authorization", None)
         token = None
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split("Bearer ")[1]
         elif "access" in request.COOKIES:
             token = request.COOKIES.get("access")
+        return token
 
+    def __call__(self, request: HttpRequest):
+        token = self.get_token(request)
         if not token:
             return None  # anonymous user
         return self.authenticate(request, token)
 
+    def get_user(self, validated_token):
+        if self.stateless:
+            principal = self.get_principal(validated_token)
+            if not principal.has_all_claims:
+                # Older token: load the user now, views only read claims
+                principal.user
+            return principal
+        return self.load_user(validated_token)
+
+    def get_principal(self, validated_token) -> TokenPrincipal:
+        """TokenPrincipal of the token, the user is loaded on first use of .user"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        claims = {
+            claim: validated_token[claim]
+            for claim in get_token_claims()
+            if claim in validated_token
+        }
+        return TokenPrincipal(user_id, claims, lambda: self.load_user(validated_token))
+
+    def load_user(self, validated_token):
+        """Resolve the user through AUTH_USER_LOADER (e.g. a cache) when configured"""
+        loader = get_user_loader()
+        if loader is None:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = loader(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"))
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
+
     def authenticate(self, request: HttpRequest, token: str):
         """
         This method is required by HttpBearer.
@@ -33,3 +164,36 @@ class CookieJWTAuth(JWTBaseAuthentication, HttpBearer):
             return user
         except Exception as e:
             raise AuthenticationError(str(e))
+
+
+class AsyncCookieJWTAuth(CookieJWTAuth):
+    """
+    CookieJWTAuth for async views.
+
+    The token signature and claims are checked in the event loop (no I/O).
+    Stateless mode stays in the loop unless the token lacks some claims;
+    otherwise the user is loaded (through AUTH_USER_LOADER) with a single
+    thread hop.
+    """
+
+    async def __call__(self, request: HttpRequest):
+        token = self.get_token(request)
+        if not token:
+            return None  # anonymous user
+        return await self.authenticate(request, token)
+
+    async def authenticate(self, request: HttpRequest, token: str):
+        try:
+            request.user = AnonymousUser()
+            validated_token = self.get_validated_token(token)
+            if self.stateless:
+                user = self.get_principal(validated_token)
+                if not user.has_all_claims:
+                    # Older token: load the user now, views only read claims
+                    await user.auser()
+            else:
+                user = await sync_to_async(self.load_user)(validated_token)
+            request.user = user
+            return user
+        except Exception as e:
+            raise AuthenticationError(str(e))
@@ -1,20 +1,50 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 
+from shared.service.hashing import get_hashing_executor
+
 
 class MobileAuthBackend(ModelBackend):
+    """
+    Authenticates by mobile and password; the password is checked on the
+    hashing pool (shared.service.hashing), so authenticate()/aauthenticate()
+    never run PBKDF2 on the request worker. HashingUnavailable propagates.
+    """
+
     def authenticate(self, request, mobile=None, password=None, **kwargs):
         UserModel = get_user_model()
+        mobile = mobile or kwargs.get('username')
+        if mobile is None or password is None:
+            return None
+        hashing = get_hashing_executor()
         try:
             user = UserModel.objects.get(mobile=mobile)
-            if user.check_password(password):
-                return user
         except UserModel.DoesNotExist:
+            # Hash anyway so an unknown mobile takes as long as a wrong password
+            hashing.make_password(password)
+            return None
+        if hashing.check_password(password, user.password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, mobile=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        mobile = mobile or kwargs.get('username')
+        if mobile is None or password is None:
+            return None
+        hashing = get_hashing_executor()
+        try:
+            user = await UserModel.objects.aget(mobile=mobile)
+        except UserModel.DoesNotExist:
+            await hashing.amake_password(password)
             return None
+        if await hashing.acheck_password(password, user.password) and self.user_can_authenticate(user):
+            return user
+        return None
 
     def get_user(self, user_id):
         UserModel = get_user_model()
         try:
             return UserModel.objects.get(pk=user_id)
         except UserModel.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
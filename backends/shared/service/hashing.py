@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from time import time
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger('application')
+
+_EXPIRED = '__hashing_expired__'
+
+
+class HashingUnavailable(Exception):
+    """The hashing pool cannot take the job in time; ``status_code`` is the HTTP answer"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _run_job(deadline: float, func: Callable, args: tuple) -> Any:
+    # Still queued past the deadline: the caller already gave up, skip the work
+    if time() > deadline:
+        return _EXPIRED
+    return func(*args)
+
+
+class HashingExecutor:
+    """
+    Process pool for password hashing (PBKDF2 is CPU-bound by design).
+
+    Hashing off the request workers keeps a login burst from starving the
+    cheap endpoints. Admission is bounded: with ``max_workers`` running and
+    ``max_queue`` waiting, new jobs are refused at once (429); a job still
+    waiting after ``queue_timeout`` seconds fails with 503 and is dropped
+    by the worker without being computed.
+
+    ``max_workers=0`` hashes inline, for tests and management commands.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, queue_timeout: float = 2.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._lock = Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, a fork would copy the event loop and open sockets. No
+                # django.setup() there: the hashers only read settings, and
+                # setup would run every AppConfig.ready() (broker warm-up,
+                # log handlers, metrics collectors) in each worker
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise HashingUnavailable('Too many authentication requests, try again shortly', 429)
+            self._in_flight += 1
+
+    def _release(self, future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _submit(self, func: Callable, args: tuple):
+        self._admit()
+        try:
+            future = self._get_pool().submit(_run_job, time() + self.queue_timeout, func, args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    @staticmethod
+    def _result(value: Any) -> Any:
+        if isinstance(value, str) and value == _EXPIRED:
+            raise HashingUnavailable('Authentication is busy, try again shortly', 503)
+        return value
+
+    def _broken(self, e: BrokenProcessPool) -> HashingUnavailable:
+        """A worker died (e.g. OOM killed): start a fresh pool on the next call"""
+        logger.error(f"Password hashing pool broken, restarting it: {e}")
+        self.shutdown()
+        return HashingUnavailable('Authentication is temporarily unavailable', 503)
+
+    def call(self, func: Callable, *args) -> Any:
+        """Run ``func(*args)`` in the pool and wait for it"""
+        if not self.max_workers:
+            return func(*args)
+        try:
+            return self._result(self._submit(func, args).result())
+        except BrokenProcessPool as e:
+            raise self._broken(e) from e
+
+    async def acall(self, func: Callable, *args) -> Any:
+        """Awaitable call(), the event loop keeps serving while the job runs"""
+        if not self.max_workers:
+            return func(*args)
+        try:
+            return self._result(await asyncio.wrap_future(self._submit(func, args)))
+        except BrokenProcessPool as e:
+            raise self._broken(e) from e
+
+    def make_password(self, password: str) -> str:
+        return self.call(hashers.make_password, password)
+
+    def check_password(self, password: str, encoded: str) -> bool:
+        return self.call(hashers.check_password, password, encoded)
+
+    async def amake_password(self, password: str) -> str:
+        return await self.acall(hashers.make_password, password)
+
+    async def acheck_password(self, password: str, encoded: str) -> bool:
+        return await self.acall(hashers.check_password, password, encoded)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_default_executor: Optional[HashingExecutor] = None
+
+
+def get_hashing_executor() -> HashingExecutor:
+    """Executor of this process, sized by the PASSWORD_HASHING_* settings"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = HashingExecutor(
+            max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+            max_queue=getattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', 32),
+            queue_timeout=getattr(settings, 'PASSWORD_HASHING_QUEUE_TIMEOUT', 2.0)
+        )
+    return _default_executor
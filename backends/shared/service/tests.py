@@ -0,0 +1,252 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from ninja.errors import Throttled
+from ninja_jwt.exceptions import TokenError
+from ninja_jwt.tokens import AccessToken
+
+from shared.service.auth_cookie import CookieJWTAuth, TokenPrincipal
+from shared.service.hashing import HashingExecutor, HashingUnavailable
+from shared.service.throttling import SlidingWindowThrottle, async_throttle, parse_rate
+from shared.service.tokens import ClaimsRefreshToken, _blacklist_key, cache_blacklist_state
+
+
+def access_token(**claims) -> str:
+    token = AccessToken()
+    token['user_id'] = 7
+    for name, value in claims.items():
+        token[name] = value
+    return str(token)
+
+
+class TokenPrincipalTests(SimpleTestCase):
+    def setUp(self):
+        self.user = SimpleNamespace(id=7, first_name='Sara', is_active=True)
+        self.loader = mock.Mock(return_value=self.user)
+        self.principal = TokenPrincipal(7, {'mobile': '09120000000', 'role': 1}, self.loader)
+
+    def test_claims_are_read_without_loading_the_user(self):
+        self.assertEqual((self.principal.id, self.principal.pk), (7, 7))
+        self.assertEqual((self.principal.mobile, self.principal.role), ('09120000000', 1))
+        self.assertTrue(self.principal.is_authenticated)
+        self.assertTrue(self.principal.has_all_claims)
+        self.loader.assert_not_called()
+
+    def test_other_attributes_need_the_user_loaded(self):
+        with self.assertRaisesMessage(AttributeError, "'first_name' is not a token claim"):
+            self.principal.first_name
+        self.loader.assert_not_called()
+
+        self.assertIs(self.principal.user, self.user)
+        self.assertIs(self.principal.user, self.user)
+        self.assertEqual(self.principal.first_name, 'Sara')
+        self.loader.assert_called_once_with()
+
+    async def test_auser_loads_once(self):
+        self.assertIs(await self.principal.auser(), self.user)
+        self.assertIs(await self.principal.auser(), self.user)
+        self.loader.assert_called_once_with()
+
+    def test_missing_claims(self):
+        self.assertFalse(TokenPrincipal(7, {'mobile': '09120000000'}, self.loader).has_all_claims)
+
+
+class StatelessAuthTests(SimpleTestCase):
+    def setUp(self):
+        self.auth = CookieJWTAuth(stateless=True)
+        self.loader = mock.Mock(return_value=SimpleNamespace(id=7, is_active=True))
+        patcher = mock.patch('shared.service.auth_cookie.get_user_loader', return_value=self.loader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_with_every_claim_is_answered_without_the_user(self):
+        principal = self.auth.get_user(self.auth.get_validated_token(access_token(mobile='09120000000', role=1)))
+
+        self.assertIsInstance(principal, TokenPrincipal)
+        self.assertEqual((principal.id, principal.mobile, principal.role), (7, '09120000000', 1))
+        self.loader.assert_not_called()
+
+    def test_older_token_loads_the_user(self):
+        principal = self.auth.get_user(self.auth.get_validated_token(access_token(mobile='09120000000')))
+
+        self.assertFalse(principal.has_all_claims)
+        self.loader.assert_called_once_with(7)
+        self.assertTrue(principal.is_active)
+
+
+class HashingExecutorTests(SimpleTestCase):
+    def make_executor(self, **kwargs) -> HashingExecutor:
+        executor = HashingExecutor(**kwargs)
+        # Threads stand in for the spawned processes
+        pool = ThreadPoolExecutor(max_workers=executor.max_workers)
+        self.addCleanup(pool.shutdown)
+        executor._get_pool = mock.Mock(return_value=pool)
+        return executor
+
+    @staticmethod
+    def drain(executor: HashingExecutor) -> None:
+        # Slots are freed by done callbacks, which may run after result() returns
+        executor._get_pool.return_value.shutdown(wait=True)
+
+    def test_zero_workers_hash_inline(self):
+        executor = HashingExecutor(max_workers=0)
+        encoded = executor.make_password('secret-pass')
+        self.assertTrue(executor.check_password('secret-pass', encoded))
+        self.assertFalse(asyncio.run(executor.acheck_password('wrong-pass', encoded)))
+        self.assertIsNone(executor._pool)
+
+    def test_jobs_run_on_the_pool_and_free_their_slot(self):
+        executor = self.make_executor(max_workers=1, max_queue=0)
+        self.assertEqual(executor.call(pow, 2, 10), 1024)
+        self.assertEqual(asyncio.run(executor.acall(pow, 2, 3)), 8)
+        self.drain(executor)
+        self.assertEqual(executor._in_flight, 0)
+
+    def test_full_pool_refuses_new_jobs_with_429(self):
+        executor = self.make_executor(max_workers=1, max_queue=1)
+        executor._in_flight = 2
+        with self.assertRaises(HashingUnavailable) as raised:
+            executor.call(pow, 2, 10)
+        self.assertEqual(raised.exception.status_code, 429)
+        executor._get_pool.assert_not_called()
+        self.assertEqual(executor._in_flight, 2)
+
+    def test_job_queued_past_its_deadline_is_skipped_with_503(self):
+        executor = self.make_executor(max_workers=1, max_queue=0, queue_timeout=-1)
+        func = mock.Mock()
+        with self.assertRaises(HashingUnavailable) as raised:
+            executor.call(func)
+        self.assertEqual(raised.exception.status_code, 503)
+        func.assert_not_called()
+        self.drain(executor)
+        self.assertEqual(executor._in_flight, 0)
+
+    def test_failed_submit_frees_its_slot(self):
+        executor = self.make_executor(max_workers=1, max_queue=0)
+        executor._get_pool.return_value = mock.Mock(**{'submit.side_effect': RuntimeError('shut down')})
+        with self.assertRaises(RuntimeError):
+            executor.call(pow, 2, 10)
+        self.assertEqual(executor._in_flight, 0)
+
+
+class ParseRateTests(SimpleTestCase):
+    def test_rates(self):
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+        self.assertEqual(parse_rate('30/min'), (30, 60))
+        self.assertEqual(parse_rate('5/15min'), (5, 900))
+        self.assertEqual(parse_rate('10 / hour'), (10, 3600))
+        self.assertEqual(parse_rate('100/2d'), (100, 172800))
+
+    def test_invalid_rates(self):
+        for rate in ('5', '5/week', 'five/min', '/min', '5/-1min'):
+            with self.assertRaises(ImproperlyConfigured):
+                parse_rate(rate)
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        self.throttle = SlidingWindowThrottle('login', ip='30/min', mobile='5/15min')
+        self.pipe = mock.Mock()
+        patcher = mock.patch('django_redis.get_redis_connection', **{'return_value.pipeline.return_value': self.pipe})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('shared.service.throttling.time', return_value=1000.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, **body):
+        return RequestFactory().post('/login', json.dumps(body), content_type='application/json', REMOTE_ADDR='10.0.0.1')
+
+    def test_rates_come_from_the_settings(self):
+        self.assertEqual(SlidingWindowThrottle('login').rules, [('ip', 30, 60), ('mobile', 5, 900)])
+        with override_settings(THROTTLE_RATES={}), self.assertRaises(ImproperlyConfigured):
+            SlidingWindowThrottle('login')
+
+    def test_every_rule_is_checked_in_one_round_trip(self):
+        self.pipe.execute.return_value = [(1, 3, None), (1, 1, None)]
+        self.assertIsNone(self.throttle.check(self.request(mobile='09120000000')))
+
+        self.pipe.execute.assert_called_once_with()
+        ip_call, mobile_call = self.pipe.eval.call_args_list
+        # Rejected attempts are recorded for the ip rule only
+        self.assertEqual(ip_call.args[4:6] + ip_call.args[7:], (60, 30, 1))
+        self.assertEqual(mobile_call.args[4:6] + mobile_call.args[7:], (900, 5, 0))
+        self.assertNotEqual(ip_call.args[2], mobile_call.args[2])
+
+    def test_rejection_waits_until_the_blocking_entry_expires(self):
+        # The oldest of the 5 mobile attempts was made 100s ago
+        self.pipe.execute.return_value = [(1, 3, None), (0, 5, b'900.0')]
+        self.assertEqual(self.throttle.check(self.request(mobile='09120000000')), 800.0)
+
+    def test_rules_without_an_identity_are_skipped(self):
+        self.pipe.execute.return_value = [(1, 1, None)]
+        self.throttle.check(self.request())
+        self.assertEqual(self.pipe.eval.call_count, 1)
+
+    def test_fails_open_when_redis_is_unavailable(self):
+        self.pipe.execute.side_effect = ConnectionError('redis down')
+        self.assertIsNone(self.throttle.check(self.request(mobile='09120000000')))
+
+    def test_allow_request_reports_the_wait(self):
+        self.pipe.execute.return_value = [(0, 31, b'990.5'), (1, 1, None)]
+        self.assertFalse(self.throttle.allow_request(self.request(mobile='09120000000')))
+        self.assertEqual(self.throttle.wait(), 51)
+
+    def test_async_throttle_raises_throttled_before_the_view_runs(self):
+        view = mock.AsyncMock(return_value='ok')
+        throttled_view = async_throttle(self.throttle)(view)
+
+        self.pipe.execute.return_value = [(1, 3, None), (1, 1, None)]
+        self.assertEqual(asyncio.run(throttled_view(self.request(mobile='09120000000'))), 'ok')
+
+        self.pipe.execute.return_value = [(1, 4, None), (0, 5, b'900.2')]
+        with self.assertRaises(Throttled) as raised:
+            asyncio.run(throttled_view(self.request(mobile='09120000000')))
+        self.assertEqual(raised.exception.wait, 801)
+        view.assert_awaited_once()
+
+
+class CachedBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(mobile='09120000000', username='09120000000', password='secret-pass', role=1)
+        self.token = ClaimsRefreshToken.for_user(user)
+        self.jti = self.token['jti']
+
+    def test_refresh_token_carries_the_claims(self):
+        self.assertEqual((self.token['mobile'], self.token['role']), ('09120000000', 1))
+        self.assertEqual(self.token.access_token['mobile'], '09120000000')
+
+    def test_clean_state_is_cached(self):
+        self.token.check_blacklist()
+        self.assertIs(cache.get(_blacklist_key(self.jti)), False)
+        with self.assertNumQueries(0):
+            ClaimsRefreshToken(str(self.token))
+
+    def test_blacklisting_replaces_a_cached_clean_state(self):
+        self.token.check_blacklist()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.blacklist()
+
+        self.assertIs(cache.get(_blacklist_key(self.jti)), True)
+        with self.assertNumQueries(0), self.assertRaisesMessage(TokenError, 'blacklisted'):
+            ClaimsRefreshToken(str(self.token))
+
+    def test_late_clean_state_does_not_overwrite_a_blacklisting(self):
+        # A check that read the database just before the logout caches last
+        cache_blacklist_state(self.jti, True, self.token['exp'])
+        cache_blacklist_state(self.jti, False, self.token['exp'])
+        self.assertIs(cache.get(_blacklist_key(self.jti)), True)
+
+    def test_miss_reads_the_database(self):
+        self.token.blacklist()
+        with self.assertRaisesMessage(TokenError, 'blacklisted'):
+            self.token.check_blacklist()
+        self.assertIs(cache.get(_blacklist_key(self.jti)), True)
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import math
+import re
+from contextvars import ContextVar
+from functools import wraps
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest
+from ninja.errors import Throttled
+from ninja.throttling import BaseThrottle
+
+from shared.utils.request import get_client_ip
+
+logger = logging.getLogger('security')
+
+_RATE_RE = re.compile(r'^(\d+)/(\d*)(s|sec|m|min|h|hour|d|day)$')
+_PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+# Seconds until the request just rejected would fit; per request (thread or
+# task), the throttle object itself is shared by all of them
+_wait: ContextVar[Optional[float]] = ContextVar('throttle_wait', default=None)
+
+# KEYS[1] window of one identity; ARGV: now, window, limit, member, record_rejected.
+# Returns {admitted, requests in the window, score of the entry that has to
+# expire before the next request fits}
+_CHECK_SCRIPT = '''
+local now, window, limit = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local admitted = count < limit
+if admitted or ARGV[5] == '1' then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    count = count + 1
+end
+redis.call('EXPIRE', KEYS[1], window)
+local blocking = redis.call('ZRANGE', KEYS[1], -limit, -limit, 'WITHSCORES')
+return {admitted and 1 or 0, count, blocking[2] or false}
+'''
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'5/15min' -> (5, 900): requests allowed per window of seconds"""
+    match = _RATE_RE.match(rate.replace(' ', ''))
+    if not match:
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}, expected e.g. '5/min' or '5/15min'")
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * _PERIODS[unit]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window rate limits kept in Redis sorted sets.
+
+    Each rule counts the requests of one identity in the last ``window``
+    seconds: ``ip`` is the client address (same as the request logs),
+    any other name is a field of the JSON or form body, e.g. ``mobile``.
+    Rates come from the keyword arguments or THROTTLE_RATES[scope]:
+
+        SlidingWindowThrottle('login', ip='30/min', mobile='5/15min')
+
+    All rules are checked in a single pipelined round trip. For ``ip``
+    rejected attempts are recorded too, so a client hammering past the
+    limit stays blocked until it slows down. Body-field rules only record
+    admitted attempts: anyone can send someone else's mobile, and counting
+    those rejections would let them keep its owner locked out for good.
+    If Redis is unreachable requests are let through, throttling must not
+    take the login down with it.
+
+    Pass it as ``throttle=`` to a ninja Router or operation of sync views.
+    ninja checks throttles synchronously even for async views, which would
+    block the event loop on Redis: decorate those with ``async_throttle``.
+    """
+
+    def __init__(self, scope: str, cache_alias: str = 'default', **rates: str):
+        self.scope = scope
+        self.cache_alias = cache_alias
+        rates = rates or getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+        if not rates:
+            raise ImproperlyConfigured(f"No throttle rates configured for scope {scope!r}")
+        self.rules: List[Tuple[str, int, int]] = [(name, *parse_rate(rate)) for name, rate in rates.items()]
+
+    def get_identity(self, request: HttpRequest, name: str) -> Optional[str]:
+        if name == 'ip':
+            return get_client_ip(request)
+        value = self._body(request).get(name)
+        return str(value).strip() if value not in (None, '') else None
+
+    @staticmethod
+    def _body(request: HttpRequest) -> Dict:
+        # Throttles run before ninja parses the body
+        if request.content_type == 'application/json':
+            try:
+                body = json.loads(request.body or b'{}')
+            except ValueError:
+                return {}
+            return body if isinstance(body, dict) else {}
+        return request.POST
+
+    def _key(self, name: str, identity: str) -> str:
+        from django.core.cache import caches
+        digest = hashlib.sha1(identity.encode()).hexdigest()
+        return caches[self.cache_alias].make_key(f'throttle:{self.scope}:{name}:{digest}')
+
+    def check(self, request: HttpRequest) -> Optional[float]:
+        """None if the request is admitted, else the seconds until it would be"""
+        checks = []
+        for name, limit, window in self.rules:
+            identity = self.get_identity(request, name)
+            if identity:
+                checks.append((name, limit, window, self._key(name, identity)))
+        if not checks:
+            return None
+
+        now = time()
+        member = f'{now}:{uuid4().hex[:8]}'
+        try:
+            from django_redis import get_redis_connection
+            pipe = get_redis_connection(self.cache_alias).pipeline()
+            for name, limit, window, key in checks:
+                pipe.eval(_CHECK_SCRIPT, 1, key, repr(now), window, limit, member, int(name == 'ip'))
+            results = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Throttle {self.scope} skipped, Redis unavailable: {e}")
+            return None
+
+        waits = []
+        for (name, limit, window, key), (admitted, count, blocking) in zip(checks, results):
+            if not admitted:
+                waits.append(float(blocking) + window - now if blocking else window)
+                logger.warning(f"Throttled {self.scope} by {name}: {count} requests in {window}s")
+        return max(waits) if waits else None
+
+    async def acheck(self, request: HttpRequest) -> Optional[float]:
+        """check() on a worker thread, the event loop keeps serving meanwhile"""
+        return await sync_to_async(self.check, thread_sensitive=False)(request)
+
+    def allow_request(self, request: HttpRequest) -> bool:
+        wait = self.check(request)
+        _wait.set(wait)
+        return wait is None
+
+    def wait(self) -> Optional[float]:
+        # ninja calls it right after allow_request(), in the same context
+        wait = _wait.get()
+        return math.ceil(wait) if wait is not None else None
+
+
+def async_throttle(*throttles: SlidingWindowThrottle) -> Callable:
+    """
+    Throttles for an async ninja view, checked with acheck() before the view
+    body runs. Rejections raise ninja's Throttled, like ``throttle=`` does.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            waits = [await throttle.acheck(request) for throttle in throttles]
+            waits = [wait for wait in waits if wait is not None]
+            if waits:
+                raise Throttled(wait=math.ceil(max(waits)))
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+from time import time
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from ninja_jwt.exceptions import TokenError
+from ninja_jwt.settings import api_settings
+from ninja_jwt.token_blacklist.models import BlacklistedToken
+from ninja_jwt.tokens import RefreshToken
+
+
+def get_token_claims() -> Tuple[str, ...]:
+    """User attributes embedded in tokens (AUTH_TOKEN_CLAIMS), e.g. ('mobile', 'role')"""
+    return tuple(getattr(settings, 'AUTH_TOKEN_CLAIMS', ()))
+
+
+def _blacklist_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_BLACKLIST_CACHE', 'default')]
+
+
+def _blacklist_key(jti: str) -> str:
+    return f'jwt:blacklist:{jti}'
+
+
+def cache_blacklist_state(jti: str, blacklisted: bool, exp: Optional[int]) -> None:
+    """
+    Remember whether ``jti`` is blacklisted. Blacklisted entries live until
+    the token expires (after that verify() rejects it anyway); clean ones
+    for AUTH_TOKEN_BLACKLIST_CACHE_TIMEOUT at most, in case a token is
+    blacklisted without going through the ORM.
+
+    The clean state is only added, never overwrites: a check that read the
+    database just before a logout must not replace the blacklisted entry
+    the logout wrote in the meantime.
+    """
+    remaining = max(int(exp - time()), 1) if exp else None
+    if blacklisted:
+        _blacklist_cache().set(_blacklist_key(jti), True, timeout=remaining)
+        return
+    clean_timeout = getattr(settings, 'AUTH_TOKEN_BLACKLIST_CACHE_TIMEOUT', 600)
+    timeout = min(remaining, clean_timeout) if remaining else clean_timeout
+    _blacklist_cache().add(_blacklist_key(jti), False, timeout=timeout)
+
+
+def blacklisted_token_saved(sender, instance: BlacklistedToken, created: bool, **kwargs) -> None:
+    """post_save receiver: every blacklisting (logout, rotation, admin) reaches the cache"""
+    if created:
+        token = instance.token
+        exp = int(token.expires_at.timestamp())
+        transaction.on_commit(lambda: cache_blacklist_state(token.jti, True, exp))
+
+
+class CachedBlacklistMixin:
+    """
+    Answers the refresh-token blacklist check from the cache, the
+    token_blacklist tables are only read on a miss (or when the cache is
+    down, errors are ignored by the backend).
+    """
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = _blacklist_cache().get(_blacklist_key(jti))
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            cache_blacklist_state(jti, blacklisted, self.payload.get('exp'))
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+
+class ClaimsRefreshToken(CachedBlacklistMixin, RefreshToken):
+    """
+    Refresh token carrying the AUTH_TOKEN_CLAIMS of its user. Access tokens
+    carry them too, so stateless authentication can answer without loading
+    the user. Refreshing through access_token_for() re-reads them, so a
+    change is seen within one access token lifetime. Blacklist checks go
+    through the cache.
+    """
+
+    @classmethod
+    def for_user(cls, user) -> 'ClaimsRefreshToken':
+        token = super().for_user(user)
+        for claim in get_token_claims():
+            token[claim] = getattr(user, claim)
+        return token
+
+    def access_token_for(self, user):
+        """Access token with the claims read from ``user`` now, not copied from this token"""
+        access = self.access_token
+        for claim in get_token_claims():
+            access[claim] = getattr(user, claim)
+        return access
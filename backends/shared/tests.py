@@ -0,0 +1,206 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from shared.rpc_client import RPCClient, RPCException
+from shared.rpc_server import RPCServer
+
+
+class FakeConnection:
+    """Runs threadsafe callbacks inline and timers on threading.Timer"""
+
+    def add_callback_threadsafe(self, callback):
+        callback()
+
+    def call_later(self, delay, callback):
+        timer = threading.Timer(delay, callback)
+        timer.start()
+        return timer
+
+    def remove_timeout(self, timer):
+        timer.cancel()
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self, on_publish=None):
+        self.published = []
+        self.acked = []
+        self.on_publish = on_publish
+
+    def basic_publish(self, **kwargs):
+        self.published.append(kwargs)
+        if self.on_publish:
+            self.on_publish(kwargs)
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+
+def make_client(on_publish=None) -> RPCClient:
+    # Bypass the singleton, every test gets its own client
+    client = RPCClient.__new__(RPCClient)
+    client.__init__()
+    client._connection = FakeConnection()
+    client._channel = FakeChannel(on_publish)
+    client._response_queue = 'amq.gen-replies'
+    client._running = True
+    client._io_thread = mock.Mock(**{'is_alive.return_value': True})
+    return client
+
+
+def reply(client: RPCClient, correlation_id: str, **response) -> None:
+    client._on_response(None, None, SimpleNamespace(correlation_id=correlation_id), json.dumps(response).encode())
+
+
+class RPCClientTests(SimpleTestCase):
+    def test_reply_resolves_the_call_with_the_same_correlation_id(self):
+        client = make_client()
+        first = client.call_async('account', 'get_user', {'user_id': 1}, timeout=5)
+        second = client.call_async('account', 'get_user', {'user_id': 2}, timeout=5)
+
+        reply(client, second.correlation_id, result={'id': 2})
+        reply(client, first.correlation_id, result={'id': 1})
+
+        self.assertEqual(first.result(timeout=1), {'id': 1})
+        self.assertEqual(second.result(timeout=1), {'id': 2})
+        request = client._channel.published[0]
+        self.assertEqual(request['routing_key'], 'rpc_account')
+        self.assertEqual(request['properties'].reply_to, 'amq.gen-replies')
+        self.assertEqual(request['properties'].correlation_id, first.correlation_id)
+        self.assertEqual(client.pending_count(), 0)
+
+    def test_error_reply_raises_rpc_exception(self):
+        client = make_client(lambda request: reply(
+            client, request['properties'].correlation_id, error='User not found'
+        ))
+        with self.assertRaisesMessage(RPCException, 'User not found'):
+            client.call('account', 'get_user', {'user_id': 1}, timeout=1)
+
+    def test_call_times_out_and_forgets_the_request(self):
+        client = make_client()
+        with self.assertRaises(TimeoutError):
+            client.call('account', 'get_user', {'user_id': 1}, timeout=0.05)
+        self.assertEqual(client.pending_count(), 0)
+
+        # A reply arriving after the timeout is dropped
+        reply(client, client._channel.published[0]['properties'].correlation_id, result={'id': 1})
+
+    def test_acall_awaits_the_reply(self):
+        client = make_client(lambda request: reply(
+            client, request['properties'].correlation_id, result=json.loads(request['body'])['params']
+        ))
+        result = asyncio.run(client.acall('account', 'echo', {'value': 3}, timeout=1))
+        self.assertEqual(result, {'value': 3})
+
+    def test_call_many_keeps_order_and_returns_failures(self):
+        def answer(request):
+            method = json.loads(request['body'])['method']
+            correlation_id = request['properties'].correlation_id
+            if method == 'ok':
+                reply(client, correlation_id, result='done')
+            elif method == 'broken':
+                reply(client, correlation_id, error='boom')
+            # 'slow' never answers
+
+        client = make_client(answer)
+        results = client.call_many([
+            ('account', 'slow', {}),
+            ('account', 'ok', {}),
+            ('account', 'broken', {}),
+        ], timeout=0.1)
+
+        self.assertIsInstance(results[0], TimeoutError)
+        self.assertEqual(results[1], 'done')
+        self.assertIsInstance(results[2], RPCException)
+        self.assertEqual(client.pending_count(), 0)
+
+
+class InlineExecutor:
+    def submit(self, func, *args):
+        func(*args)
+
+
+def request_body(method: str, **params) -> bytes:
+    return json.dumps({'service': 'account', 'method': method, 'params': params}).encode()
+
+
+class RPCServerDedupTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def make_server(self) -> RPCServer:
+        server = RPCServer('account')
+        server._connection = FakeConnection()
+        server._channel = FakeChannel()
+        server._executor = InlineExecutor()
+
+        @server.method()
+        def add(a, b):
+            self.calls.append((a, b))
+            return a + b
+
+        return server
+
+    def deliver(self, server: RPCServer, correlation_id: str, delivery_tag: int, body: bytes = None) -> None:
+        server._on_request(
+            server._channel,
+            SimpleNamespace(delivery_tag=delivery_tag),
+            SimpleNamespace(correlation_id=correlation_id, reply_to='amq.gen-replies'),
+            body or request_body('add', a=1, b=2)
+        )
+
+    def test_executes_and_replies(self):
+        server = self.make_server()
+        self.deliver(server, 'c1', 1)
+
+        self.assertEqual(self.calls, [(1, 2)])
+        published = server._channel.published[0]
+        self.assertEqual(published['routing_key'], 'amq.gen-replies')
+        self.assertEqual(published['properties'].correlation_id, 'c1')
+        self.assertEqual(json.loads(published['body']), {'result': 3})
+        self.assertEqual(server._channel.acked, [1])
+
+    def test_redelivery_to_the_same_server_resends_the_reply(self):
+        server = self.make_server()
+        self.deliver(server, 'c1', 1)
+        self.deliver(server, 'c1', 2)
+
+        self.assertEqual(self.calls, [(1, 2)])
+        self.assertEqual(server._channel.published[1]['body'], server._channel.published[0]['body'])
+        self.assertEqual(server._channel.acked, [1, 2])
+
+    def test_redelivery_to_another_server_resends_the_shared_reply(self):
+        first, second = self.make_server(), self.make_server()
+        self.deliver(first, 'c1', 1)
+        self.deliver(second, 'c1', 7)
+
+        self.assertEqual(self.calls, [(1, 2)])
+        self.assertEqual(second._channel.published[0]['body'], first._channel.published[0]['body'])
+        self.assertEqual(second._channel.acked, [7])
+
+    def test_request_running_on_another_server_is_acked_without_reply(self):
+        server = self.make_server()
+        cache.add(server._shared_key('c1'), 'processing')
+        self.deliver(server, 'c1', 1)
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(server._channel.published, [])
+        self.assertEqual(server._channel.acked, [1])
+
+    def test_failures_are_replied_as_errors(self):
+        server = self.make_server()
+        self.deliver(server, 'c1', 1, request_body('missing'))
+        self.deliver(server, 'c2', 2, request_body('add', a=1))
+
+        errors = [json.loads(p['body'])['error'] for p in server._channel.published]
+        self.assertIn('Unknown RPC method account.missing', errors[0])
+        self.assertIn("missing 1 required positional argument: 'b'", errors[1])
+        self.assertEqual(server._channel.acked, [1, 2])
@@ -4,20 +4,59 @@ from datetime import datetime
 import os
 from django.conf import settings
 import traceback
-from time import sleep
+from time import sleep, monotonic
+from collections import deque
 import threading
 
+from shared.utils.request import get_client_ip
+
+
 class MongoDBHandler(logging.Handler):
     """
-    Custom logging handler that stores logs in MongoDB with Docker support
+    Custom logging handler that stores logs in MongoDB with Docker support.
+
+    With ``use_queue=True`` (the default) records are only formatted and
+    enqueued on the calling thread; a background flusher writes them with
+    ``insert_many(ordered=False)`` once ``batch_size`` records are pending or
+    ``flush_interval`` seconds have passed.
     """
-    
-    def __init__(self, level=logging.NOTSET, max_retries=3, retry_delay=1):
+
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+    BLOCK = 'block'
+    OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+    def __init__(self, level=logging.NOTSET, max_retries=3, retry_delay=1,
+                 use_queue=True, queue_size=10000, batch_size=200,
+                 flush_interval=1.0, overflow_policy=DROP_OLDEST, block_timeout=0.5):
         super().__init__(level)
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.use_queue = use_queue
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
         self._connection_lock = threading.Lock()
+        self._queue = deque()
+        self._queue_cond = threading.Condition()
+        self._stopping = False
+        self._flusher = None
+
+        # Counters (read through stats())
+        self.enqueued_count = 0
+        self.dropped_count = 0
+        self.flushed_count = 0
+        self.failed_count = 0
+
         self.setup_mongo_connection()
+        if self.use_queue:
+            self._start_flusher()
     
     def setup_mongo_connection(self):
         """Initialize MongoDB connection with retry logic for Docker"""
@@ -102,6 +141,13 @@ class MongoDBHandler(logging.Handler):
     
     def emit(self, record):
         """Emit a log record to MongoDB with error handling"""
+        if self.use_queue:
+            try:
+                self._enqueue(self.format_record(record))
+            except Exception:
+                self.handleError(record)
+            return
+
         if not self.client:
             # Try to reconnect if connection was lost
             self.setup_mongo_connection()
@@ -117,6 +163,110 @@ class MongoDBHandler(logging.Handler):
             self.setup_mongo_connection()
         except Exception as e:
             print(f"Failed to write log to MongoDB: {e}")
+
+    def _enqueue(self, log_entry):
+        """Add an entry to the in-memory queue applying the overflow policy"""
+        with self._queue_cond:
+            if len(self._queue) >= self.queue_size:
+                if self.overflow_policy == self.DROP_NEWEST:
+                    self.dropped_count += 1
+                    return
+                if self.overflow_policy == self.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped_count += 1
+                else:
+                    deadline = monotonic() + self.block_timeout
+                    while len(self._queue) >= self.queue_size and not self._stopping:
+                        remaining = deadline - monotonic()
+                        if remaining <= 0:
+                            break
+                        self._queue_cond.wait(remaining)
+                    if len(self._queue) >= self.queue_size:
+                        self.dropped_count += 1
+                        return
+
+            self._queue.append(log_entry)
+            self.enqueued_count += 1
+            if len(self._queue) >= self.batch_size:
+                self._queue_cond.notify_all()
+
+    def _start_flusher(self):
+        """Start the background thread that drains the queue"""
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name='mongodb-log-flusher',
+            daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_loop(self):
+        """Write queued entries in batches by size or time window"""
+        while True:
+            with self._queue_cond:
+                if not self._stopping and len(self._queue) < self.batch_size:
+                    self._queue_cond.wait(self.flush_interval)
+                if self._stopping and not self._queue:
+                    return
+                batch = self._take_batch()
+
+            if batch:
+                self._write_batch(batch)
+
+    def _take_batch(self):
+        """Pop up to batch_size entries; caller must hold _queue_cond"""
+        count = min(len(self._queue), self.batch_size)
+        batch = [self._queue.popleft() for _ in range(count)]
+        if batch:
+            # Wake up producers waiting under the 'block' policy
+            self._queue_cond.notify_all()
+        return batch
+
+    def _write_batch(self, batch):
+        """Insert a batch into MongoDB, reconnecting once if needed"""
+        if not self.client:
+            self.setup_mongo_connection()
+            if not self.client:
+                self.failed_count += len(batch)
+                return
+
+        try:
+            with self._connection_lock:
+                self.collection.insert_many(batch, ordered=False)
+            self.flushed_count += len(batch)
+        except pymongo.errors.BulkWriteError as e:
+            inserted = e.details.get('nInserted', 0)
+            self.flushed_count += inserted
+            self.failed_count += len(batch) - inserted
+        except pymongo.errors.ServerSelectionTimeoutError:
+            print("MongoDB connection lost, attempting to reconnect...")
+            self.failed_count += len(batch)
+            self.setup_mongo_connection()
+        except Exception as e:
+            self.failed_count += len(batch)
+            print(f"Failed to write log batch to MongoDB: {e}")
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        if not self.use_queue:
+            return
+        while True:
+            with self._queue_cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def stats(self):
+        """Return queue counters"""
+        with self._queue_cond:
+            pending = len(self._queue)
+        return {
+            'pending': pending,
+            'enqueued': self.enqueued_count,
+            'dropped': self.dropped_count,
+            'flushed': self.flushed_count,
+            'failed': self.failed_count,
+        }
     
     def format_record(self, record):
         """Format log record for MongoDB storage"""
@@ -171,15 +321,18 @@ class MongoDBHandler(logging.Handler):
     
     def get_client_ip(self, request):
         """Get client IP address from request"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return get_client_ip(request)
     
     def close(self):
         """Close MongoDB connection when handler is closed"""
+        if self._flusher is not None:
+            with self._queue_cond:
+                self._stopping = True
+                self._queue_cond.notify_all()
+            self._flusher.join(timeout=self.flush_interval + 5)
+            self._flusher = None
+            self.flush()
+
         if self.client:
             self.client.close()
         super().close()
\ No newline at end of file